@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import run_pipeline
+import synthetic_data
+
+# =====================
+# CONFIGURATION
+# =====================
+DEFAULT_SCALES = [1, 10, 100]
+DEFAULT_TOLERANCE = 0.25  # flag stages more than 25% slower than the baseline
+
+
+# =====================
+# FUNCTIONS
+# =====================
+def maxrss_mb(rusage):
+    """ru_maxrss is in kilobytes on Linux and in bytes on macOS."""
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return rusage.ru_maxrss / divisor
+
+
+def time_stage(stage, base_dir):
+    """Run one stage against base_dir and return its wall time, CPU time and peak RSS."""
+    env = dict(os.environ, NEUROMETABOLIC_BASE_DIR=base_dir, MPLBACKEND="Agg")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, stage["script"]], cwd=run_pipeline.REPO_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    stderr = proc.stderr.read()
+    _, status, rusage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{stage['name']} failed:\n{stderr.decode(errors='replace')}")
+    return {
+        "stage": stage["name"],
+        "wall_s": round(wall, 3),
+        "cpu_s": round(rusage.ru_utime + rusage.ru_stime, 3),
+        "peak_rss_mb": round(maxrss_mb(rusage), 1),
+    }
+
+
+def benchmark_scale(scale, work_dir, seed=0):
+    """Generate synthetic inputs at the given scale and time every stage on them."""
+    base_dir = os.path.join(work_dir, f"scale_{scale:g}x")
+    start = time.perf_counter()
+    sizes = synthetic_data.generate(base_dir, scale=scale, seed=seed)
+    print(f"Generated {scale:g}× datasets in {time.perf_counter() - start:.1f} s: {base_dir}")
+
+    results = []
+    for stage in run_pipeline.order_stages(run_pipeline.STAGES):
+        result = time_stage(stage, base_dir)
+        result["scale"] = scale
+        results.append(result)
+        print(f"  {stage['name']:<28} {result['wall_s']:>8.2f} s  {result['cpu_s']:>8.2f} s CPU  {result['peak_rss_mb']:>8.1f} MB")
+    return {"scale": scale, "sizes": sizes, "stages": results}
+
+
+def find_regressions(runs, baseline, tolerance):
+    """Compare stage wall times and peak RSS against a previous report."""
+    previous = {(r["scale"], r["stage"]): r for run in baseline["runs"] for r in run["stages"]}
+    regressions = []
+    for run in runs:
+        for result in run["stages"]:
+            old = previous.get((result["scale"], result["stage"]))
+            if old is None:
+                continue
+            for metric in ["wall_s", "peak_rss_mb"]:
+                if old[metric] > 0 and result[metric] > old[metric] * (1 + tolerance):
+                    regressions.append(
+                        f"{result['stage']} @ {result['scale']:g}×: {metric} {old[metric]} → {result[metric]}"
+                    )
+    return regressions
+
+
+# =====================
+# MAIN
+# =====================
+def main():
+    parser = argparse.ArgumentParser(description="Time and memory-profile every stage on synthetic data.")
+    parser.add_argument("--scales", type=float, nargs="+", default=DEFAULT_SCALES,
+                        help="multiples of the real release sizes (default: 1 10 100)")
+    parser.add_argument("--work-dir", help="where synthetic datasets are written (default: a temp dir)")
+    parser.add_argument("--output", default="bench_output.json", help="JSON report path")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="gene_therapy_bench_")
+    runs = [benchmark_scale(scale, work_dir, seed=args.seed) for scale in args.scales]
+
+    report = {"python": sys.version.split()[0], "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "runs": runs}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Saved benchmark report to: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(runs, baseline, args.tolerance)
+        if regressions:
+            print("⚠️ Regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("✅ No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,43 @@
 #!/usr/bin/env python3
 
-import pandas as pd
+import os
+
+import pipeline_paths
+from pipeline_io import open_input, read_table
+from stage_metrics import StageMetrics
 
 # === Input paths ===
-orphacodes_txt = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Gene Association/Monogenic Association/Disorder Classification/ClinGen/definitive_orphacodes.txt"
-input_csv = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Gene Association/Monogenic Association/Disorder Classification/kept_disorders.csv"
+orphacodes_txt = os.path.join(pipeline_paths.CLINGEN_DIR, "definitive_orphacodes.txt")
+input_csv = os.path.join(pipeline_paths.CLASSIFICATION_DIR, "kept_disorders.csv")
 
 # === Output path ===
-output_csv = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Gene Association/Monogenic Association/Disorder Classification/ClinGen/definitive_disorders.csv"
+output_csv = os.path.join(pipeline_paths.CLINGEN_DIR, "definitive_disorders.csv")
+
+metrics = StageMetrics("clingen_filter")
 
 # === Load OrphaCodes from TXT file ===
-with open(orphacodes_txt, "r") as f:
+metrics.start("load filter")
+with open_input(orphacodes_txt, "rt") as f:
     filter_orphacodes = {line.strip() for line in f if line.strip()}  # use set for speed
 
 print(f"Loaded {len(filter_orphacodes)} OrphaCodes from filter list")
+metrics.stop(rows_out=len(filter_orphacodes))
 
 # === Load input CSV ===
-df = pd.read_csv(input_csv, dtype={"OrphaCode": str})  # keep OrphaCode as string
+metrics.start("load table")
+df = read_table(input_csv, dtype=str)  # keep OrphaCode (and every other column) as text
 print(f"Loaded {len(df)} rows from input CSV")
+metrics.stop(rows_out=len(df))
 
 # === Filter rows ===
+metrics.start("filter")
 filtered_df = df[df["OrphaCode"].astype(str).isin(filter_orphacodes)]
 print(f"Filtered dataset contains {len(filtered_df)} rows")
+metrics.stop(rows_in=len(df), rows_out=len(filtered_df))
 
 # === Save output CSV ===
+metrics.start("write outputs")
 filtered_df.to_csv(output_csv, index=False)
+metrics.stop(rows_out=len(filtered_df))
 print(f"Filtered file saved to: {output_csv}")
+metrics.finish()
@@ -0,0 +1,112 @@
+import csv
+import glob
+import json
+import os
+
+import pandas as pd
+
+import pipeline_paths
+from pipeline_io import file_digest, open_input, resolve_input
+
+# =====================
+# CONFIGURATION
+# =====================
+HEADER_MARKER = "GENE SYMBOL"
+SNIFF_BYTES = 64 * 1024  # banner + header fit comfortably in the first 64 KB
+CACHE_DIR = os.path.join(pipeline_paths.CLINGEN_DIR, ".cache")
+# Cached frames are only reused by the loader code that wrote them
+LOADER_VERSION = file_digest(os.path.abspath(__file__))[:16]
+
+
+# =====================
+# FUNCTIONS
+# =====================
+def find_header_row(path, marker=HEADER_MARKER, sniff_bytes=SNIFF_BYTES):
+    """Return the index of the header row among the non-blank rows of the CSV.
+
+    Only a prefix of the file is read; it is doubled until the header row is
+    found or the end of the file is reached.
+    """
+    with open_input(path) as f:
+        prefix = b""
+        while True:
+            chunk = f.read(sniff_bytes - len(prefix))
+            prefix += chunk
+            at_eof = not chunk
+            text = prefix.decode("utf-8", errors="replace")
+            lines = text.splitlines(keepends=True)
+            if not at_eof and lines:
+                lines = lines[:-1]  # last line may be cut off mid-row
+
+            row_index = 0
+            for row in csv.reader(lines):
+                if not row:
+                    continue  # pandas skips blank lines when counting header rows
+                if marker in row:
+                    return row_index
+                row_index += 1
+
+            if at_eof:
+                break
+            sniff_bytes *= 2
+
+    raise ValueError(f"Could not find header row containing '{marker}'")
+
+
+def parse_clingen(path):
+    """Parse the ClinGen gene-disease validity export (optionally compressed) in a single pass."""
+    header_row_index = find_header_row(path)
+    with open_input(path) as f:
+        clingen_df = pd.read_csv(f, header=header_row_index, dtype=str)
+    clingen_df.columns = clingen_df.columns.str.strip()  # remove extra whitespace
+    clingen_df["GENE SYMBOL"] = clingen_df["GENE SYMBOL"].str.strip()
+    return clingen_df
+
+
+def load_clingen(path, cache_dir=CACHE_DIR):
+    """Load the ClinGen export, reusing a cached frame if the file is unchanged.
+
+    A file with the recorded size and mtime is taken as unchanged without
+    reading it; when only the mtime differs (e.g. the same export copied
+    again), its SHA-256 decides. Cache files are named after LOADER_VERSION,
+    so a change to the parser invalidates them. Pass cache_dir=None to
+    disable caching.
+    """
+    if cache_dir is None:
+        return parse_clingen(path)
+
+    source = resolve_input(path)
+    stat = os.stat(source)
+    cache_file = os.path.join(cache_dir, f"clingen_{LOADER_VERSION}.pkl")
+    index_file = os.path.join(cache_dir, f"clingen_{LOADER_VERSION}.json")
+
+    entry = None
+    if os.path.exists(cache_file) and os.path.exists(index_file):
+        with open(index_file, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    digest = None
+    if entry is not None and entry["path"] == source and entry["size"] == stat.st_size:
+        if entry["mtime_ns"] == stat.st_mtime_ns:
+            return pd.read_pickle(cache_file)
+        digest = file_digest(source)
+        if digest == entry["sha256"]:
+            entry["mtime_ns"] = stat.st_mtime_ns
+            with open(index_file, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            return pd.read_pickle(cache_file)
+
+    clingen_df = parse_clingen(path)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(cache_dir, "clingen_*")):
+        os.remove(stale)
+    clingen_df.to_pickle(cache_file)
+    entry = {
+        "path": source,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest or file_digest(source),
+    }
+    with open(index_file, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    return clingen_df
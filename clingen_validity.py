@@ -1,47 +1,45 @@
-import pandas as pd
 import os
 
+import pipeline_paths
+from clingen_loader import load_clingen
+from pipeline_io import read_table
+from stage_metrics import StageMetrics
+
 # =====================
 # FILE PATHS
 # =====================
-CLINGEN_FILE = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Gene Association/Monogenic Association/Disorder Classification/ClinGen/clingen_gene_disease_validity_ds.csv"
-ORPHANET_FILE = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Gene Association/Monogenic Association/Disorder Classification/kept_disorders.csv"
-OUTPUT_FOLDER = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Gene Association/Monogenic Association/Disorder Classification/ClinGen"
+CLINGEN_FILE = pipeline_paths.CLINGEN_CSV
+ORPHANET_FILE = os.path.join(pipeline_paths.CLASSIFICATION_DIR, "kept_disorders.csv")
+OUTPUT_FOLDER = pipeline_paths.CLINGEN_DIR
 
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+metrics = StageMetrics("clingen_validity")
 
 # =====================
 # LOAD CLINGEN CSV
 # =====================
-# Step 1: Load without header to find the actual header row
-raw_df = pd.read_csv(CLINGEN_FILE, header=None)
-header_row_index = None
-for i, row in raw_df.iterrows():
-    if "GENE SYMBOL" in row.values:
-        header_row_index = i
-        break
-
-if header_row_index is None:
-    raise ValueError("Could not find header row containing 'GENE SYMBOL'")
-
-# Step 2: Reload CSV using the correct header
-clingen_df = pd.read_csv(CLINGEN_FILE, header=header_row_index)
-clingen_df.columns = clingen_df.columns.str.strip()  # remove extra whitespace
-clingen_df["GENE SYMBOL"] = clingen_df["GENE SYMBOL"].str.strip()
+# Banner lines are sniffed from the start of the file, the CSV is parsed
+# once, and the result is cached by file hash for repeated runs.
+metrics.start("load table")
+clingen_df = load_clingen(CLINGEN_FILE)
+metrics.stop(rows_out=len(clingen_df))
 
 # =====================
 # LOAD ORPHANET CSV
 # =====================
-orphanet_df = pd.read_csv(ORPHANET_FILE)
+metrics.start("load filter")
+orphanet_df = read_table(ORPHANET_FILE, dtype=str)
 orphanet_df["GeneSymbol"] = orphanet_df["GeneSymbol"].astype(str).str.strip()
 
 print(f"Loaded {len(orphanet_df)} Orphanet disorders")
 unique_orphanet_genes = set(orphanet_df["GeneSymbol"])
 print(f"Unique gene symbols from Orphanet: {len(unique_orphanet_genes)}")
+metrics.stop(rows_out=len(orphanet_df))
 
 # =====================
 # MATCH ORPHANET GENES TO CLINGEN
 # =====================
+metrics.start("filter")
 matched_df = clingen_df[clingen_df["GENE SYMBOL"].isin(unique_orphanet_genes)].copy()
 matched_genes = set(matched_df["GENE SYMBOL"])
 unmatched_genes = unique_orphanet_genes - matched_genes
@@ -77,11 +75,13 @@ print(f"Number of unique gene symbols with Definitive status: {len(definitive_ge
 definitive_orphanet_df = orphanet_df[orphanet_df["GeneSymbol"].isin(definitive_genes)]
 definitive_orphacodes = set(definitive_orphanet_df["OrphaCode"])
 print(f"Number of Orphanet entities with definitive ClinGen classification: {len(definitive_orphacodes)}")
+metrics.stop(rows_in=len(clingen_df), rows_out=len(matched_df))
 
 # =====================
 # SAVE OUTPUT FILES
 # =====================
 # All matches
+metrics.start("write outputs")
 matched_csv = os.path.join(OUTPUT_FOLDER, "clingen_all_matches.csv")
 matched_df.to_csv(matched_csv, index=False)
 
@@ -98,8 +98,9 @@ with open(definitive_genes_txt, "w") as f:
 # Definitive OrphaCodes
 definitive_orphacodes_txt = os.path.join(OUTPUT_FOLDER, "definitive_orphacodes.txt")
 with open(definitive_orphacodes_txt, "w") as f:
-    for oc in sorted(definitive_orphacodes):
+    for oc in sorted(definitive_orphacodes, key=int):
         f.write(f"{oc}\n")
+metrics.stop(rows_out=len(matched_df))
 
 print(f"No match genes TXT saved: {no_match_genes_file}")
 print(f"No match Orphanet CSV saved: {orphanet_no_match_csv}")
@@ -108,3 +109,4 @@ print(f"Definitive ClinGen matches saved: {definitive_csv}")
 print(f"Definitive gene symbols TXT saved: {definitive_genes_txt}")
 print(f"Definitive OrphaCodes TXT saved: {definitive_orphacodes_txt}")
 print("✅ ClinGen validity filtering pipeline complete!")
+metrics.finish()
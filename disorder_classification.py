@@ -1,27 +1,14 @@
-import xml.etree.ElementTree as ET
-import csv
 import os
 
-# File paths
-monogenic_txt = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Gene Association/Monogenic Association/monogenic_orphacodes.txt"
-gene_assoc_xml = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Raw Datasets/genes_associated_ds.xml"
-output_folder = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Gene Association/Monogenic Association/Disorder Classification"
-
-os.makedirs(output_folder, exist_ok=True)
-
-# Load monogenic OrphaCodes
-with open(monogenic_txt, "r") as f:
-    monogenic_orphacodes = {line.strip() for line in f.readlines()}
-print(f"Loaded {len(monogenic_orphacodes)} monogenic OrphaCodes from TXT")
+import pipeline_paths
+from gene_association_table import iter_gene_association_table, TABLE_FILE
+from orphacode_set import OrphaCodeSet
+from pipeline_io import PartitionedCSVWriter, open_input
+from stage_metrics import StageMetrics
 
-# Parse XML
-tree = ET.parse(gene_assoc_xml)
-root = tree.getroot()
-
-# Containers
-kept = []
-excluded = []
-kept_orphacodes = set()
+# File paths
+monogenic_txt = os.path.join(pipeline_paths.MONOGENIC_DIR, "monogenic_orphacodes.txt")
+output_folder = pipeline_paths.CLASSIFICATION_DIR
 
 # Define filter rules
 valid_rules = {
@@ -30,105 +17,88 @@ valid_rules = {
     "36554": {"21450", "21443"}  # Subtype of disorder → Clinical subtype, Etiological subtype
 }
 
-# Iterate over disorders
-for disorder in root.find(".//DisorderList"):
-    orpha_code = disorder.findtext("OrphaCode", "").strip()
-    if orpha_code not in monogenic_orphacodes:
-        continue
-
-    disorder_name = disorder.findtext("Name", "").strip()
-    group_elem = disorder.find("DisorderGroup")
-    type_elem = disorder.find("DisorderType")
-    disorder_group_id = group_elem.attrib.get("id", "") if group_elem is not None else ""
-    disorder_group_name = group_elem.findtext("Name", "").strip() if group_elem is not None else ""
-    disorder_type_id = type_elem.attrib.get("id", "") if type_elem is not None else ""
-    disorder_type_name = type_elem.findtext("Name", "").strip() if type_elem is not None else ""
-    expert_link = disorder.findtext("ExpertLink", "").strip()
-
-    # Association list count
-    assoc_list = disorder.find("DisorderGeneAssociationList")
-    assoc_count = assoc_list.attrib.get("count", "0") if assoc_list is not None else "0"
-
-    # Iterate gene associations
-    if assoc_list is not None:
-        for gene_assoc in assoc_list.findall("DisorderGeneAssociation"):
-            status = gene_assoc.findtext("DisorderGeneAssociationStatus/Name", "").strip()
-            assoc_type = gene_assoc.findtext("DisorderGeneAssociationType/Name", "").strip()
-
-            # Gene info
-            gene = gene_assoc.find("Gene")
-            gene_symbol = gene.findtext("Symbol", "").strip() if gene is not None else ""
-            gene_name = gene.findtext("Name", "").strip() if gene is not None else ""
-            gene_type = gene.findtext("GeneType/Name", "").strip() if gene is not None else ""
-            gene_locus = ""
-            if gene is not None:
-                locus_list = gene.find("LocusList")
-                if locus_list is not None and int(locus_list.attrib.get("count", "0")) > 0:
-                    locus = locus_list.find("Locus/GeneLocus")
-                    if locus is not None:
-                        gene_locus = locus.text.strip()
-
-            omim_ref = ""
-            uniprot_ref = ""
-            if gene is not None:
-                ext_refs = gene.find("ExternalReferenceList")
-                if ext_refs is not None:
-                    for ref in ext_refs.findall("ExternalReference"):
-                        source = ref.findtext("Source", "").strip()
-                        value = ref.findtext("Reference", "").strip()
-                        if source == "OMIM":
-                            omim_ref = value
-                        if source in ["UNIPROTKB", "SwissProt"]:
-                            uniprot_ref = value
-
-            row = [
-                orpha_code, disorder_name, disorder_group_name, disorder_group_id,
-                disorder_type_name, disorder_type_id, gene_symbol, gene_name,
-                gene_type, gene_locus, assoc_type, status,
-                omim_ref, uniprot_ref, expert_link, assoc_count
-            ]
-
-            # Apply filter rules
-            if disorder_group_id in valid_rules and disorder_type_id in valid_rules[disorder_group_id]:
-                kept.append(row)
-                kept_orphacodes.add(orpha_code)
-            else:
-                excluded.append(row)
-
-# Debug prints
-print(f"Total kept disorders: {len(kept_orphacodes)}")
-print(f"Total excluded rows: {len(excluded)}")
-
-# Save headers
-headers = [
+# Table columns and the headers they are saved under
+columns = [
     "OrphaCode", "DisorderName", "DisorderGroup", "DisorderGroupID",
     "DisorderType", "DisorderTypeID", "GeneSymbol", "GeneName",
     "GeneType", "GeneLocus", "DisorderGeneAssociationType",
     "DisorderGeneAssociationStatus", "OMIM", "UniProt",
-    "ExpertLink", "AssociationCount"
+    "ExpertLink", "AssocCount"
 ]
+headers = columns[:-1] + ["AssociationCount"]
+
+
+def select_matched(table, orphacodes):
+    """Return the associations of the given OrphaCodes."""
+    return table[OrphaCodeSet(orphacodes).mask(table["OrphaCode"]) & table["HasAssociation"]]
+
+
+def keep_mask(matched):
+    """True for rows whose disorder group and type pass valid_rules."""
+    keep = matched["OrphaCode"].isin(())
+    for group_id, type_ids in valid_rules.items():
+        keep |= (matched["DisorderGroupID"] == group_id) & matched["DisorderTypeID"].isin(type_ids)
+    return keep
+
+
+def save_outputs(matched_chunks, folder):
+    """Route matched rows chunk by chunk into the kept/excluded CSVs and the kept TXT list.
+
+    matched_chunks is an iterable of frames from select_matched. Returns the
+    number of kept rows, excluded rows and kept OrphaCodes.
+    """
+    paths = {
+        "kept": os.path.join(folder, "kept_disorders.csv"),
+        "excluded": os.path.join(folder, "excluded_disorders.csv"),
+    }
+    code_lists = {"kept": os.path.join(folder, "kept_orphacodes.txt")}
+
+    with PartitionedCSVWriter(paths, columns, header=headers, code_lists=code_lists) as writer:
+        for batch in matched_chunks:
+            keep = keep_mask(batch)
+            writer.write("kept", batch[keep])
+            writer.write("excluded", batch[~keep])
+            writer.add_codes("kept", batch.loc[keep, "OrphaCode"].unique())
+
+    return writer.rows["kept"], writer.rows["excluded"], len(writer.codes["kept"])
+
+
+def main():
+    os.makedirs(output_folder, exist_ok=True)
+    metrics = StageMetrics("disorder_classification")
+
+    # Load monogenic OrphaCodes
+    metrics.start("load filter")
+    with open_input(monogenic_txt, "rt") as f:
+        monogenic_orphacodes = {line.strip() for line in f.readlines()}
+    print(f"Loaded {len(monogenic_orphacodes)} monogenic OrphaCodes from TXT")
+    metrics.stop(rows_out=len(monogenic_orphacodes))
+
+    # Filter the shared table one chunk at a time, routing kept/excluded rows straight into their CSVs
+    metrics.start("filter and write outputs")
+    monogenic_set = OrphaCodeSet(monogenic_orphacodes)
+    chunks = iter_gene_association_table(TABLE_FILE, columns=columns + ["HasAssociation"])
+    rows_in = 0
+
+    def matched_chunks():
+        nonlocal rows_in
+        for chunk in chunks:
+            rows_in += len(chunk)
+            yield select_matched(chunk, monogenic_set)
+
+    kept_rows, excluded_rows, kept_count = save_outputs(matched_chunks(), output_folder)
+    metrics.stop(rows_in=rows_in, rows_out=kept_rows + excluded_rows)
+
+    # Debug prints
+    print(f"Total kept disorders: {kept_count}")
+    print(f"Total excluded rows: {excluded_rows}")
+    print(f"Saved kept_disorders.csv: {kept_rows} rows")
+    print(f"Saved excluded_disorders.csv: {excluded_rows} rows")
+    print(f"Saved TXT of kept OrphaCodes: {os.path.join(output_folder, 'kept_orphacodes.txt')}")
+
+    print("✅ Finished disorder classification pipeline")
+    metrics.finish()
+
 
-# Save kept CSV
-kept_csv = os.path.join(output_folder, "kept_disorders.csv")
-with open(kept_csv, "w", newline="", encoding="utf-8") as f:
-    writer = csv.writer(f)
-    writer.writerow(headers)
-    writer.writerows(kept)
-print(f"Saved kept_disorders.csv: {len(kept)} rows")
-
-# Save excluded CSV
-excluded_csv = os.path.join(output_folder, "excluded_disorders.csv")
-with open(excluded_csv, "w", newline="", encoding="utf-8") as f:
-    writer = csv.writer(f)
-    writer.writerow(headers)
-    writer.writerows(excluded)
-print(f"Saved excluded_disorders.csv: {len(excluded)} rows")
-
-# Save TXT of kept OrphaCodes
-kept_txt = os.path.join(output_folder, "kept_orphacodes.txt")
-with open(kept_txt, "w", encoding="utf-8") as f:
-    for code in sorted(kept_orphacodes):
-        f.write(f"{code}\n")
-print(f"Saved TXT of kept OrphaCodes: {kept_txt}")
-
-print("✅ Finished disorder classification pipeline")
+if __name__ == "__main__":
+    main()
@@ -1,97 +1,212 @@
-import xml.etree.ElementTree as ET
-import csv
 import os
 
+import numpy as np
+import pandas as pd
+
+import pipeline_paths
+from orphacode_set import OrphaCodeSet
+from orphanet_xml import map_disorders, node_query, text_query
+from pipeline_io import save_csv
+from stage_metrics import StageMetrics
+
 # ===============================
 # FILE PATHS
 # ===============================
 
 # Folder where the two Orphacode filter files are stored
-filter_folder = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Gene Association/Monogenic Association/Disorder Classification/ClinGen/Natural History/Models/Clustering/Clinical Trials"
+filter_folder = pipeline_paths.CLINICAL_TRIALS_DIR
 
 fileA = os.path.join(filter_folder, "tableA_orphacodes.txt")
 fileB = os.path.join(filter_folder, "tableB_orphacodes.txt")
 
 # Epidemiology XML dataset
-xml_file = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Raw Datasets/epidemiology_ds.xml"
+xml_file = pipeline_paths.EPIDEMIOLOGY_XML
 
-# Output CSV (saved in same folder as filter files)
+# Output CSVs (saved in same folder as filter files): the semicolon CSV with
+# comma decimals, the same records with a numeric ValMoy, and one summary row
+# per OrphaCode
 csv_file = os.path.join(filter_folder, "epidemiology_filtered.csv")
+values_file = os.path.join(filter_folder, "epidemiology_values.csv")
+summary_file = os.path.join(filter_folder, "epidemiology_summary.csv")
 
 
 # ===============================
-# LOAD ORPHACODE FILTER LISTS
+# XML QUERIES
 # ===============================
-def load_orphacodes(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return {line.strip() for line in f if line.strip()}
-
-orphas_A = load_orphacodes(fileA)
-orphas_B = load_orphacodes(fileB)
+# Compiled once; with lxml these are XPath expressions (see orphanet_xml)
+ORPHA_CODE = text_query("OrphaCode")
+NAME = text_query("Name")
+TYPE_NAME = text_query("DisorderType/Name")
+GROUP_NAME = text_query("DisorderGroup/Name")
+EXPERT_LINK = text_query("ExpertLink")
+PREVALENCES = node_query(".//Prevalence")
+SOURCE = text_query("Source")
+PREVALENCE_TYPE = text_query("PrevalenceType/Name")
+PREVALENCE_QUALIFICATION = text_query("PrevalenceQualification/Name")
+PREVALENCE_CLASS = text_query("PrevalenceClass/Name")
+VAL_MOY = text_query("ValMoy")
+PREVALENCE_GEOGRAPHIC = text_query("PrevalenceGeographic/Name")
+PREVALENCE_VALIDATION = text_query("PrevalenceValidationStatus/Name")
+
+
+CSV_HEADER = [
+    "Orphacode", "Disorder Name", "Disorder Type", "Disorder Group",
+    "Prevalence Source", "Prevalence Type", "Prevalence Qualification",
+    "Prevalence Class", "Prevalence Value", "Geographic Area",
+    "Validation Status", "Expert Link"
+]
+
+VALUE_COLUMNS = [
+    "OrphaCode", "PrevalenceType", "PrevalenceQualification", "PrevalenceClass",
+    "ValMoy", "GeographicArea", "ValidationStatus", "Source"
+]
+
+# Collected per prevalence record; CSV_SOURCE_COLUMNS maps them onto CSV_HEADER
+RECORD_COLUMNS = VALUE_COLUMNS + ["DisorderName", "DisorderType", "DisorderGroup", "ExpertLink"]
+CSV_SOURCE_COLUMNS = [
+    "OrphaCode", "DisorderName", "DisorderType", "DisorderGroup",
+    "Source", "PrevalenceType", "PrevalenceQualification",
+    "PrevalenceClass", "ValMoy", "GeographicArea",
+    "ValidationStatus", "ExpertLink"
+]
 
-# Keep only codes present in BOTH lists
-target_orphacodes = orphas_A.intersection(orphas_B)
-
-print(f"Loaded {len(orphas_A)} Orphacodes from table A")
-print(f"Loaded {len(orphas_B)} Orphacodes from table B")
-print(f"→ {len(target_orphacodes)} Orphacodes present in BOTH lists\n")
+# ===============================
+# SUMMARY CRITERIA
+# ===============================
+POINT_PREVALENCE = "Point prevalence"
+WORLDWIDE = "Worldwide"
+VALIDATED = "Validated"
 
 
 # ===============================
-# PARSE XML AND EXTRACT DATA
+# FUNCTIONS
 # ===============================
-tree = ET.parse(xml_file)
-root = tree.getroot()
+def load_target_codes(file_a, file_b):
+    """Return the OrphaCodes listed in both filter files."""
+    orphas_A = OrphaCodeSet.from_file(file_a)
+    orphas_B = OrphaCodeSet.from_file(file_b)
+
+    print(f"Loaded {len(orphas_A)} Orphacodes from table A")
+    print(f"Loaded {len(orphas_B)} Orphacodes from table B")
+
+    # Keep only codes present in BOTH lists (bitset intersection)
+    return orphas_A & orphas_B
+
+
+def parse_disorder(disorder):
+    """Return the prevalence records (RECORD_COLUMNS) of a <Disorder> node."""
+    orpha_code = ORPHA_CODE(disorder)
+    disorder_fields = [NAME(disorder), TYPE_NAME(disorder), GROUP_NAME(disorder), EXPERT_LINK(disorder)]
+
+    # Iterate through prevalence entries
+    return [
+        [
+            orpha_code, PREVALENCE_TYPE(prevalence), PREVALENCE_QUALIFICATION(prevalence),
+            PREVALENCE_CLASS(prevalence), VAL_MOY(prevalence), PREVALENCE_GEOGRAPHIC(prevalence),
+            PREVALENCE_VALIDATION(prevalence), SOURCE(prevalence),
+        ] + disorder_fields
+        for prevalence in PREVALENCES(disorder)
+    ]
+
+
+def extract_prevalences(xml_path, target_orphacodes):
+    """Parse the prevalence records of the target disorders in one pass over the XML.
+
+    Returns the number of disorders scanned and a frame with one row per
+    prevalence record (RECORD_COLUMNS, ValMoy still as text). Large
+    releases are parsed in parallel shards (see orphanet_xml.map_disorders).
+    """
+    records = {col: [] for col in RECORD_COLUMNS}
+    columns = list(records.values())
+
+    # Only disorders that match BOTH filter lists are parsed
+    total_disorders, parsed = map_disorders(xml_path, parse_disorder, target_orphacodes)
+    for rows in parsed:
+        for record in rows:
+            for column, value in zip(columns, record):
+                column.append(value)
+
+    return total_disorders, pd.DataFrame(records, columns=RECORD_COLUMNS)
+
+
+def typed_values(records):
+    """The VALUE_COLUMNS of the records with ValMoy as a float."""
+    values = records[VALUE_COLUMNS].copy()
+    values["ValMoy"] = pd.to_numeric(values["ValMoy"], errors="coerce")
+    return values
+
+
+def save_filtered_csv(records, csv_path):
+    """Write the records as the semicolon CSV with comma decimals."""
+    table = pd.DataFrame({
+        header: records[column] for header, column in zip(CSV_HEADER, CSV_SOURCE_COLUMNS)
+    }, columns=CSV_HEADER)
+    table["Prevalence Value"] = table["Prevalence Value"].str.replace(".", ",", regex=False)
+    table.to_csv(csv_path, sep=";", index=False, lineterminator="\r\n")
+
+
+def class_of_max(points, mask):
+    """Prevalence class of the highest point prevalence per OrphaCode among rows in mask."""
+    top = points[mask].sort_values("ValMoy", ascending=False, kind="stable").drop_duplicates("OrphaCode")
+    return top.set_index("OrphaCode")["PrevalenceClass"]
+
+
+def summarize_prevalences(table):
+    """Per-OrphaCode aggregates of the typed prevalence records, all vectorized."""
+    validated = table["ValidationStatus"] == VALIDATED
+    points = table[table["PrevalenceType"] == POINT_PREVALENCE]
+    points_validated = points["ValidationStatus"] == VALIDATED
+    worldwide = points["GeographicArea"] == WORLDWIDE
+
+    by_code = table.groupby("OrphaCode", sort=False)
+    summary = pd.DataFrame({
+        "PrevalenceRecords": by_code.size(),
+        "ValidatedRecords": validated.groupby(table["OrphaCode"], sort=False).sum(),
+    })
+    summary["MaxPointPrevalence"] = points.groupby("OrphaCode")["ValMoy"].max()
+    summary["MaxValidatedPointPrevalence"] = points[points_validated].groupby("OrphaCode")["ValMoy"].max()
+    summary["WorldwidePointPrevalenceClass"] = class_of_max(points, worldwide.to_numpy())
+    summary["RegionalPointPrevalenceClass"] = class_of_max(points, ~worldwide.to_numpy())
+    summary["HasWorldwidePointPrevalence"] = summary["WorldwidePointPrevalenceClass"].notna()
+
+    summary = summary.reset_index()
+    summary["ValidatedRecords"] = summary["ValidatedRecords"].astype(np.int64)
+    return summary
+
+
+def save_outputs(records, folder):
+    """Write the filtered CSV, typed values and per-disorder summary into folder."""
+    save_filtered_csv(records, os.path.join(folder, os.path.basename(csv_file)))
+    values = typed_values(records)
+    summary = summarize_prevalences(values)
+    save_csv(values, os.path.join(folder, os.path.basename(values_file)))
+    save_csv(summary, os.path.join(folder, os.path.basename(summary_file)))
+    return values, summary
+
 
 # ===============================
-# WRITE CSV
+# MAIN
 # ===============================
-with open(csv_file, mode="w", newline="", encoding="utf-8") as file:
-    writer = csv.writer(file, delimiter=";")
-
-    # Write header
-    writer.writerow([
-        "Orphacode", "Disorder Name", "Disorder Type", "Disorder Group",
-        "Prevalence Source", "Prevalence Type", "Prevalence Qualification",
-        "Prevalence Class", "Prevalence Value", "Geographic Area",
-        "Validation Status", "Expert Link"
-    ])
-
-    # Iterate over disorder entries
-    for disorder in root.findall(".//Disorder"):
-        orpha_code = disorder.findtext("OrphaCode", "")
-
-        # Only keep disorders that match BOTH filter lists
-        if orpha_code not in target_orphacodes:
-            continue
-
-        disorder_name = disorder.findtext("Name", "")
-        disorder_type = disorder.find("DisorderType/Name")
-        disorder_type_name = disorder_type.text if disorder_type is not None else ""
-        disorder_group = disorder.find("DisorderGroup/Name")
-        disorder_group_name = disorder_group.text if disorder_group is not None else ""
-        expert_link = disorder.findtext("ExpertLink", "")
-
-        # Iterate through prevalence entries
-        for prevalence in disorder.findall(".//Prevalence"):
-            prevalence_source = prevalence.findtext("Source", "")
-            prevalence_type = prevalence.find("PrevalenceType/Name")
-            prevalence_type_name = prevalence_type.text if prevalence_type is not None else ""
-            prevalence_qualification = prevalence.find("PrevalenceQualification/Name")
-            prevalence_qualification_name = prevalence_qualification.text if prevalence_qualification is not None else ""
-            prevalence_class = prevalence.findtext("PrevalenceClass/Name", "")
-            prevalence_value = prevalence.findtext("ValMoy", "").replace(".", ",")
-            prevalence_geographic = prevalence.find("PrevalenceGeographic/Name")
-            prevalence_geographic_name = prevalence_geographic.text if prevalence_geographic is not None else ""
-            prevalence_validation = prevalence.find("PrevalenceValidationStatus/Name")
-            prevalence_validation_name = prevalence_validation.text if prevalence_validation is not None else ""
-
-            # Write to CSV
-            writer.writerow([
-                orpha_code, disorder_name, disorder_type_name, disorder_group_name,
-                prevalence_source, prevalence_type_name, prevalence_qualification_name,
-                prevalence_class, prevalence_value, prevalence_geographic_name,
-                prevalence_validation_name, expert_link
-            ])
-
-print(f"✅ CSV file created successfully:\n{csv_file}")
+def main():
+    metrics = StageMetrics("epidemiology")
+
+    metrics.start("load filter")
+    target_orphacodes = load_target_codes(fileA, fileB)
+    print(f"→ {len(target_orphacodes)} Orphacodes present in BOTH lists\n")
+    metrics.stop(rows_out=len(target_orphacodes))
+
+    metrics.start("parse XML")
+    total_disorders, records = extract_prevalences(xml_file, target_orphacodes)
+    metrics.stop(rows_in=total_disorders, rows_out=len(records))
+
+    metrics.start("write outputs")
+    values, summary = save_outputs(records, filter_folder)
+    metrics.stop(rows_out=len(records) + len(values) + len(summary))
+    print(f"✅ CSV file created successfully:\n{csv_file}")
+    print(f"💾 Saved typed prevalence values: {values_file}")
+    print(f"💾 Saved per-disorder prevalence summary ({len(summary)} disorders): {summary_file}")
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
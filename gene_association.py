@@ -1,37 +1,15 @@
-import xml.etree.ElementTree as ET
-import csv
 import os
+from collections import Counter
 
-# File paths
-tier1_txt = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Merge Neuro, IME, Genetic/tier1_all_three.txt"
-gene_assoc_xml = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Raw Datasets/genes_associated_ds.xml"
-output_folder = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Gene Association"
-
-os.makedirs(output_folder, exist_ok=True)
-
-# Load Tier1 OrphaCodes
-with open(tier1_txt, "r") as f:
-    tier1_orphacodes = {line.strip() for line in f.readlines()}
-print(f"Loaded {len(tier1_orphacodes)} Tier1 OrphaCodes from TXT")
-
-# Parse XML
-tree = ET.parse(gene_assoc_xml)
-root = tree.getroot()
-
-# Group containers
-group1 = []  # Strong candidates
-group2 = []  # Supplementary
-group3 = []  # Excluded
-group4_not_yet_assessed = []  # Not yet assessed
-
-# Track matched codes
-tier1_orphacodes_matched = set()
-tier1_orphacodes_not_assessed = set()
+import pipeline_paths
+from gene_association_table import iter_gene_association_table, TABLE_FILE
+from orphacode_set import OrphaCodeSet
+from pipeline_io import PartitionedCSVWriter, open_input
+from stage_metrics import StageMetrics
 
-# Counters
-total_assessed = 0
-total_not_assessed = 0
-disorders_found = 0
+# File paths
+tier1_txt = os.path.join(pipeline_paths.MERGE_DIR, "tier1_all_three.txt")
+output_folder = pipeline_paths.GENE_ASSOC_DIR
 
 # Group type definitions
 group1_types = {
@@ -50,91 +28,6 @@ group3_types = {
     "Biomarker tested in"
 }
 
-# Iterate disorders
-for disorder in root.find(".//DisorderList"):
-    orpha_code = disorder.findtext("OrphaCode", "").strip()
-    if orpha_code not in tier1_orphacodes:
-        continue
-    tier1_orphacodes_matched.add(orpha_code)
-    disorders_found += 1
-
-    disorder_name = disorder.findtext("Name", "").strip()
-    disorder_type_name = disorder.find("DisorderType/Name").text.strip() if disorder.find("DisorderType/Name") is not None else ""
-    disorder_group_name = disorder.find("DisorderGroup/Name").text.strip() if disorder.find("DisorderGroup/Name") is not None else ""
-    expert_link = disorder.findtext("ExpertLink", "").strip()
-
-    # Count number of associations for this disorder
-    gene_assoc_list = disorder.find("DisorderGeneAssociationList")
-    assoc_count = int(gene_assoc_list.attrib.get("count", "0")) if gene_assoc_list is not None else 0
-    if gene_assoc_list is None:
-        continue
-
-    for gene_assoc in gene_assoc_list.findall("DisorderGeneAssociation"):
-        status = gene_assoc.findtext("DisorderGeneAssociationStatus/Name", "").strip()
-
-        # Separate handling for Assessed vs Not yet assessed
-        if status == "Assessed":
-            total_assessed += 1
-        elif status == "Not yet assessed":
-            total_not_assessed += 1
-            row = [orpha_code, disorder_name, disorder_group_name, disorder_type_name,
-                   "", "", "", "", "", status, "", "", "", expert_link, assoc_count]
-            group4_not_yet_assessed.append(row)
-            tier1_orphacodes_not_assessed.add(orpha_code)
-            continue  # don’t put into Groups 1–3
-        else:
-            continue
-
-        assoc_type = gene_assoc.findtext("DisorderGeneAssociationType/Name", "").strip()
-
-        # Gene info
-        gene = gene_assoc.find("Gene")
-        gene_symbol, gene_name, gene_type, gene_locus = "", "", "", ""
-        omim_ref, uniprot_ref = "", ""
-        source_of_validation = gene_assoc.findtext("SourceOfValidation", "").strip()
-
-        if gene is not None:
-            gene_symbol = gene.findtext("Symbol", "").strip()
-            gene_name = gene.findtext("Name", "").strip()
-            gene_type = gene.findtext("GeneType/Name", "").strip()
-
-            locus_list = gene.find("LocusList")
-            if locus_list is not None and int(locus_list.attrib.get("count", "0")) > 0:
-                locus = locus_list.find("Locus/GeneLocus")
-                if locus is not None:
-                    gene_locus = locus.text.strip()
-
-            ext_refs = gene.find("ExternalReferenceList")
-            if ext_refs is not None:
-                for ref in ext_refs.findall("ExternalReference"):
-                    source = ref.findtext("Source", "").strip()
-                    value = ref.findtext("Reference", "").strip()
-                    if source == "OMIM":
-                        omim_ref = value
-                    if source in ["UNIPROTKB", "SwissProt"]:
-                        uniprot_ref = value
-
-        row = [
-            orpha_code, disorder_name, disorder_group_name, disorder_type_name,
-            gene_symbol, gene_name, gene_type, gene_locus,
-            assoc_type, status, source_of_validation,
-            omim_ref, uniprot_ref, expert_link, assoc_count
-        ]
-
-        # Assign to groups
-        if assoc_type in group1_types:
-            group1.append(row)
-        elif assoc_type in group2_types:
-            group2.append(row)
-        elif assoc_type in group3_types:
-            group3.append(row)
-
-# Debug prints
-print(f"Disorders in XML matching Tier1 OrphaCodes: {disorders_found}")
-print(f"Total gene associations with status 'Assessed': {total_assessed}")
-print(f"Total gene associations with status 'Not yet assessed': {total_not_assessed}")
-
-# Save CSVs
 headers = [
     "OrphaCode", "DisorderName", "DisorderGroup", "DisorderType",
     "GeneSymbol", "GeneName", "GeneType", "GeneLocus",
@@ -142,42 +35,124 @@ headers = [
     "SourceOfValidation", "OMIM", "UniProt", "ExpertLink", "AssocCount"
 ]
 
-group_files = [
-    ("Group1_Strong.csv", group1),
-    ("Group2_Supplementary.csv", group2),
-    ("Group3_Excluded.csv", group3),
-    ("Group4_NotYetAssessed.csv", group4_not_yet_assessed)
+# Gene-level columns left blank for associations that are not yet assessed
+not_assessed_blank_columns = [
+    "GeneSymbol", "GeneName", "GeneType", "GeneLocus",
+    "DisorderGeneAssociationType", "SourceOfValidation", "OMIM", "UniProt"
 ]
 
-for fname, data in group_files:
-    path = os.path.join(output_folder, fname)
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(headers)
-        writer.writerows(data)
-    print(f"Saved {fname}: {len(data)} rows")
-
-# Save TXT of matched OrphaCodes
-matched_orphacodes_file = os.path.join(output_folder, "tier1_matched_orphacodes.txt")
-with open(matched_orphacodes_file, "w", encoding="utf-8") as f:
-    for code in sorted(tier1_orphacodes_matched):
-        f.write(f"{code}\n")
-print(f"Saved TXT of matched OrphaCodes: {matched_orphacodes_file}")
-
-# Save TXT of not yet assessed OrphaCodes
-not_assessed_file = os.path.join(output_folder, "tier1_not_yet_assessed_orphacodes.txt")
-with open(not_assessed_file, "w", encoding="utf-8") as f:
-    for code in sorted(tier1_orphacodes_not_assessed):
-        f.write(f"{code}\n")
-print(f"Saved TXT of not yet assessed OrphaCodes: {not_assessed_file}")
-
-# NEW: Save unmatched OrphaCodes
-unmatched_orphacodes = tier1_orphacodes - tier1_orphacodes_matched
-unmatched_file = os.path.join(output_folder, "tier1_unmatched_orphacodes.txt")
-with open(unmatched_file, "w", encoding="utf-8") as f:
-    for code in sorted(unmatched_orphacodes):
-        f.write(f"{code}\n")
-print(f"Saved TXT of unmatched OrphaCodes: {unmatched_file}")
-print(f"Total unmatched OrphaCodes: {len(unmatched_orphacodes)}")
-
-print("✅ Finished gene association pipeline")
+
+# Output CSV of each group
+group_files = {
+    "group1": "Group1_Strong.csv",
+    "group2": "Group2_Supplementary.csv",
+    "group3": "Group3_Excluded.csv",
+    "group4_not_yet_assessed": "Group4_NotYetAssessed.csv",
+}
+
+
+def select_matched(table, orphacodes):
+    """Return the table rows of the given OrphaCodes."""
+    return table[OrphaCodeSet(orphacodes).mask(table["OrphaCode"])]
+
+
+def assign_groups(matched):
+    """Split matched rows into the associations of Groups 1–4."""
+    assoc = matched[matched["HasAssociation"]]
+    status = assoc["DisorderGeneAssociationStatus"]
+
+    assessed = assoc[status == "Assessed"]
+    assoc_type = assessed["DisorderGeneAssociationType"]
+
+    not_assessed = assoc[status == "Not yet assessed"].copy()
+    for col in not_assessed_blank_columns:
+        not_assessed[col] = ""
+
+    return {
+        "group1": assessed[assoc_type.isin(group1_types)],
+        "group2": assessed[assoc_type.isin(group2_types)],
+        "group3": assessed[assoc_type.isin(group3_types)],
+        "group4_not_yet_assessed": not_assessed,
+    }
+
+
+def save_txt(codes, filepath):
+    """Save OrphaCodes to TXT."""
+    with open(filepath, "w", encoding="utf-8") as f:
+        for code in sorted(codes):
+            f.write(f"{code}\n")
+
+
+def save_outputs(matched_chunks, orphacodes, folder):
+    """Route matched rows chunk by chunk into the group CSVs and OrphaCode TXT lists.
+
+    matched_chunks is an iterable of frames from select_matched, so only one
+    chunk of the table needs to be in memory. Returns the number of
+    association rows written.
+    """
+    matched_orphacodes_file = os.path.join(folder, "tier1_matched_orphacodes.txt")
+    not_assessed_file = os.path.join(folder, "tier1_not_yet_assessed_orphacodes.txt")
+    paths = {group: os.path.join(folder, fname) for group, fname in group_files.items()}
+    code_lists = {"matched": matched_orphacodes_file, "not_assessed": not_assessed_file}
+
+    with PartitionedCSVWriter(paths, headers, code_lists=code_lists) as writer:
+        for batch in matched_chunks:
+            groups = assign_groups(batch)
+            for group, rows in groups.items():
+                writer.write(group, rows)
+            writer.add_codes("matched", batch["OrphaCode"].unique())
+            writer.add_codes("not_assessed", groups["group4_not_yet_assessed"]["OrphaCode"].unique())
+
+    print(f"Disorders in XML matching Tier1 OrphaCodes: {len(writer.codes['matched'])}")
+    for group, fname in group_files.items():
+        print(f"Saved {fname}: {writer.rows[group]} rows")
+    print(f"Saved TXT of matched OrphaCodes: {matched_orphacodes_file}")
+    print(f"Saved TXT of not yet assessed OrphaCodes: {not_assessed_file}")
+
+    # NEW: Save unmatched OrphaCodes
+    unmatched_orphacodes = set(orphacodes) - set(writer.codes["matched"])
+    unmatched_file = os.path.join(folder, "tier1_unmatched_orphacodes.txt")
+    save_txt(unmatched_orphacodes, unmatched_file)
+    print(f"Saved TXT of unmatched OrphaCodes: {unmatched_file}")
+    print(f"Total unmatched OrphaCodes: {len(unmatched_orphacodes)}")
+
+    return sum(writer.rows.values())
+
+
+def main():
+    os.makedirs(output_folder, exist_ok=True)
+    metrics = StageMetrics("gene_association")
+
+    # Load Tier1 OrphaCodes
+    metrics.start("load filter")
+    with open_input(tier1_txt, "rt") as f:
+        tier1_orphacodes = {line.strip() for line in f.readlines()}
+    print(f"Loaded {len(tier1_orphacodes)} Tier1 OrphaCodes from TXT")
+    metrics.stop(rows_out=len(tier1_orphacodes))
+
+    # Filter the shared table one chunk at a time, writing each chunk's matches
+    metrics.start("filter and write outputs")
+    tier1_set = OrphaCodeSet(tier1_orphacodes)
+    rows_in = 0
+    status_counts = Counter()
+
+    def matched_chunks():
+        nonlocal rows_in
+        for chunk in iter_gene_association_table(TABLE_FILE, columns=headers + ["HasAssociation"]):
+            rows_in += len(chunk)
+            matched = select_matched(chunk, tier1_set)
+            status_counts.update(matched["DisorderGeneAssociationStatus"][matched["HasAssociation"]].tolist())
+            yield matched
+
+    rows_written = save_outputs(matched_chunks(), tier1_orphacodes, output_folder)
+    metrics.stop(rows_in=rows_in, rows_out=rows_written)
+
+    # Debug prints
+    print(f"Total gene associations with status 'Assessed': {status_counts['Assessed']}")
+    print(f"Total gene associations with status 'Not yet assessed': {status_counts['Not yet assessed']}")
+    print("✅ Finished gene association pipeline")
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+import pandas as pd
+
+import pipeline_paths
+from orphanet_xml import map_disorders, node_query, text_query
+from pipeline_io import CATEGORICAL_COLUMNS, iter_table, read_table, save_csv
+from stage_metrics import StageMetrics
+
+# === FILE PATHS ===
+GENE_ASSOC_XML = pipeline_paths.GENE_ASSOC_XML
+TABLE_FILE = os.path.join(pipeline_paths.GENE_ASSOC_DIR, "gene_associations.csv")
+
+# === TABLE LAYOUT ===
+# One row per disorder-gene association. Disorders without any association
+# keep a single row with HasAssociation=False so that downstream stages can
+# still count them.
+COLUMNS = [
+    "OrphaCode", "DisorderName", "DisorderGroup", "DisorderGroupID",
+    "DisorderType", "DisorderTypeID", "ExpertLink", "AssocCount",
+    "HasAssociation", "GeneSymbol", "GeneName", "GeneType", "GeneLocus",
+    "DisorderGeneAssociationType", "DisorderGeneAssociationStatus",
+    "SourceOfValidation", "OMIM", "UniProt",
+]
+
+DTYPES = {col: str for col in COLUMNS}
+DTYPES["AssocCount"] = "int64"
+DTYPES["HasAssociation"] = bool
+# Repeated labels are held as categoricals: one copy per distinct value plus small integer codes
+DTYPES.update({col: "category" for col in COLUMNS if col in CATEGORICAL_COLUMNS})
+
+EMPTY_ASSOCIATION = [""] * 9
+
+
+# === QUERIES ===
+# Compiled once; with lxml these are XPath expressions (see orphanet_xml).
+ORPHA_CODE = text_query("OrphaCode")
+DISORDER_NAME = text_query("Name")
+DISORDER_GROUP_ID = text_query("DisorderGroup/@id")
+DISORDER_GROUP_NAME = text_query("DisorderGroup/Name")
+DISORDER_TYPE_ID = text_query("DisorderType/@id")
+DISORDER_TYPE_NAME = text_query("DisorderType/Name")
+EXPERT_LINK = text_query("ExpertLink")
+ASSOC_COUNT = text_query("DisorderGeneAssociationList/@count")
+ASSOCIATIONS = node_query("DisorderGeneAssociationList/DisorderGeneAssociation")
+
+ASSOC_STATUS = text_query("DisorderGeneAssociationStatus/Name")
+ASSOC_TYPE = text_query("DisorderGeneAssociationType/Name")
+SOURCE_OF_VALIDATION = text_query("SourceOfValidation")
+GENE_SYMBOL = text_query("Gene/Symbol")
+GENE_NAME = text_query("Gene/Name")
+GENE_TYPE = text_query("Gene/GeneType/Name")
+LOCUS_COUNT = text_query("Gene/LocusList/@count")
+GENE_LOCUS = text_query("Gene/LocusList/Locus/GeneLocus")
+EXTERNAL_REFERENCES = node_query("Gene/ExternalReferenceList/ExternalReference")
+REF_SOURCE = text_query("Source")
+REF_VALUE = text_query("Reference")
+
+
+# === FUNCTIONS ===
+def parse_association(gene_assoc):
+    """Return the gene-level fields of a DisorderGeneAssociation node."""
+    gene_locus = ""
+    if int(LOCUS_COUNT(gene_assoc) or "0") > 0:
+        gene_locus = GENE_LOCUS(gene_assoc).strip()
+
+    omim_ref, uniprot_ref = "", ""
+    for ref in EXTERNAL_REFERENCES(gene_assoc):
+        source = REF_SOURCE(ref).strip()
+        if source == "OMIM":
+            omim_ref = REF_VALUE(ref).strip()
+        if source in ["UNIPROTKB", "SwissProt"]:
+            uniprot_ref = REF_VALUE(ref).strip()
+
+    # Gene and vocabulary fields recur across disorders; interning keeps one copy of each
+    return [
+        sys.intern(GENE_SYMBOL(gene_assoc).strip()), sys.intern(GENE_NAME(gene_assoc).strip()),
+        sys.intern(GENE_TYPE(gene_assoc).strip()), sys.intern(gene_locus),
+        sys.intern(ASSOC_TYPE(gene_assoc).strip()), sys.intern(ASSOC_STATUS(gene_assoc).strip()),
+        SOURCE_OF_VALIDATION(gene_assoc).strip(), sys.intern(omim_ref), sys.intern(uniprot_ref)
+    ]
+
+
+def parse_disorder(disorder):
+    """Return the table rows of a single <Disorder> node."""
+    orpha_code = ORPHA_CODE(disorder).strip()
+    disorder_name = DISORDER_NAME(disorder).strip()
+    disorder_group_id = sys.intern(DISORDER_GROUP_ID(disorder))
+    disorder_group_name = sys.intern(DISORDER_GROUP_NAME(disorder).strip())
+    disorder_type_id = sys.intern(DISORDER_TYPE_ID(disorder))
+    disorder_type_name = sys.intern(DISORDER_TYPE_NAME(disorder).strip())
+    expert_link = EXPERT_LINK(disorder).strip()
+
+    assoc_count = int(ASSOC_COUNT(disorder) or "0")
+    associations = ASSOCIATIONS(disorder)
+
+    disorder_fields = [
+        orpha_code, disorder_name, disorder_group_name, disorder_group_id,
+        disorder_type_name, disorder_type_id, expert_link, assoc_count
+    ]
+    if not associations:
+        return [disorder_fields + [False] + EMPTY_ASSOCIATION]
+    return [disorder_fields + [True] + parse_association(a) for a in associations]
+
+
+def extract_gene_associations(xml_path, orphacodes=None):
+    """Flatten every disorder-gene association of genes_associated_ds.xml.
+
+    With orphacodes, only the disorders whose OrphaCode it contains are kept.
+    Large releases are parsed in parallel shards (see orphanet_xml.map_disorders).
+    """
+    table = {col: [] for col in COLUMNS}
+    columns = list(table.values())
+    _, parsed = map_disorders(xml_path, parse_disorder, orphacodes)
+    for rows in parsed:
+        for row in rows:
+            for column, value in zip(columns, row):
+                column.append(value)
+    return pd.DataFrame(table, columns=COLUMNS).astype(DTYPES)
+
+
+def load_gene_association_table(path=TABLE_FILE, columns=None):
+    """Load the persisted gene-association table with its column types."""
+    return read_table(path, columns=columns, dtype=DTYPES, keep_default_na=False)
+
+
+def iter_gene_association_table(path=TABLE_FILE, columns=None):
+    """Stream the persisted gene-association table in chunks (see pipeline_io.iter_table)."""
+    return iter_table(path, columns=columns, dtype=DTYPES, keep_default_na=False)
+
+
+# === MAIN ===
+def main():
+    os.makedirs(os.path.dirname(TABLE_FILE), exist_ok=True)
+
+    metrics = StageMetrics("gene_association_table")
+
+    metrics.start("parse XML")
+    table = extract_gene_associations(GENE_ASSOC_XML)
+    metrics.stop(rows_out=len(table))
+
+    metrics.start("write outputs")
+    save_csv(table, TABLE_FILE)
+    metrics.stop(rows_out=len(table))
+
+    print(f"Disorders in XML: {table['OrphaCode'].nunique()}")
+    print(f"Disorder-gene associations: {int(table['HasAssociation'].sum())}")
+    print(f"Saved gene association table: {TABLE_FILE}")
+    print("✅ Finished gene association extraction")
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,94 @@
 import pandas as pd
 import os
 
+import pipeline_paths
+from pipeline_io import open_input, resolve_input
+from stage_metrics import StageMetrics
+
 # -------------------------------
 # File paths
 # -------------------------------
-genes_file = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Gene Association/Monogenic Association/Disorder Classification/ClinGen/Natural History/included_inheritance_genesymbols.txt"
+genes_file = os.path.join(pipeline_paths.NATURAL_HISTORY_DIR, "included_inheritance_genesymbols.txt")
 
-mgi_file = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Raw Datasets/MGI/mouse_model_disease_clean_ds.txt"
+mgi_file = pipeline_paths.MGI_TXT
 
-output_folder = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Gene Association/Monogenic Association/Disorder Classification/ClinGen/Natural History/Models"
+output_folder = pipeline_paths.MODELS_DIR
 os.makedirs(output_folder, exist_ok=True)
 
 mgi_csv_output = os.path.join(output_folder, "mgi_models.csv")
 mgi_txt_output = os.path.join(output_folder, "mgi_genesymbols.txt")
 modeled_genes_txt = os.path.join(output_folder, "mgi_modeled_genesymbols.txt")
+models_by_gene_output = os.path.join(output_folder, "mgi_models_by_gene.csv")
+
+# Separators between the human homologs listed in one MGI cell
+HOMOLOG_SEPARATORS = r"[|,]"
+
+metrics = StageMetrics("mgi")
 
 # -------------------------------
 # Check that files exist
 # -------------------------------
 for file_path in [genes_file, mgi_file]:
-    if not os.path.exists(file_path):
+    if not os.path.exists(resolve_input(file_path)):
         raise FileNotFoundError(f"File not found: {file_path}")
 
 # -------------------------------
 # Load included genes
 # -------------------------------
-with open(genes_file, "r") as f:
+metrics.start("load filter")
+with open_input(genes_file, "rt") as f:
     included_genes = {line.strip() for line in f if line.strip() != ""}
+metrics.stop(rows_out=len(included_genes))
 
 # -------------------------------
 # Load MGI dataset
 # -------------------------------
-mgi_df = pd.read_csv(mgi_file, sep="\t", encoding="utf-8")
+metrics.start("load table")
+with open_input(mgi_file) as f:
+    mgi_df = pd.read_csv(f, sep="\t", encoding="utf-8")
 
 # Strip leading/trailing spaces from HumanHomologs
 mgi_df["HumanHomologs"] = mgi_df["HumanHomologs"].astype(str).str.strip()
+metrics.stop(rows_out=len(mgi_df))
 
 # -------------------------------
 # Cross-reference genes
 # -------------------------------
-found_df = mgi_df[mgi_df["HumanHomologs"].isin(included_genes)].copy()
+# Cells may list several human homologs ("A|B", "A, B"): split them once
+# into a symbol per (row, homolog), indexed by the MGI row it came from
+metrics.start("filter")
+homologs = mgi_df["HumanHomologs"].str.split(HOMOLOG_SEPARATORS, regex=True).explode().str.strip()
+matched_homologs = homologs[homologs.isin(included_genes)]
+
+# One row per matching (MGI row, human gene), HumanHomologs being the matched symbol
+found_df = mgi_df.loc[matched_homologs.index].copy()
+found_df["HumanHomologs"] = matched_homologs.to_numpy()
+found_df = found_df.reset_index(drop=True)
 
 # Ensure MouseModels is numeric
 found_df["MouseModels"] = pd.to_numeric(found_df["MouseModels"], errors="coerce").fillna(0)
 
 # Genes with at least 1 mouse model
 modeled_df = found_df[found_df["MouseModels"] >= 1]
+metrics.stop(rows_in=len(mgi_df), rows_out=len(modeled_df))
 
 # -------------------------------
 # Save CSV with selected columns
 # -------------------------------
+metrics.start("write outputs")
 selected_columns = ["DiseaseTerm", "MouseHomologs", "HumanHomologs", "MouseModels", "HomologySource"]
 modeled_df.to_csv(mgi_csv_output, columns=selected_columns, index=False)
 
+# -------------------------------
+# Save per-gene totals
+# -------------------------------
+models_by_gene = found_df.groupby("HumanHomologs").agg(
+    DiseaseTerms=("DiseaseTerm", "nunique"),
+    MouseModels=("MouseModels", "sum"),
+).reset_index()
+models_by_gene["MouseModels"] = models_by_gene["MouseModels"].astype("int64")
+models_by_gene.to_csv(models_by_gene_output, index=False)
+
 # -------------------------------
 # Save TXT with all found genes
 # -------------------------------
@@ -68,6 +104,7 @@ modeled_genes = sorted(modeled_df["HumanHomologs"].unique())
 with open(modeled_genes_txt, "w") as f:
     for gene in modeled_genes:
         f.write(gene + "\n")
+metrics.stop(rows_out=len(modeled_df))
 
 # -------------------------------
 # Terminal output (visual summary)
@@ -79,7 +116,8 @@ total_rows = len(modeled_df)
 print(f"✅ Found {total_found_genes} unique gene symbols in MGI dataset after flexible parsing.")
 print(f"💾 Saved filtered dataset to: {mgi_csv_output}")
 print(f"💾 Saved gene symbols to: {mgi_txt_output}")
-print(f"💾 Saved modeled gene symbols to: {modeled_genes_txt}\n")
+print(f"💾 Saved modeled gene symbols to: {modeled_genes_txt}")
+print(f"💾 Saved per-gene mouse model totals to: {models_by_gene_output}\n")
 
 print("=== SUMMARY ===")
 print(f"Filter gene symbols provided: {len(included_genes)}")
@@ -87,3 +125,4 @@ print(f"Found in MGI dataset: {total_found_genes}")
 print(f"Genes with at least 1 mouse model: {genes_with_models}")
 print(f"Final rows in output CSV: {total_rows}")
 print("✅ Process complete.")
+metrics.finish()
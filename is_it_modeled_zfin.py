@@ -1,97 +1,198 @@
 #!/usr/bin/env python3
+import csv
 import os
-import pandas as pd
+from operator import itemgetter
 
-# === FILE PATHS ===
-BASE_DIR = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders"
+import pipeline_paths
+from pipeline_io import open_input, read_csv_filtered
+from stage_metrics import StageMetrics
 
-ZFIN_DIR = os.path.join(BASE_DIR, "Raw Datasets/ZFIN")
-CLINGEN_NH_DIR = os.path.join(BASE_DIR, "Gene Association/Monogenic Association/Disorder Classification/ClinGen/Natural History")
-OUTPUT_DIR = os.path.join(CLINGEN_NH_DIR, "Models")
+# === FILE PATHS ===
+CLINGEN_NH_DIR = pipeline_paths.NATURAL_HISTORY_DIR
+OUTPUT_DIR = pipeline_paths.MODELS_DIR
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # Input files
-GENE_DISEASE_FILE = os.path.join(ZFIN_DIR, "gene2DiseaseViaOrthology_ds.txt")
-FISH_MODEL_FILE = os.path.join(ZFIN_DIR, "fish_model_disease_ds.txt")
+GENE_DISEASE_FILE = pipeline_paths.ZFIN_GENE_DISEASE_TXT
+FISH_MODEL_FILE = pipeline_paths.ZFIN_FISH_MODEL_TXT
 GENE_FILTER_FILE = os.path.join(CLINGEN_NH_DIR, "included_inheritance_genesymbols.txt")
 
 # Output files
 OUTPUT_CSV = os.path.join(OUTPUT_DIR, "zfin_models.csv")
 OUTPUT_TXT = os.path.join(OUTPUT_DIR, "zfin_genesymbols.txt")
 
-# === STEP 1: Load filter genes ===
-with open(GENE_FILTER_FILE, "r") as f:
-    filter_genes = {line.strip() for line in f if line.strip()}
+# Columns read from the ZFIN files: everything expected_columns needs, before
+# the merge adds its suffixes
+ZFIN_COLUMNS = ["HumanOrthologSymbol", "DOTermID", "DOTermName", "OMIMTermName", "OMIMID", "is_a_model", "PubMedID"]
+
+# === CONFIGURATION ===
+# How gene rows are joined to the fish models that share their DOTermID:
+#   "long"      one row per gene × fish model (zfin_models.csv), streamed to
+#               disk as it is produced
+#   "aggregate" one row per gene × DO term with its fish models collapsed into
+#               a count, the distinct is_a_model values and the PubMedIDs
+#               (zfin_models_aggregated.csv)
+# Set ZFIN_JOIN_MODE=aggregate to select the second.
+JOIN_MODES = ("long", "aggregate")
+JOIN_MODE = os.environ.get("ZFIN_JOIN_MODE", "long")
+if JOIN_MODE not in JOIN_MODES:
+    raise ValueError(f"ZFIN_JOIN_MODE must be one of {', '.join(JOIN_MODES)}, not {JOIN_MODE!r}")
+
+OUTPUT_AGG_CSV = os.path.join(OUTPUT_DIR, "zfin_models_aggregated.csv")
+
+# Columns of the long output, named as pd.merge(..., suffixes=("_orthology", "_model")) names them
+EXPECTED_COLUMNS = [
+    "HumanOrthologSymbol",
+    "DOTermID",
+    "DOTermName_orthology",  # from first dataset
+    "OMIMTermName",
+    "OMIMID",
+    "is_a_model",            # from fish model dataset
+    "PubMedID"
+]
 
-print(f"Loaded {len(filter_genes)} gene symbols from filter file.")
 
-# === STEP 2: Load ZFIN gene→disease orthology data ===
-df_gene_disease = pd.read_csv(GENE_DISEASE_FILE, sep="\t", dtype=str)
-df_gene_disease.columns = df_gene_disease.columns.str.strip()
+# === FUNCTIONS ===
+def merged_column_sources(genes, models):
+    """Map each column of the DOTermID merge to the frame and column it comes from."""
+    shared = (set(genes.columns) & set(models.columns)) - {"DOTermID"}
+    sources = {"DOTermID": ("genes", "DOTermID")}
+    for side, frame, suffix in [("genes", genes, "_orthology"), ("models", models, "_model")]:
+        for col in frame.columns:
+            if col != "DOTermID":
+                sources[col + suffix if col in shared else col] = (side, col)
+    return sources
+
+
+def text_rows(frame, columns):
+    """Row tuples of the given columns, with missing values as empty strings."""
+    return frame[columns].astype(object).fillna("").itertuples(index=False, name=None)
+
+
+def write_long_join(genes, models, columns, path):
+    """Stream every gene × fish model pair sharing a DOTermID to CSV.
+
+    Rows come out in the order of pd.merge(how="inner"): gene rows in file
+    order, each followed by its fish models in file order. Returns the
+    number of rows written and the set of gene symbols with a model.
+    """
+    sources = merged_column_sources(genes, models)
+    gene_columns = [sources[c][1] for c in columns if sources[c][0] == "genes"]
+    model_columns = [sources[c][1] for c in columns if sources[c][0] == "models"]
+    combined = [("genes", c) for c in gene_columns] + [("models", c) for c in model_columns]
+    reorder = itemgetter(*[combined.index(sources[c]) for c in columns])
+
+    models_by_term = {}
+    for key, values in zip(models["DOTermID"].astype(object), text_rows(models, model_columns)):
+        models_by_term.setdefault(key, []).append(values)
+
+    rows_written = 0
+    modeled_genes = set()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(columns)
+        keys = genes["DOTermID"].astype(object)
+        symbols = genes["HumanOrthologSymbol"].astype(object)
+        for key, symbol, values in zip(keys, symbols, text_rows(genes, gene_columns)):
+            matches = models_by_term.get(key)
+            if not matches:
+                continue
+            writer.writerows(reorder(values + model) for model in matches)
+            rows_written += len(matches)
+            if isinstance(symbol, str):
+                modeled_genes.add(symbol)
+    return rows_written, modeled_genes
+
+
+def join_distinct(values):
+    return ";".join(dict.fromkeys(values.dropna().astype(str)))
+
+
+def aggregate_join(genes, models):
+    """Collapse fish models per DOTermID, then attach them to the gene rows."""
+    grouped = models.groupby("DOTermID", sort=False, observed=True)
+    aggregated = grouped.size().rename("FishModelCount").to_frame()
+    if "is_a_model" in models.columns:
+        aggregated["is_a_model"] = grouped["is_a_model"].agg(lambda v: ";".join(sorted(set(v.dropna().astype(str)))))
+    if "PubMedID" in models.columns:
+        aggregated["PubMedID"] = grouped["PubMedID"].agg(join_distinct)
+    aggregated.index = aggregated.index.astype(str)
+
+    gene_columns = [c for c in genes.columns if c not in aggregated.columns]
+    return genes[gene_columns].astype({"DOTermID": str}).merge(
+        aggregated, left_on="DOTermID", right_index=True, how="inner"
+    )
+
+
+metrics = StageMetrics("zfin")
 
-print(f"Loaded {len(df_gene_disease)} rows from gene2DiseaseViaOrthology_ds.txt")
+# === STEP 1: Load filter genes ===
+metrics.start("load filter")
+with open_input(GENE_FILTER_FILE, "rt") as f:
+    filter_genes = {line.strip() for line in f if line.strip()}
 
-# === STEP 3: Filter for relevant human orthologs ===
-filtered_genes = df_gene_disease[df_gene_disease["HumanOrthologSymbol"].isin(filter_genes)].copy()
+print(f"Loaded {len(filter_genes)} gene symbols from filter file.")
+metrics.stop(rows_out=len(filter_genes))
+
+# === STEP 2: Stream ZFIN gene→disease orthology data, keeping relevant human orthologs ===
+# Both files are read with the same column set so that the columns they
+# share still get the _orthology/_model suffixes in the merge below.
+metrics.start("load and filter table")
+filtered_genes, gene_disease_rows = read_csv_filtered(
+    GENE_DISEASE_FILE, "HumanOrthologSymbol", filter_genes,
+    columns=ZFIN_COLUMNS, sep="\t", categorical=["DOTermID", "DOTermName"]
+)
 found_genes = filtered_genes["HumanOrthologSymbol"].nunique()
 
+print(f"Loaded {gene_disease_rows} rows from gene2DiseaseViaOrthology_ds.txt")
 print(f"✅ Found {found_genes} unique gene symbols in ZFIN gene→disease dataset.")
 print(f"Total matching rows kept: {len(filtered_genes)}")
+metrics.stop(rows_in=gene_disease_rows, rows_out=len(filtered_genes))
 
-# === STEP 4: Extract DOTermIDs to cross-reference ===
+# === STEP 3: Extract DOTermIDs to cross-reference ===
 doterm_ids = filtered_genes["DOTermID"].dropna().unique().tolist()
 
-# === STEP 5: Load ZFIN fish model dataset ===
-df_fish_model = pd.read_csv(FISH_MODEL_FILE, sep="\t", dtype=str)
-df_fish_model.columns = df_fish_model.columns.str.strip()
-
-print(f"Loaded {len(df_fish_model)} rows from fish_model_disease_ds.txt")
-
-# === STEP 6: Filter fish model data by DOTermID ===
-filtered_models = df_fish_model[df_fish_model["DOTermID"].isin(doterm_ids)].copy()
+# === STEP 4: Stream ZFIN fish model dataset, keeping those DOTermIDs ===
+metrics.start("load and filter table")
+filtered_models, fish_model_rows = read_csv_filtered(
+    FISH_MODEL_FILE, "DOTermID", doterm_ids,
+    columns=ZFIN_COLUMNS, sep="\t", categorical=["DOTermID", "DOTermName", "is_a_model"]
+)
+print(f"Loaded {fish_model_rows} rows from fish_model_disease_ds.txt")
 print(f"✅ Found {len(filtered_models)} matching rows in fish model dataset.")
 print(f"Unique DOTermIDs with models: {filtered_models['DOTermID'].nunique()}")
-
-# === STEP 7: Merge the two datasets on DOTermID ===
-merged = pd.merge(
-    filtered_genes,
-    filtered_models,
-    on="DOTermID",
-    how="inner",
-    suffixes=("_orthology", "_model")
-)
-
-print(f"✅ Total merged rows: {len(merged)}")
-
-# === STEP 8: Select required columns ===
-expected_columns = [
-    "HumanOrthologSymbol",
-    "DOTermID",
-    "DOTermName_orthology",  # from first dataset
-    "OMIMTermName",
-    "OMIMID",
-    "is_a_model",            # from fish model dataset
-    "PubMedID"
-]
-
-available_columns = [col for col in expected_columns if col in merged.columns]
-missing_columns = set(expected_columns) - set(available_columns)
-if missing_columns:
-    print(f"⚠️ Warning: missing columns: {', '.join(missing_columns)}")
-
-merged = merged[available_columns]
-
-# === STEP 9: Save output CSV ===
-merged.to_csv(OUTPUT_CSV, index=False)
-print(f"💾 Saved merged ZFIN model dataset to: {OUTPUT_CSV}")
-
-# === STEP 10: Save unique gene symbols ===
-unique_genes = sorted(merged["HumanOrthologSymbol"].dropna().unique())
+metrics.stop(rows_in=fish_model_rows, rows_out=len(filtered_models))
+
+# === STEP 5: Join genes to fish models sharing their DOTermID ===
+metrics.start("join and write outputs")
+if JOIN_MODE == "aggregate":
+    joined = aggregate_join(filtered_genes, filtered_models)
+    joined.to_csv(OUTPUT_AGG_CSV, index=False)
+    joined_rows = len(joined)
+    unique_genes = sorted(joined["HumanOrthologSymbol"].dropna().unique())
+    print(f"✅ Total gene × DO term rows: {joined_rows}")
+    print(f"💾 Saved aggregated ZFIN model dataset to: {OUTPUT_AGG_CSV}")
+else:
+    # Same rows and columns as pd.merge(..., suffixes=("_orthology", "_model")),
+    # written while they are produced instead of materialized first
+    sources = merged_column_sources(filtered_genes, filtered_models)
+    available_columns = [col for col in EXPECTED_COLUMNS if col in sources]
+    missing_columns = set(EXPECTED_COLUMNS) - set(available_columns)
+    if missing_columns:
+        print(f"⚠️ Warning: missing columns: {', '.join(missing_columns)}")
+
+    joined_rows, modeled_genes = write_long_join(filtered_genes, filtered_models, available_columns, OUTPUT_CSV)
+    unique_genes = sorted(modeled_genes)
+    print(f"✅ Total merged rows: {joined_rows}")
+    print(f"💾 Saved merged ZFIN model dataset to: {OUTPUT_CSV}")
+
+# === STEP 6: Save unique gene symbols ===
 with open(OUTPUT_TXT, "w", encoding="utf-8") as f:
     for g in unique_genes:
         f.write(g + "\n")
 
+metrics.stop(rows_in=len(filtered_genes) + len(filtered_models), rows_out=joined_rows)
 print(f"💾 Saved unique gene symbols to: {OUTPUT_TXT}")
 print(f"✅ Total unique modeled genes: {len(unique_genes)}")
 
@@ -100,6 +201,7 @@ print("\n=== SUMMARY ===")
 print(f"Filter gene symbols provided: {len(filter_genes)}")
 print(f"Found in ZFIN orthology dataset: {found_genes}")
 print(f"Found in ZFIN model dataset (DOTermID match): {filtered_models['DOTermID'].nunique()}")
-print(f"Final merged rows: {len(merged)}")
+print(f"Final merged rows: {joined_rows}")
 print(f"Unique gene symbols modeled: {len(unique_genes)}")
 print("✅ Process complete.")
+metrics.finish()
@@ -1,57 +1,164 @@
-import xml.etree.ElementTree as ET
+import numpy as np
 import pandas as pd
 import os
+from array import array
+from operator import itemgetter
+from concurrent.futures import ProcessPoolExecutor
 import matplotlib.pyplot as plt
 from matplotlib_venn import venn3
 
+import pipeline_paths
+from orphacode_set import OrphaCodeSet, membership_counts
+from orphanet_xml import iter_elements, text_query
+from stage_metrics import StageMetrics
+
 # =====================
 # CONFIGURATION
 # =====================
-OUTPUT_DIR = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Merge Neuro, IME, Genetic"
+OUTPUT_DIR = pipeline_paths.MERGE_DIR
 
 DATASETS = {
-    "neurological": "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Raw Datasets/neurological_disorders_ds.xml",
-    "genetic": "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Raw Datasets/genetic_diseases_ds.xml",
-    "metabolic": "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders/Raw Datasets/inborn_errors_metabolism_ds.xml"
+    "neurological": pipeline_paths.NEUROLOGICAL_XML,
+    "genetic": pipeline_paths.GENETIC_XML,
+    "metabolic": pipeline_paths.METABOLIC_XML
 }
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+# Parse the classification files in a process pool (one worker per file,
+# capped at the number of CPUs). Set to False to parse them one by one.
+PARALLEL = True
+
+COLUMNS = ["OrphaCode", "Name", "ExpertLink", "SourceFile"]
+INT32_MAX = 2**31 - 1
+
+# Compiled once; with lxml these are XPath expressions (see orphanet_xml)
+ORPHA_CODE = text_query("OrphaCode")
+NAME_EN = text_query("Name[@lang='en']")
+NAME = text_query("Name")
+LINK_EN = text_query("ExpertLink[@lang='en']")
+LINK = text_query("ExpertLink")
 
 # =====================
 # FUNCTIONS
 # =====================
+def code_key(code):
+    """Integer key of a numeric OrphaCode; anything else is kept as text."""
+    return int(code) if code.isdigit() else code
+
+
+def packed_code(code):
+    """int32 form of a numeric OrphaCode, or -1 when it has to travel as text.
+
+    Codes with leading zeros or beyond the int32 range stay text so that
+    the merged files show them exactly as the XML does.
+    """
+    if code.isascii() and code.isdigit() and code == str(int(code)) and int(code) <= INT32_MAX:
+        return int(code)
+    return -1
+
+
+def pack_strings(values):
+    """Pack strings into one UTF-8 buffer plus int64 offsets (in characters)."""
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in values], out=offsets[1:])
+    return "".join(values).encode("utf-8"), offsets
+
+
+def unpack_strings(packed):
+    """Inverse of pack_strings."""
+    buffer, offsets = packed
+    text = buffer.decode("utf-8")
+    bounds = offsets.tolist()
+    return [text[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def parse_xml_columns(file_path):
+    """Extract OrphaCode, Name and ExpertLink columns from an Orphanet XML file.
+
+    The file is streamed and every <Disorder> is read at whatever depth of
+    the classification it sits. A disorder listed under several parents is
+    kept once, with the Name and ExpertLink of its first occurrence.
+
+    The columns come back compact, since they are pickled back from a
+    worker process: OrphaCodes as an int32 array (-1 where a code is not
+    numeric, with those codes in a {row: code} dict), names and links each
+    as a buffer and offsets from pack_strings. See columns_to_frame.
+    """
+    seen = set()
+    codes = array("i")
+    text_codes = {}
+    names, links = [], []
+    for disorder in iter_elements(file_path, "Disorder"):
+        orpha = ORPHA_CODE(disorder).strip()
+        key = code_key(orpha)
+        if not orpha or key in seen:
+            continue
+        seen.add(key)
+        code = packed_code(orpha)
+        if code < 0:
+            text_codes[len(codes)] = orpha
+        codes.append(code)
+        names.append((NAME_EN(disorder) or NAME(disorder)).strip())
+        links.append((LINK_EN(disorder) or LINK(disorder)).strip())
+
+    print(f"Parsed {len(codes)} disorders from {os.path.basename(file_path)}")
+    return np.frombuffer(codes, dtype=np.int32), text_codes, pack_strings(names), pack_strings(links)
+
+
+def columns_to_frame(columns, file_path):
+    """Build the per-dataset DataFrame from the columns of parse_xml_columns."""
+    codes, text_codes, names, links = columns
+    orpha_codes = codes.astype(str).tolist()
+    for row, code in text_codes.items():
+        orpha_codes[row] = code
+    return pd.DataFrame({
+        "OrphaCode": orpha_codes,
+        "Name": unpack_strings(names),
+        "ExpertLink": unpack_strings(links),
+        "SourceFile": os.path.basename(file_path)
+    }, columns=COLUMNS)
+
+
 def parse_xml(file_path):
     """Extract disorders with OrphaCode, Name, ExpertLink from an Orphanet XML file"""
-    tree = ET.parse(file_path)
-    root = tree.getroot()
-
-    # DEBUG: show first few tags
-    print(f"Inspecting {file_path} ... root tag = {root.tag}")
-    for elem in root.iter():
-        print("Tag:", elem.tag)
-        break  # just show the first one
-
-    records = []
-    for disorder in root.findall(".//Disorder"):
-        orpha = disorder.findtext("OrphaCode")
-        name = disorder.findtext("Name[@lang='en']") or disorder.findtext("Name")
-        link = disorder.findtext("ExpertLink[@lang='en']") or disorder.findtext("ExpertLink")
-        
-        if orpha:
-            records.append({
-                "OrphaCode": orpha.strip(),
-                "Name": (name or "").strip(),
-                "ExpertLink": (link or "").strip(),
-                "SourceFile": os.path.basename(file_path)
-            })
-
-    print(f"Parsed {len(records)} disorders from {os.path.basename(file_path)}")
-    return pd.DataFrame(records)
+    return columns_to_frame(parse_xml_columns(file_path), file_path)
+
+
+def parse_datasets(datasets, parallel=PARALLEL):
+    """Parse every classification file, concurrently when parallel is set."""
+    names = list(datasets)
+    paths = [datasets[name] for name in names]
+
+    workers = min(len(paths), os.cpu_count() or 1)
+    if parallel and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(parse_xml_columns, paths))
+    else:
+        results = [parse_xml_columns(path) for path in paths]
+
+    return {name: columns_to_frame(columns, path) for name, columns, path in zip(names, results, paths)}
+
+
+def merge_frames(frames):
+    """Merge the per-dataset frames into one row per OrphaCode, sorted by OrphaCode.
+
+    Name and ExpertLink come from the first dataset listing the disorder;
+    SourceFile lists every dataset that does, in the order given.
+    """
+    merged = {}
+    for frame in frames:
+        for code, name, link, source in zip(*(frame[col] for col in COLUMNS)):
+            key = code_key(code)
+            row = merged.get(key)
+            if row is None:
+                merged[key] = [code, name, link, source]
+            else:
+                row[3] += ";" + source
+    return pd.DataFrame(sorted(merged.values(), key=itemgetter(0)), columns=COLUMNS)
 
 
 def save_tier(orpha_set, tier_name, all_data):
     """Save tier to CSV and TXT"""
-    tier_df = all_data[all_data["OrphaCode"].isin(orpha_set)]
+    tier_df = all_data[orpha_set.mask(all_data["OrphaCode"])]
     csv_path = os.path.join(OUTPUT_DIR, f"{tier_name}.csv")
     txt_path = os.path.join(OUTPUT_DIR, f"{tier_name}.txt")
 
@@ -66,64 +173,67 @@ def save_tier(orpha_set, tier_name, all_data):
 # =====================
 # MAIN SCRIPT
 # =====================
-print("Parsing XML datasets...")
-
-df_neuro = parse_xml(DATASETS["neurological"])
-df_genetic = parse_xml(DATASETS["genetic"])
-df_metabolic = parse_xml(DATASETS["metabolic"])
-
-print(f"Neurological: {len(df_neuro)} disorders")
-print(f"Genetic: {len(df_genetic)} disorders")
-print(f"Metabolic: {len(df_metabolic)} disorders")
-
-# Merge all datasets into a single master file
-combined = pd.concat([df_neuro, df_genetic, df_metabolic], ignore_index=True)
-
-# Normalize column names
-combined.rename(columns={"ORPHACode": "OrphaCode"}, inplace=True)
-combined.columns = combined.columns.str.strip()
-
-# Keep only unique OrphaCodes, merging names/links if duplicated
-combined = combined.groupby("OrphaCode").agg({
-    "Name": "first",
-    "ExpertLink": "first",
-    "SourceFile": lambda x: ";".join(set(x))
-}).reset_index()
-
-# Save master CSV
-master_csv = os.path.join(OUTPUT_DIR, "merged_master.csv")
-combined.to_csv(master_csv, index=False)
-print(f"Master dataset saved: {master_csv}")
-
-# =====================
-# TIERED LISTS
-# =====================
-set_neuro = set(df_neuro["OrphaCode"])
-set_genetic = set(df_genetic["OrphaCode"])
-set_metabolic = set(df_metabolic["OrphaCode"])
-
-# Tier definitions
-tier1 = set_neuro & set_genetic & set_metabolic
-tier2 = (set_neuro & set_genetic) | (set_neuro & set_metabolic) | (set_genetic & set_metabolic)
-tier2 = tier2 - tier1
-tier3 = set_neuro | set_genetic | set_metabolic
-tier3 = tier3 - (tier1 | tier2)
-
-# Save tiered outputs
-save_tier(tier1, "tier1_all_three", combined)
-save_tier(tier2, "tier2_two_overlap", combined)
-save_tier(tier3, "tier3_one_only", combined)
-
-# =====================
-# VENN DIAGRAM
-# =====================
-plt.figure(figsize=(8,8))
-venn3(
-    [set_neuro, set_genetic, set_metabolic],
-    set_labels=("Neurological", "Genetic", "Metabolic")
-)
-venn_path = os.path.join(OUTPUT_DIR, "venn_diagram.png")
-plt.savefig(venn_path)
-print(f"Venn diagram saved: {venn_path}")
-
-print("✅ Done!")
+def main():
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    metrics = StageMetrics("merge")
+
+    print("Parsing XML datasets...")
+
+    metrics.start("parse XML")
+    frames = parse_datasets(DATASETS)
+    metrics.stop(rows_out=sum(len(frame) for frame in frames.values()))
+    df_neuro = frames["neurological"]
+    df_genetic = frames["genetic"]
+    df_metabolic = frames["metabolic"]
+
+    print(f"Neurological: {len(df_neuro)} disorders")
+    print(f"Genetic: {len(df_genetic)} disorders")
+    print(f"Metabolic: {len(df_metabolic)} disorders")
+
+    # Merge all datasets into a single master file
+    metrics.start("filter")
+    # Keep one row per OrphaCode, with the first name/link and every source file
+    combined = merge_frames(frames.values())
+    metrics.stop(rows_in=sum(len(frame) for frame in frames.values()), rows_out=len(combined))
+
+    # Save master CSV
+    metrics.start("write outputs")
+    master_csv = os.path.join(OUTPUT_DIR, "merged_master.csv")
+    combined.to_csv(master_csv, index=False)
+    print(f"Master dataset saved: {master_csv}")
+
+    # =====================
+    # TIERED LISTS
+    # =====================
+    # Tier definitions, computed in bulk on OrphaCode bitsets:
+    # Tier1 = in every dataset, Tier2 = in at least two, Tier3 = in one only
+    dataset_sets = [OrphaCodeSet(frame["OrphaCode"]) for frame in frames.values()]
+    codes, counts = membership_counts(dataset_sets)
+    tier1 = OrphaCodeSet(codes[counts == len(dataset_sets)])
+    tier2 = OrphaCodeSet(codes[(counts >= 2) & (counts < len(dataset_sets))])
+    tier3 = OrphaCodeSet(codes[counts == 1])
+
+    # Save tiered outputs
+    save_tier(tier1, "tier1_all_three", combined)
+    save_tier(tier2, "tier2_two_overlap", combined)
+    save_tier(tier3, "tier3_one_only", combined)
+
+    # =====================
+    # VENN DIAGRAM
+    # =====================
+    plt.figure(figsize=(8,8))
+    venn3(
+        [set(df_neuro["OrphaCode"]), set(df_genetic["OrphaCode"]), set(df_metabolic["OrphaCode"])],
+        set_labels=("Neurological", "Genetic", "Metabolic")
+    )
+    venn_path = os.path.join(OUTPUT_DIR, "venn_diagram.png")
+    plt.savefig(venn_path)
+    print(f"Venn diagram saved: {venn_path}")
+    metrics.stop(rows_out=len(combined))
+    metrics.finish()
+
+    print("✅ Done!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+import argparse
+import glob
+import os
+
+import epidemiology
+import gene_association
+import natural_history
+import pipeline_paths as P
+from gene_association_table import extract_gene_associations
+from orphacode_set import OrphaCodeSet
+from pipeline_io import open_input
+from stage_metrics import StageMetrics
+
+# === FILE PATHS ===
+# Every <name>.txt list in COHORTS_DIR defines a cohort; its outputs are
+# written to COHORTS_DIR/<name>/.
+COHORTS_DIR = os.path.join(P.BASE_DIR, "Cohorts")
+
+
+# === COHORTS ===
+def parse_cohort_arg(arg):
+    """Turn a "name=path" argument (or a bare path, named after its file) into (name, path)."""
+    if "=" in arg:
+        name, path = arg.split("=", 1)
+        return name.strip(), path
+    return os.path.splitext(os.path.basename(arg))[0], arg
+
+
+def load_cohorts(args):
+    """Load the OrphaCode lists of the cohorts named on the command line (or found in COHORTS_DIR)."""
+    if not args:
+        args = sorted(glob.glob(os.path.join(COHORTS_DIR, "*.txt")))
+
+    cohorts = {}
+    for arg in args:
+        name, path = parse_cohort_arg(arg)
+        if name in cohorts:
+            raise ValueError(f"Duplicate cohort name: {name}")
+        with open_input(path, "rt") as f:
+            cohorts[name] = {line.strip() for line in f if line.strip().isdigit()}
+    return cohorts
+
+
+# === PER-COHORT OUTPUTS ===
+def write_cohort(codes, out_dir, genes, disorders, inheritance, keep, prevalences):
+    """Route the rows of one union-wide scan to a cohort and write its outputs.
+
+    The files match what gene_association, natural_history and epidemiology
+    write when run with this cohort's list as their filter.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    members = OrphaCodeSet(codes)
+
+    matched = gene_association.select_matched(genes, members)
+    gene_rows = gene_association.save_outputs([matched], codes, out_dir)
+
+    cohort_disorders = disorders[members.mask(disorders["OrphaCode"])]
+    kept = cohort_disorders["OrphaCode"].map(keep).fillna(False).astype(bool)
+    natural_history.save_outputs(
+        inheritance[members.mask(inheritance["OrphaCode"])],
+        cohort_disorders[kept], cohort_disorders[~kept], out_dir,
+    )
+
+    cohort_prevalences = prevalences[members.mask(prevalences["OrphaCode"])]
+    epidemiology.save_outputs(cohort_prevalences, out_dir)
+
+    return gene_rows + len(cohort_disorders) + len(cohort_prevalences)
+
+
+# === MAIN ===
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the gene association, natural history and epidemiology filters "
+                    "for many cohorts with a single pass over each release.")
+    parser.add_argument("cohorts", nargs="*",
+                        help=f"cohort lists as name=path or path (default: every .txt in {COHORTS_DIR})")
+    parser.add_argument("--output-dir", default=COHORTS_DIR)
+    args = parser.parse_args()
+
+    metrics = StageMetrics("multi_cohort")
+
+    metrics.start("load filter")
+    cohorts = load_cohorts(args.cohorts)
+    if not cohorts:
+        parser.error(f"no cohort lists given and none found in {COHORTS_DIR}")
+    union = OrphaCodeSet(set().union(*cohorts.values()))
+    metrics.stop(rows_out=len(union))
+    print(f"🧩 {len(cohorts)} cohorts, {len(union)} distinct OrphaCodes")
+
+    # One pass per release, restricted to the union of every cohort list
+    metrics.start("parse XML")
+    genes = extract_gene_associations(P.GENE_ASSOC_XML, orphacodes=union)
+    total_nh, disorders, inheritance = natural_history.extract_disorders(P.NATURAL_HISTORY_XML, union)
+    total_epi, prevalences = epidemiology.extract_prevalences(P.EPIDEMIOLOGY_XML, union)
+    metrics.stop(rows_in=total_nh + total_epi, rows_out=len(genes) + len(disorders) + len(prevalences))
+
+    # The inheritance rule is per disorder, so it is applied once for all cohorts
+    metrics.start("filter")
+    keep = natural_history.classify_inheritance(inheritance)
+    metrics.stop(rows_in=len(inheritance), rows_out=int(keep.sum()))
+
+    metrics.start("write outputs")
+    rows_written = 0
+    for name, codes in cohorts.items():
+        print(f"\n=== {name} ({len(codes)} OrphaCodes) ===")
+        out_dir = os.path.join(args.output_dir, name)
+        rows_written += write_cohort(codes, out_dir, genes, disorders, inheritance, keep, prevalences)
+        print(f"💾 Saved cohort outputs: {out_dir}")
+    metrics.stop(rows_out=rows_written)
+
+    print(f"\n✅ Wrote {len(cohorts)} cohorts to: {args.output_dir}")
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,22 @@
 #!/usr/bin/env python3
 import os
-import csv
-import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+import pipeline_io
+import pipeline_paths
+from orphanet_xml import map_disorders, node_query, text_query
+from stage_metrics import StageMetrics
 
 # === FILE PATHS ===
-BASE_DIR = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders"
+INPUT_XML = pipeline_paths.NATURAL_HISTORY_XML
 
-INPUT_XML = os.path.join(BASE_DIR, "Raw Datasets/natural_history_ds.xml")
+FILTER_FILE = os.path.join(pipeline_paths.CLINGEN_DIR, "definitive_orphacodes.txt")
 
-FILTER_FILE = os.path.join(BASE_DIR, "Gene Association/Monogenic Association/Disorder Classification/ClinGen/definitive_orphacodes.txt")
+OUTPUT_DIR = pipeline_paths.NATURAL_HISTORY_DIR
 
-OUTPUT_DIR = os.path.join(BASE_DIR, "Gene Association/Monogenic Association/Disorder Classification/ClinGen/Natural History")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+# Flat OrphaCode × inheritance table of the matched disorders
+INHERITANCE_TABLE = os.path.join(OUTPUT_DIR, "inheritance_table.csv")
 
 # === FILTER CRITERIA (IDs) ===
 INCLUDE_IDS = {
@@ -32,11 +37,28 @@ EXCLUDE_IDS = {
     "23501",  # Not yet documented
 }
 
+# === QUERIES ===
+ORPHA_CODE = text_query("OrphaCode")
+NAME_EN = text_query("Name[@lang='en']")
+GROUP_NAME_EN = text_query("DisorderGroup/Name[@lang='en']")
+TYPE_NAME_EN = text_query("DisorderType/Name[@lang='en']")
+ONSETS = node_query(".//AverageAgeOfOnset")
+INHERITANCES = node_query(".//TypeOfInheritance")
+
+
+# === TABLE LAYOUT ===
+DISORDER_COLUMNS = [
+    "OrphaCode", "Name", "DisorderGroup", "DisorderType", "AverageAgeOfOnset",
+    "InheritanceCount", "InheritanceTypes", "InheritanceIDs",
+]
+INHERITANCE_COLUMNS = ["OrphaCode", "InheritanceID", "InheritanceName"]
+
+
 # === FUNCTIONS ===
 def load_filter_codes(filepath):
     """Load OrphaCodes from txt filter file."""
     codes = set()
-    with open(filepath, "r") as f:
+    with pipeline_io.open_input(filepath, "rt") as f:
         for line in f:
             line = line.strip()
             if line.isdigit():
@@ -46,77 +68,82 @@ def load_filter_codes(filepath):
 
 def parse_inheritance(disorder):
     """Return list of inheritance IDs and names from a disorder node."""
-    inheritance_nodes = disorder.findall(".//TypeOfInheritance")
-    inheritance_ids = [n.attrib.get("id") for n in inheritance_nodes]
-    inheritance_names = [n.findtext("Name[@lang='en']") for n in inheritance_nodes]
+    inheritance_nodes = INHERITANCES(disorder)
+    inheritance_ids = [n.get("id") for n in inheritance_nodes]
+    inheritance_names = [NAME_EN(n) for n in inheritance_nodes]
     return inheritance_ids, inheritance_names
 
 
-def should_include(inheritance_ids):
-    """Inclusion rule: keep if has at least one include ID and not all excluded."""
-    has_include = any(i in INCLUDE_IDS for i in inheritance_ids)
-    all_excluded = all(i in EXCLUDE_IDS for i in inheritance_ids) if inheritance_ids else True
-    return has_include and not all_excluded
+def parse_disorder(disorder):
+    """Return the disorder row of a <Disorder> node with its inheritance IDs and names."""
+    onset_list = [NAME_EN(n) for n in ONSETS(disorder)]
+    inh_ids, inh_names = parse_inheritance(disorder)
+
+    record = [
+        ORPHA_CODE(disorder), NAME_EN(disorder), GROUP_NAME_EN(disorder), TYPE_NAME_EN(disorder),
+        ";".join(onset_list) if onset_list else "No data",
+        len(inh_ids),
+        ";".join(inh_names) if inh_names else "No data",
+        ";".join(inh_ids) if inh_ids else "No data",
+    ]
+    return record, inh_ids, inh_names
 
 
-def parse_dataset(xml_file, filter_codes):
-    """Parse XML and return included and excluded disorder dicts."""
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
+def build_tables(parsed):
+    """Assemble the disorder and flat inheritance frames from parse_disorder results.
 
-    all_disorders = root.findall(".//Disorder")
-    total_disorders = len(all_disorders)
+    A disorder without any inheritance keeps one row with an empty
+    InheritanceID, so the flat table covers every disorder.
+    """
+    rows = {col: [] for col in DISORDER_COLUMNS}
+    columns = list(rows.values())
+    inheritance = {col: [] for col in INHERITANCE_COLUMNS}
 
-    included, excluded = [], []
-    matched_codes = set()
+    for record, inh_ids, inh_names in parsed:
+        for column, value in zip(columns, record):
+            column.append(value)
 
-    for disorder in all_disorders:
-        orphacode = disorder.findtext("OrphaCode")
-        if not orphacode:
-            continue
+        orphacode = record[0]
+        inheritance["OrphaCode"].extend([orphacode] * max(len(inh_ids), 1))
+        inheritance["InheritanceID"].extend(inh_ids or [""])
+        inheritance["InheritanceName"].extend(inh_names or [""])
 
-        if orphacode in filter_codes:
-            matched_codes.add(orphacode)
+    disorders = pd.DataFrame(rows, columns=DISORDER_COLUMNS)
+    return disorders, pd.DataFrame(inheritance, columns=INHERITANCE_COLUMNS)
 
-            name = disorder.findtext("Name[@lang='en']")
-            dgroup = disorder.findtext("DisorderGroup/Name[@lang='en']")
-            dtype = disorder.findtext("DisorderType/Name[@lang='en']")
 
-            onset_list = [n.findtext("Name[@lang='en']") for n in disorder.findall(".//AverageAgeOfOnset")]
-            onset = ";".join(onset_list) if onset_list else "No data"
+def extract_disorders(xml_file, filter_codes):
+    """Stream the XML and collect the disorders whose OrphaCode is in filter_codes.
 
-            inh_ids, inh_names = parse_inheritance(disorder)
-            inh_count = len(inh_ids)
-            inh_names_str = ";".join(inh_names) if inh_names else "No data"
-            inh_ids_str = ";".join(inh_ids) if inh_ids else "No data"
+    Returns the number of disorders scanned, one row per matched disorder,
+    and a flat OrphaCode × inheritance table (InheritanceID,
+    InheritanceName); see build_tables. Large releases are parsed in
+    parallel shards (see orphanet_xml.map_disorders).
+    """
+    total_disorders, parsed = map_disorders(xml_file, parse_disorder, filter_codes)
+    return (total_disorders,) + build_tables(parsed)
 
-            row = {
-                "OrphaCode": orphacode,
-                "Name": name,
-                "DisorderGroup": dgroup,
-                "DisorderType": dtype,
-                "AverageAgeOfOnset": onset,
-                "InheritanceCount": inh_count,
-                "InheritanceTypes": inh_names_str,
-                "InheritanceIDs": inh_ids_str,
-            }
 
-            if should_include(inh_ids):
-                included.append(row)
-            else:
-                excluded.append(row)
+def classify_inheritance(inheritance, include_ids=INCLUDE_IDS, exclude_ids=EXCLUDE_IDS):
+    """Apply the inclusion rule to every OrphaCode of a flat inheritance table.
 
-    return total_disorders, included, excluded, matched_codes
+    A disorder is kept if it has at least one include ID and not only
+    excluded IDs. Returns a boolean Series indexed by OrphaCode; pass other
+    include/exclude sets to re-run the rule for sensitivity analyses.
+    """
+    flags = pd.DataFrame({
+        "OrphaCode": inheritance["OrphaCode"],
+        "has_include": inheritance["InheritanceID"].isin(include_ids),
+        "all_excluded": inheritance["InheritanceID"].isin(exclude_ids),
+    }).groupby("OrphaCode", sort=False).agg({"has_include": "any", "all_excluded": "all"})
+    return flags["has_include"] & ~flags["all_excluded"]
 
 
 def save_csv(rows, filepath):
-    """Save disorder rows to CSV."""
-    if not rows:
+    """Save disorder rows to CSV (nothing is written when there are none)."""
+    if rows.empty:
         return
-    with open(filepath, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-        writer.writeheader()
-        writer.writerows(rows)
+    pipeline_io.save_csv(rows, filepath)
 
 
 def save_txt(codes, filepath):
@@ -126,12 +153,35 @@ def save_txt(codes, filepath):
             f.write(c + "\n")
 
 
+def save_outputs(inheritance, included, excluded, output_dir):
+    """Write the inheritance table and the included/excluded CSV and TXT lists."""
+    os.makedirs(output_dir, exist_ok=True)
+    pipeline_io.save_csv(inheritance, os.path.join(output_dir, os.path.basename(INHERITANCE_TABLE)))
+    save_csv(included, os.path.join(output_dir, "included_inheritance_disorders.csv"))
+    save_csv(excluded, os.path.join(output_dir, "excluded_inheritance_disorders.csv"))
+
+    save_txt(included["OrphaCode"], os.path.join(output_dir, "included_inheritance_orphacodes.txt"))
+    save_txt(excluded["OrphaCode"], os.path.join(output_dir, "excluded_inheritance_orphacodes.txt"))
+
+
 # === MAIN ===
 def main():
+    metrics = StageMetrics("natural_history")
+
+    metrics.start("load filter")
     filter_codes = load_filter_codes(FILTER_FILE)
     print(f"🧩 Loaded {len(filter_codes)} OrphaCodes from filter file: {FILTER_FILE}")
+    metrics.stop(rows_out=len(filter_codes))
+
+    metrics.start("parse XML")
+    total_disorders, disorders, inheritance = extract_disorders(INPUT_XML, filter_codes)
+    matched_codes = set(disorders["OrphaCode"])
+    metrics.stop(rows_in=total_disorders, rows_out=len(disorders))
 
-    total_disorders, included, excluded, matched_codes = parse_dataset(INPUT_XML, filter_codes)
+    metrics.start("filter")
+    keep = disorders["OrphaCode"].map(classify_inheritance(inheritance)).fillna(False).astype(bool)
+    included, excluded = disorders[keep], disorders[~keep]
+    metrics.stop(rows_in=len(disorders), rows_out=len(included))
 
     print("\n=== SUMMARY ===")
     print(f"Total disorders in natural history dataset: {total_disorders}")
@@ -140,15 +190,12 @@ def main():
     print(f"Included after inheritance filtering: {len(included)}")
     print(f"Excluded after inheritance filtering: {len(excluded)}")
 
-    # Save CSVs
-    save_csv(included, os.path.join(OUTPUT_DIR, "included_inheritance_disorders.csv"))
-    save_csv(excluded, os.path.join(OUTPUT_DIR, "excluded_inheritance_disorders.csv"))
-
-    # Save TXT lists
-    save_txt([r["OrphaCode"] for r in included], os.path.join(OUTPUT_DIR, "included_inheritance_orphacodes.txt"))
-    save_txt([r["OrphaCode"] for r in excluded], os.path.join(OUTPUT_DIR, "excluded_inheritance_orphacodes.txt"))
+    metrics.start("write outputs")
+    save_outputs(inheritance, included, excluded, OUTPUT_DIR)
+    metrics.stop(rows_out=len(included) + len(excluded))
 
     print(f"\n✅ Output files saved to: {OUTPUT_DIR}")
+    metrics.finish()
 
 
 if __name__ == "__main__":
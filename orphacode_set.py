@@ -0,0 +1,205 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from pipeline_io import open_input
+
+# Largest code the bitset will hold plus one (2 MiB of bits). Real
+# OrphaCodes are far below it; anything larger is kept as text instead.
+MAX_BITSET_CODE = 1 << 24
+
+
+def _code_series(codes):
+    return codes if isinstance(codes, pd.Series) else pd.Series(list(codes), dtype=object)
+
+
+def to_code_array(codes):
+    """Convert OrphaCodes (ints, digit strings, a Series or an array) to int64.
+
+    Entries that are not integers in [0, MAX_BITSET_CODE) (blank lines,
+    stray text, huge numbers) become -1, which never matches the bitset.
+    """
+    if isinstance(codes, OrphaCodeSet):
+        return codes.to_array()
+    if isinstance(codes, np.ndarray) and np.issubdtype(codes.dtype, np.integer):
+        values = codes.astype(np.int64, copy=False)
+        return np.where((values >= 0) & (values < MAX_BITSET_CODE), values, -1)
+    codes = _code_series(codes)
+    if pd.api.types.is_integer_dtype(codes):
+        values = codes.to_numpy(dtype=np.int64)
+        return np.where((values >= 0) & (values < MAX_BITSET_CODE), values, -1)
+    values = pd.to_numeric(codes.astype(str).str.strip(), errors="coerce")
+    values = values.where(values.notna() & (values >= 0) & (values < MAX_BITSET_CODE) & (values % 1 == 0), -1)
+    return values.to_numpy(dtype=np.int64)
+
+
+def _text_entries(codes, values):
+    """Stripped text of the entries to_code_array could not place in the bitset.
+
+    Returns their positions and text; blanks and nulls are left out.
+    """
+    rows = np.flatnonzero(values < 0)
+    if not rows.size:
+        return rows, []
+    entries = _code_series(codes).iloc[rows]
+    text = entries.astype(str).str.strip()
+    keep = (entries.notna() & (text != "")).to_numpy()
+    return rows[keep], text[keep].tolist()
+
+
+def _popcount(words):
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(words).sum())
+    return int(np.unpackbits(words).sum())
+
+
+class OrphaCodeSet:
+    """Set of OrphaCodes stored as a packed bitset indexed by the code itself.
+
+    OrphaCodes are small dense integers, so one bit per possible code keeps
+    the whole catalogue in well under a megabyte and turns membership tests,
+    unions and intersections into vectorized NumPy operations.
+
+    Entries that are not integers below MAX_BITSET_CODE (stray text such as
+    "ORPHA:3", negative or huge numbers) are kept in a side set by their
+    stripped text and take part in every operation; see text_codes. Blank
+    entries and nulls are skipped.
+    """
+
+    __slots__ = ("_words", "_text")
+
+    def __init__(self, codes=()):
+        if isinstance(codes, OrphaCodeSet):
+            self._words, self._text = codes._words, codes._text
+            return
+        if not isinstance(codes, (pd.Series, np.ndarray)):
+            codes = list(codes)
+        values = to_code_array(codes)
+        self._text = frozenset(_text_entries(codes, values)[1])
+        values = values[values >= 0]
+        bits = np.zeros(int(values.max()) + 1 if values.size else 0, dtype=bool)
+        bits[values] = True
+        self._words = np.packbits(bits, bitorder="little")
+
+    @classmethod
+    def _from_words(cls, words, text=frozenset()):
+        new = cls.__new__(cls)
+        new._words = words
+        new._text = text
+        return new
+
+    @classmethod
+    def from_file(cls, path):
+        """Load a one-code-per-line TXT list (optionally compressed)."""
+        with open_input(path, "rt") as f:
+            return cls(line.strip() for line in f if line.strip())
+
+    # --- membership ---
+    def mask(self, codes):
+        """Vectorized membership: a boolean array with one entry per code."""
+        if not isinstance(codes, (pd.Series, np.ndarray)):
+            codes = list(codes)
+        values = to_code_array(codes)
+        result = np.zeros(values.shape, dtype=bool)
+        valid = (values >= 0) & (values < self._words.size * 8)
+        hits = values[valid]
+        result[valid] = (self._words[hits >> 3] >> (hits & 7).astype(np.uint8)) & 1
+        if self._text:
+            rows, text = _text_entries(codes, values)
+            result[rows] = [entry in self._text for entry in text]
+        return result
+
+    def __contains__(self, code):
+        if code is None:
+            return False
+        try:
+            value = int(code)
+        except (TypeError, ValueError):
+            value = -1
+        if value < 0 or value >= MAX_BITSET_CODE:
+            return str(code).strip() in self._text
+        if value >= self._words.size * 8:
+            return False
+        return bool((self._words[value >> 3] >> (value & 7)) & 1)
+
+    # --- set algebra ---
+    def _aligned(self, other):
+        size = max(self._words.size, other._words.size)
+        a = np.zeros(size, dtype=np.uint8)
+        b = np.zeros(size, dtype=np.uint8)
+        a[:self._words.size] = self._words
+        b[:other._words.size] = other._words
+        return a, b
+
+    def __and__(self, other):
+        size = min(self._words.size, other._words.size)
+        return self._from_words(self._words[:size] & other._words[:size], self._text & other._text)
+
+    def __or__(self, other):
+        a, b = self._aligned(other)
+        return self._from_words(a | b, self._text | other._text)
+
+    def __sub__(self, other):
+        a, b = self._aligned(other)
+        return self._from_words(a & ~b, self._text - other._text)
+
+    def __xor__(self, other):
+        a, b = self._aligned(other)
+        return self._from_words(a ^ b, self._text ^ other._text)
+
+    def __eq__(self, other):
+        if not isinstance(other, OrphaCodeSet):
+            return NotImplemented
+        a, b = self._aligned(other)
+        return bool(np.array_equal(a, b)) and self._text == other._text
+
+    __hash__ = None
+
+    # --- inspection ---
+    def __len__(self):
+        return _popcount(self._words) + len(self._text)
+
+    def __bool__(self):
+        return bool(self._words.any()) or bool(self._text)
+
+    @property
+    def text_codes(self):
+        """The entries kept as text rather than in the bitset (a frozenset)."""
+        return self._text
+
+    def to_array(self):
+        """Return the bitset codes as a sorted int64 array (text_codes are not included)."""
+        return np.flatnonzero(np.unpackbits(self._words, bitorder="little")).astype(np.int64)
+
+    def __iter__(self):
+        """Iterate as text like the OrphaCode TXT lists: codes ascending, then text_codes sorted."""
+        yield from (str(code) for code in self.to_array())
+        yield from sorted(self._text)
+
+    def __repr__(self):
+        return f"OrphaCodeSet({len(self)} codes)"
+
+
+def membership_counts(sets):
+    """Return every code in any of the sets and how many sets contain it.
+
+    Codes come back as a sorted int64 array, unless some set has text_codes:
+    then it is an object array with the sorted text codes after the numbers.
+    """
+    if not sets:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    size = max(s._words.size for s in sets)
+    counts = np.zeros(size * 8, dtype=np.int64)
+    for s in sets:
+        bits = np.unpackbits(s._words, bitorder="little")
+        counts[:bits.size] += bits
+    codes = np.flatnonzero(counts)
+    counts = counts[codes]
+    text_counts = Counter(code for s in sets for code in s._text)
+    if text_counts:
+        text = sorted(text_counts)
+        codes = np.concatenate([codes.astype(object), np.array(text, dtype=object)])
+        counts = np.concatenate([counts, np.array([text_counts[code] for code in text], dtype=np.int64)])
+    return codes, counts
+
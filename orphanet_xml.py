@@ -0,0 +1,342 @@
+import io
+import mmap
+import os
+import re
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+from pipeline_io import COMPRESSED_SUFFIXES, open_input, resolve_input
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # lxml is optional; ElementTree gives the same results, only slower
+    lxml_etree = None
+
+# === BACKEND ===
+# lxml is used when it is installed. Set ORPHANET_XML_BACKEND=etree to force
+# the standard-library parser (e.g. to compare outputs or timings).
+USE_LXML = lxml_etree is not None and os.environ.get("ORPHANET_XML_BACKEND", "lxml") != "etree"
+etree = lxml_etree if USE_LXML else ET
+
+_ATTRIBUTE_STEP = re.compile(r"^(?:(.*)/)?@([\w-]+)$")
+
+# === SHARDING ===
+# map_disorders splits an uncompressed release at <Disorder> tags and parses
+# the pieces in a process pool. ORPHANET_XML_WORKERS overrides the number of
+# worker processes (1 disables sharding).
+XML_WORKERS = int(os.environ.get("ORPHANET_XML_WORKERS", "0")) or os.cpu_count() or 1
+SHARDS_PER_WORKER = 4          # smaller shards balance the load and bound worker memory
+SHARD_MIN_BYTES = 16 << 20     # below this, starting the pool costs more than it saves
+
+_DISORDER_START = re.compile(rb"<Disorder[\s>]")
+_XML_DECLARATION = re.compile(rb"<\?xml[^>]*\?>")
+
+# === PREFILTER ===
+# When map_disorders is given a target set, each <Disorder> is first read as
+# raw bytes and only the ones whose OrphaCode is wanted are parsed into a
+# tree. Set ORPHANET_XML_PREFILTER=0 to build every disorder instead.
+PREFILTER = os.environ.get("ORPHANET_XML_PREFILTER", "1") != "0"
+PREFILTER_CHUNK_BYTES = 1 << 20
+
+_DISORDER_END = b"</Disorder>"
+_LEADING_ORPHA_CODE = re.compile(rb"<Disorder[^>]*>\s*<OrphaCode>\s*(\d+)\s*</OrphaCode>")
+
+
+def text_query(path):
+    """Compile a path to a function returning the text of its first match.
+
+    Paths use the ElementPath subset shared with XPath (child steps, ".//"
+    and [@attr='value'] predicates); a final "/@name" step selects an
+    attribute. A missing node gives "". With lxml the path is compiled once
+    to an XPath expression, otherwise it falls back to findtext/find.
+    """
+    if USE_LXML:
+        return lxml_etree.XPath(f"string({path})", smart_strings=False)
+
+    attribute = _ATTRIBUTE_STEP.match(path)
+    if attribute is None:
+        return lambda elem: elem.findtext(path, "")
+
+    node_path, name = attribute.groups()
+
+    def get_attribute(elem):
+        node = elem.find(node_path) if node_path else elem
+        return node.get(name, "") if node is not None else ""
+
+    return get_attribute
+
+
+def node_query(path):
+    """Compile a path to a function returning all matching elements in document order."""
+    if USE_LXML:
+        return lxml_etree.XPath(path)
+    return lambda elem: elem.findall(path)
+
+
+def parse_tree(xml_path):
+    """Parse a whole Orphanet XML file (optionally compressed) and return its root element."""
+    with open_input(xml_path) as f:
+        return etree.parse(f).getroot()
+
+
+def iter_disorders(xml_path):
+    """Stream the <Disorder> entries of an Orphanet DisorderList one at a time.
+
+    Each disorder is yielded once its closing tag has been parsed and is
+    removed from the tree as soon as the caller moves on, so memory stays
+    flat regardless of the size of the release. Compressed releases are
+    decompressed on the fly (see pipeline_io.open_input).
+    """
+    with open_input(xml_path) as f:
+        if USE_LXML:
+            yield from _iter_disorders_lxml(f)
+        else:
+            yield from _iter_disorders_etree(f)
+
+
+def iter_elements(xml_path, tag):
+    """Stream every element with the given tag, at any depth, in document order.
+
+    Each element is complete when yielded and is cleared once the caller
+    moves on; everything before it (earlier siblings of it and of its
+    ancestors) is then dropped, so memory stays flat as the file is read.
+    An element nested in another with the same tag is only cleared, and the
+    pruning waits for the outer one. Meant for the classification files,
+    where <Disorder> entries sit at every level of the ClassificationNode
+    hierarchy.
+    """
+    with open_input(xml_path) as f:
+        if USE_LXML:
+            yield from _iter_elements_lxml(f, tag)
+        else:
+            yield from _iter_elements_etree(f, tag)
+
+
+def _iter_elements_lxml(source, tag):
+    for _, elem in lxml_etree.iterparse(source, events=("end",), tag=tag):
+        yield elem
+        elem.clear()
+        if next(elem.iterancestors(tag), None) is not None:
+            continue
+        node = elem
+        while node.getparent() is not None:
+            parent = node.getparent()
+            while node.getprevious() is not None:
+                del parent[0]
+            node = parent
+
+
+def _iter_elements_etree(source, tag):
+    # ElementTree has no parent links, so the open ancestors are tracked
+    # here; the element being read is always the last child of its parent.
+    ancestors = []
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            ancestors.append(elem)
+            continue
+        ancestors.pop()
+        if elem.tag != tag:
+            continue
+        yield elem
+        elem.clear()
+        if any(ancestor.tag == tag for ancestor in ancestors):
+            continue
+        for ancestor in ancestors:
+            del ancestor[:-1]
+
+
+def _iter_disorders_etree(source):
+    disorder_list = None
+    depth = 0
+    list_depth = None
+
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if elem.tag == "DisorderList" and disorder_list is None:
+                disorder_list = elem
+                list_depth = depth
+            continue
+
+        depth -= 1
+        if elem is disorder_list:
+            list_depth = None  # only the first DisorderList is streamed, as with lxml
+        elif elem.tag == "Disorder" and disorder_list is not None and depth == list_depth:
+            yield elem
+            elem.clear()
+            disorder_list.remove(elem)
+
+
+def _iter_disorders_lxml(source):
+    # lxml filters on the tag in C and knows each element's parent, so only
+    # the closing <Disorder> tags reach Python.
+    disorder_list = None
+    for _, elem in lxml_etree.iterparse(source, events=("end",), tag="Disorder"):
+        if disorder_list is None:
+            disorder_list = next(elem.getroottree().getroot().iter("DisorderList"), None)
+        if disorder_list is not None and elem.getparent() is disorder_list:
+            yield elem
+            elem.clear()
+            disorder_list.remove(elem)
+
+
+# === SHARDED PARSING ===
+_ORPHA_CODE = text_query("OrphaCode")
+
+
+def shard_ranges(xml_path, shards):
+    """Split the DisorderList of an uncompressed release into byte ranges.
+
+    Every range but the first starts at a <Disorder> tag. Returns the XML
+    declaration (so shards keep the file's encoding) and the ranges; no
+    ranges are returned when the file has no DisorderList. Assumes, like
+    the Orphanet product files, that <Disorder> elements are not nested.
+    """
+    with open(xml_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        declaration = _XML_DECLARATION.match(data)
+        prolog = declaration.group(0) if declaration else b""
+
+        list_start = data.find(b"<DisorderList")
+        body_end = data.rfind(b"</DisorderList>")
+        if list_start < 0 or body_end < 0:
+            return prolog, []
+        body_start = data.find(b">", list_start) + 1
+
+        step = max((body_end - body_start) // shards, 1)
+        bounds = [body_start]
+        for i in range(1, shards):
+            match = _DISORDER_START.search(data, body_start + i * step, body_end)
+            if match is None:
+                break
+            if match.start() > bounds[-1]:
+                bounds.append(match.start())
+        bounds.append(body_end)
+    return prolog, list(zip(bounds[:-1], bounds[1:]))
+
+
+def _parse_disorders(disorders, parse, orphacodes):
+    total, results = 0, []
+    for disorder in disorders:
+        total += 1
+        if orphacodes is not None and _ORPHA_CODE(disorder).strip() not in orphacodes:
+            continue
+        results.append(parse(disorder))
+    return total, results
+
+
+def _raw_disorders(stream, data=b"", in_list=False):
+    """Yield the bytes of each <Disorder>...</Disorder> of a DisorderList.
+
+    Scanning starts after the <DisorderList> tag (at once for a shard body,
+    with in_list) and stops at </DisorderList>; data holds bytes already
+    read from stream. Assumes, like shard_ranges, that <Disorder> elements
+    are not nested.
+    """
+    pos = 0
+    while True:
+        if in_list:
+            start = _DISORDER_START.search(data, pos)
+            list_end = data.find(b"</DisorderList>", pos, start.start() if start else len(data))
+            if list_end >= 0:
+                return
+            if start is not None:
+                end = data.find(_DISORDER_END, start.end())
+                if end >= 0:
+                    pos = end + len(_DISORDER_END)
+                    yield data[start.start():pos]
+                    continue
+        else:
+            start = data.find(b"<DisorderList", pos)
+            end = data.find(b">", start) if start >= 0 else -1
+            if end >= 0:
+                in_list, pos = True, end + 1
+                continue
+
+        chunk = stream.read(PREFILTER_CHUNK_BYTES)
+        if not chunk:
+            return
+        data, pos = data[pos:] + chunk, 0
+
+
+def _read_prolog(stream):
+    """Read at least through the XML declaration; return it and all bytes read."""
+    data = b""
+    while True:
+        chunk = stream.read(PREFILTER_CHUNK_BYTES)
+        data += chunk
+        declaration = _XML_DECLARATION.match(data)
+        if declaration is not None:
+            return declaration.group(0), data
+        if not chunk or b"?>" in data or not b"<?xml".startswith(data[:5]):
+            return b"", data
+
+
+def _parse_fragments(fragments, prolog, parse, orphacodes):
+    # Fragments that do not open with their own OrphaCode are parsed and
+    # checked like any other disorder rather than skipped.
+    total, results = 0, []
+    for fragment in fragments:
+        total += 1
+        code = _LEADING_ORPHA_CODE.match(fragment)
+        if code is not None and code.group(1).decode("ascii") not in orphacodes:
+            continue
+        disorder = etree.fromstring(prolog + fragment)
+        if _ORPHA_CODE(disorder).strip() in orphacodes:
+            results.append(parse(disorder))
+    return total, results
+
+
+def _parse_shard(xml_path, start, end, prolog, parse, orphacodes, prefilter):
+    with open(xml_path, "rb") as f:
+        f.seek(start)
+        body = f.read(end - start)
+    if prefilter:
+        return _parse_fragments(_raw_disorders(io.BytesIO(), body, in_list=True), prolog, parse, orphacodes)
+    source = io.BytesIO(prolog + b"<DisorderList>" + body + b"</DisorderList>")
+    disorders = _iter_disorders_lxml(source) if USE_LXML else _iter_disorders_etree(source)
+    return _parse_disorders(disorders, parse, orphacodes)
+
+
+def map_disorders(xml_path, parse, orphacodes=None, workers=None, prefilter=None):
+    """Apply parse to the <Disorder> entries of a release, in document order.
+
+    Only disorders whose OrphaCode is in orphacodes are parsed (all of them
+    when it is None). Returns the number of disorders scanned and the list
+    of parse results. Uncompressed releases of at least SHARD_MIN_BYTES are
+    split into shards that worker processes parse in parallel, so parse
+    must be a module-level function; otherwise, or if a shard turns out not
+    to be well-formed, the release is streamed with iter_disorders.
+
+    With orphacodes and prefilter (default: PREFILTER), disorders are
+    matched on the raw bytes of their OrphaCode and only the wanted ones
+    are parsed into trees.
+    """
+    workers = workers or XML_WORKERS
+    if prefilter is None:
+        prefilter = PREFILTER
+    prefilter = prefilter and orphacodes is not None
+    path = resolve_input(xml_path)
+    compressed = os.path.splitext(path)[1] in COMPRESSED_SUFFIXES
+
+    if workers > 1 and not compressed and os.path.getsize(path) >= SHARD_MIN_BYTES:
+        prolog, ranges = shard_ranges(path, workers * SHARDS_PER_WORKER)
+        if len(ranges) > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    shards = [pool.submit(_parse_shard, path, start, end, prolog, parse, orphacodes, prefilter)
+                              for start, end in ranges]
+                    total, results = 0, []
+                    for shard in shards:
+                        count, parsed = shard.result()
+                        total += count
+                        results.extend(parsed)
+                return total, results
+            except SyntaxError as exc:  # ET.ParseError and lxml's XMLSyntaxError
+                print(f"⚠️ Could not parse {path} in shards ({exc}); parsing it sequentially")
+
+    if prefilter:
+        with open_input(path) as f:
+            prolog, data = _read_prolog(f)
+            return _parse_fragments(_raw_disorders(f, data), prolog, parse, orphacodes)
+
+    return _parse_disorders(iter_disorders(path), parse, orphacodes)
@@ -0,0 +1,413 @@
+import bz2
+import csv
+import gzip
+import hashlib
+import io
+import lzma
+import os
+import queue
+import threading
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAVE_PYARROW = True
+except ImportError:
+    pa = pq = None
+    HAVE_PYARROW = False
+
+try:
+    import zstandard
+except ImportError:  # only needed for .zst inputs
+    zstandard = None
+
+HASH_CHUNK_SIZE = 1 << 20
+CSV_CHUNK_ROWS = 200_000
+WRITE_BATCH_ROWS = 50_000
+WRITE_BUFFER_BYTES = 1 << 20
+DECOMPRESS_CHUNK_BYTES = 1 << 20
+DECOMPRESS_QUEUE_CHUNKS = 8  # decompressed chunks buffered ahead of the reader
+
+# Write a Parquet copy next to every intermediate CSV when pyarrow is
+# installed. Readers prefer it over the CSV as long as it is not older.
+WRITE_COLUMNAR = HAVE_PYARROW
+
+# Low-cardinality text columns stored as dictionary-encoded categoricals
+CATEGORICAL_COLUMNS = {
+    "GeneSymbol", "GeneType", "DisorderGroup", "DisorderType",
+    "DisorderGeneAssociationType", "DisorderGeneAssociationStatus",
+}
+
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file's contents, or None if it is missing."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def _open_zstd(path):
+    if zstandard is None:
+        raise ImportError(f"Reading {path} needs the zstandard package")
+    return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+
+
+# Compressed inputs are read as streams; a raw dataset may be archived under
+# its usual name plus one of these suffixes.
+COMPRESSED_SUFFIXES = {".gz": gzip.open, ".xz": lzma.open, ".bz2": bz2.open, ".zst": _open_zstd}
+
+
+def resolve_input(path):
+    """Return path, or its compressed sibling (path + .gz/.xz/.bz2/.zst) when only that exists."""
+    if os.path.exists(path):
+        return path
+    for suffix in COMPRESSED_SUFFIXES:
+        if os.path.exists(path + suffix):
+            return path + suffix
+    return path
+
+
+class _ThreadedReader(io.RawIOBase):
+    """Read a decompressing stream on a background thread.
+
+    zlib, lzma, bz2 and zstd release the GIL while decompressing, so the
+    next chunks are inflated while the caller parses the current one. At
+    most DECOMPRESS_QUEUE_CHUNKS chunks are held in memory.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._queue = queue.Queue(maxsize=DECOMPRESS_QUEUE_CHUNKS)
+        self._stop = threading.Event()
+        self._chunk = memoryview(b"")
+        self._eof = False
+        self._error = None  # a decompression error, raised again on every later read
+        self._thread = threading.Thread(target=self._pump, daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _pump(self):
+        try:
+            while not self._stop.is_set():
+                chunk = self._stream.read(DECOMPRESS_CHUNK_BYTES)
+                self._put(chunk)
+                if not chunk:
+                    return
+        except Exception as exc:  # handed to the reading thread
+            self._put(exc)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._chunk:
+            if self._error is not None:
+                raise self._error
+            if self._eof:
+                return 0
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                self._error = item
+                raise item
+            if not item:
+                self._eof = True
+                return 0
+            self._chunk = memoryview(item)
+        n = min(len(buffer), len(self._chunk))
+        buffer[:n] = self._chunk[:n]
+        self._chunk = self._chunk[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+            self._stream.close()
+        super().close()
+
+
+def open_input(path, mode="rb", encoding="utf-8", threaded=True):
+    """Open a raw input for streaming reads, decompressing .gz/.xz/.bz2/.zst on the fly.
+
+    A missing path falls back to its compressed sibling (see resolve_input).
+    Compressed files are decompressed on a background thread unless
+    threaded is False. Use mode "rt" for text.
+    """
+    path = resolve_input(path)
+    opener = COMPRESSED_SUFFIXES.get(os.path.splitext(path)[1])
+    if opener is None:
+        stream = open(path, "rb")
+    else:
+        stream = opener(path)
+        if threaded:
+            stream = io.BufferedReader(_ThreadedReader(stream), buffer_size=DECOMPRESS_CHUNK_BYTES)
+    if "t" in mode:
+        return io.TextIOWrapper(stream, encoding=encoding)
+    return stream
+
+
+def columnar_path(csv_path):
+    """Return the path of the Parquet file written alongside a CSV."""
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def columnar_frame(df):
+    """Return a copy of df typed for Parquet.
+
+    OrphaCode is stored as an integer when every code is numeric, gene
+    symbols and other repeated labels as categoricals, and empty strings as
+    nulls (the same thing an empty CSV field means).
+    """
+    out = df.copy()
+    for col in out.columns:
+        if out[col].dtype == bool or pd.api.types.is_numeric_dtype(out[col]):
+            continue
+        out[col] = out[col].replace("", None)
+        if col == "OrphaCode":
+            codes = pd.to_numeric(out[col], errors="coerce")
+            if codes.notna().all():
+                out[col] = codes.astype("int32")
+        elif col in CATEGORICAL_COLUMNS:
+            out[col] = out[col].astype("category")
+    return out
+
+
+def write_columnar(df, csv_path):
+    """Write a typed Parquet copy of df next to csv_path (see columnar_frame)."""
+    columnar_frame(df).to_parquet(columnar_path(csv_path), index=False)
+
+
+def _batch_schema(schema):
+    """Widen the schema of a first batch so later batches can be cast to it.
+
+    Dictionary indices are made int32 (a later batch may have more distinct
+    labels) and all-null columns become strings.
+    """
+    fields = []
+    for field in schema:
+        if pa.types.is_dictionary(field.type):
+            field = field.with_type(pa.dictionary(pa.int32(), field.type.value_type))
+        elif pa.types.is_null(field.type):
+            field = field.with_type(pa.string())
+        fields.append(field)
+    return pa.schema(fields, metadata=schema.metadata)
+
+
+def save_csv(df, filepath, columns=None, header=True, columnar=None):
+    """Save a frame the same way csv.writer does (CRLF, minimal quoting).
+
+    With columnar (default: WRITE_COLUMNAR) a Parquet copy is written too,
+    using the same column selection and header names.
+    """
+    df.to_csv(filepath, columns=columns, header=header, index=False, lineterminator="\r\n")
+
+    if columnar is None:
+        columnar = WRITE_COLUMNAR
+    if columnar:
+        out = df[columns] if columns is not None else df
+        if not isinstance(header, bool):
+            out = out.set_axis(list(header), axis=1)
+        write_columnar(out, filepath)
+
+
+def _columnar_is_current(csv_path):
+    parquet_path = columnar_path(csv_path)
+    return (
+        HAVE_PYARROW
+        and os.path.exists(parquet_path)
+        and (not os.path.exists(csv_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path))
+    )
+
+
+def _from_columnar(df, keep_default_na):
+    """Give a frame read from Parquet the types read_csv would have produced."""
+    if "OrphaCode" in df.columns and pd.api.types.is_integer_dtype(df["OrphaCode"]):
+        df["OrphaCode"] = df["OrphaCode"].astype(str)
+    if not keep_default_na:
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                if df[col].isna().any():
+                    if "" not in df[col].cat.categories:
+                        df[col] = df[col].cat.add_categories([""])
+                    df[col] = df[col].fillna("")
+            elif df[col].dtype == object or pd.api.types.is_string_dtype(df[col]):
+                df[col] = df[col].fillna("")
+    return df
+
+
+def read_table(csv_path, columns=None, dtype=None, keep_default_na=True):
+    """Read an intermediate table, preferring its Parquet copy when current.
+
+    Only the requested columns are loaded. OrphaCode always comes back as
+    text and nulls follow keep_default_na, so callers see the same frame
+    whichever file was used.
+    """
+    if _columnar_is_current(csv_path):
+        df = pd.read_parquet(columnar_path(csv_path), columns=columns, memory_map=True)
+        return _from_columnar(df, keep_default_na)
+
+    return pd.read_csv(csv_path, usecols=columns, dtype=dtype, keep_default_na=keep_default_na)
+
+
+def iter_table(csv_path, columns=None, dtype=None, keep_default_na=True, chunksize=CSV_CHUNK_ROWS):
+    """Yield an intermediate table in frames of at most chunksize rows.
+
+    Same file choice and typing as read_table, but only one chunk is held
+    at a time. Parquet copies are read batch by batch from a memory map.
+    """
+    if _columnar_is_current(csv_path):
+        parquet = pq.ParquetFile(columnar_path(csv_path), memory_map=True)
+        for batch in parquet.iter_batches(batch_size=chunksize, columns=columns):
+            yield _from_columnar(batch.to_pandas(), keep_default_na)
+        return
+
+    yield from pd.read_csv(csv_path, usecols=columns, dtype=dtype, keep_default_na=keep_default_na,
+                           chunksize=chunksize)
+
+
+def read_csv_filtered(path, column, values, columns=None, sep=",", chunksize=CSV_CHUNK_ROWS, categorical=()):
+    """Stream a delimited file in chunks, keeping only rows whose column is in values.
+
+    Header names are matched after stripping whitespace, and only the listed
+    columns (plus the filter column) are parsed, so peak memory follows the
+    matching rows rather than the whole file. The filter column is parsed
+    as a categorical and the columns in categorical are returned as
+    categoricals. Compressed files are read through open_input. Returns the
+    filtered frame and the number of rows scanned.
+    """
+    with open_input(path) as f:
+        header = pd.read_csv(f, sep=sep, nrows=0).columns
+    raw_names = {name.strip(): name for name in header}
+    wanted = list(raw_names) if columns is None else [c for c in raw_names if c in set(columns) | {column}]
+    usecols = [raw_names[c] for c in wanted]
+    dtype = {name: str for name in usecols}
+    dtype[raw_names[column]] = "category"
+
+    values = list(values)
+    parts, scanned = [], 0
+    with open_input(path) as f:
+        for chunk in pd.read_csv(f, sep=sep, usecols=usecols, dtype=dtype, chunksize=chunksize):
+            chunk.columns = chunk.columns.str.strip()
+            scanned += len(chunk)
+            parts.append(chunk[chunk[column].isin(values)])
+
+    if not parts:
+        return pd.DataFrame(columns=wanted, dtype=str), scanned
+
+    filtered = pd.concat(parts, ignore_index=True)
+    filtered[column] = filtered[column].astype(str).where(filtered[column].notna())
+    for col in categorical:
+        if col in filtered.columns:
+            filtered[col] = filtered[col].astype("category")
+    return filtered[wanted], scanned
+
+
+class PartitionedCSVWriter:
+    """Route rows into one CSV per partition while they are being produced.
+
+    Each partition keeps one open, buffered handle; rows are queued and
+    written with writerows once batch_rows are pending, in the same format
+    as save_csv (CRLF, minimal quoting). With columnar (default:
+    WRITE_COLUMNAR) every flushed batch is also appended to the partition's
+    Parquet copy, typed as in write_columnar. OrphaCode lists are collected
+    alongside as sets and written sorted, one code per line, on close;
+    codes then holds them as sorted lists.
+    """
+
+    def __init__(self, paths, columns, header=None, code_lists=None, batch_rows=WRITE_BATCH_ROWS, columnar=None):
+        self.columns = list(columns)
+        self.header = list(header or self.columns)
+        self.batch_rows = batch_rows
+        self.columnar = WRITE_COLUMNAR if columnar is None else columnar
+        self.rows = {partition: 0 for partition in paths}
+        self._paths = dict(paths)
+        self._pending = {partition: [] for partition in paths}
+        self._code_paths = dict(code_lists or {})
+        self.codes = {name: set() for name in self._code_paths}
+        self._handles = {}
+        self._writers = {}
+        self._parquet = {}       # partition -> ParquetWriter, opened on the first batch
+        self._no_parquet = set()  # partitions whose batches did not fit one schema
+        for partition, path in paths.items():
+            if not self.columnar and os.path.exists(columnar_path(path)):
+                os.remove(columnar_path(path))  # a stale copy would no longer match the CSV
+            handle = open(path, "w", newline="", encoding="utf-8", buffering=WRITE_BUFFER_BYTES)
+            self._handles[partition] = handle
+            self._writers[partition] = csv.writer(handle, lineterminator="\r\n")
+            self._writers[partition].writerow(self.header)
+
+    def write(self, partition, rows):
+        """Queue the rows of a frame for a partition, flushing once a batch is full."""
+        pending = self._pending[partition]
+        pending.extend(rows[self.columns].itertuples(index=False, name=None))
+        self.rows[partition] += len(rows)
+        if len(pending) >= self.batch_rows:
+            self.flush(partition)
+
+    def add_codes(self, name, codes):
+        """Add OrphaCodes to a side list; duplicates are dropped."""
+        self.codes[name].update(codes)
+
+    def _write_columnar(self, partition, rows):
+        if partition in self._no_parquet:
+            return
+        batch = pa.Table.from_pandas(
+            columnar_frame(pd.DataFrame(rows, columns=self.header)), preserve_index=False)
+        writer = self._parquet.get(partition)
+        try:
+            if writer is None:
+                writer = pq.ParquetWriter(columnar_path(self._paths[partition]), _batch_schema(batch.schema))
+                self._parquet[partition] = writer
+            writer.write_table(batch.cast(writer.schema))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            # e.g. a non-numeric OrphaCode after integer ones: keep the CSV only
+            self._no_parquet.add(partition)
+            if writer is not None:
+                writer.close()
+                del self._parquet[partition]
+            if os.path.exists(columnar_path(self._paths[partition])):
+                os.remove(columnar_path(self._paths[partition]))
+
+    def flush(self, partition=None):
+        for name in [partition] if partition is not None else list(self._pending):
+            if self._pending[name]:
+                self._writers[name].writerows(self._pending[name])
+                if self.columnar:
+                    self._write_columnar(name, self._pending[name])
+                self._pending[name].clear()
+
+    def close(self):
+        self.flush()
+        for handle in self._handles.values():
+            handle.close()
+        # Parquet copies are closed after the CSVs so read_table sees them as current
+        for writer in self._parquet.values():
+            writer.close()
+        if self.columnar:
+            for partition, path in self._paths.items():
+                if partition not in self._parquet and partition not in self._no_parquet:
+                    write_columnar(pd.DataFrame(columns=self.header), path)
+        for name, path in self._code_paths.items():
+            self.codes[name] = sorted(self.codes[name])
+            with open(path, "w", encoding="utf-8") as f:
+                f.writelines(f"{code}\n" for code in self.codes[name])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,35 @@
+import os
+
+# === DIRECTORY LAYOUT ===
+# Every stage reads and writes below BASE_DIR; keep this the single place
+# where the folder structure of the project is spelled out. Set
+# NEUROMETABOLIC_BASE_DIR to run the pipeline against another tree (e.g. the
+# synthetic datasets written by synthetic_data.py).
+DEFAULT_BASE_DIR = "/Users/sofiamorenohoffmann/Library/Mobile Documents/com~apple~CloudDocs/Documents/M.Sc. Biomedical Sciences/Literature Review/Databases/Neurometabolic Disorders"
+BASE_DIR = os.environ.get("NEUROMETABOLIC_BASE_DIR", DEFAULT_BASE_DIR)
+
+RAW_DIR = os.path.join(BASE_DIR, "Raw Datasets")
+MGI_DIR = os.path.join(RAW_DIR, "MGI")
+ZFIN_DIR = os.path.join(RAW_DIR, "ZFIN")
+
+MERGE_DIR = os.path.join(BASE_DIR, "Merge Neuro, IME, Genetic")
+GENE_ASSOC_DIR = os.path.join(BASE_DIR, "Gene Association")
+MONOGENIC_DIR = os.path.join(GENE_ASSOC_DIR, "Monogenic Association")
+CLASSIFICATION_DIR = os.path.join(MONOGENIC_DIR, "Disorder Classification")
+CLINGEN_DIR = os.path.join(CLASSIFICATION_DIR, "ClinGen")
+NATURAL_HISTORY_DIR = os.path.join(CLINGEN_DIR, "Natural History")
+MODELS_DIR = os.path.join(NATURAL_HISTORY_DIR, "Models")
+CLINICAL_TRIALS_DIR = os.path.join(MODELS_DIR, "Clustering", "Clinical Trials")
+PRIORITY_DIR = os.path.join(BASE_DIR, "Prioritization")
+
+# === RAW DATASETS ===
+GENE_ASSOC_XML = os.path.join(RAW_DIR, "genes_associated_ds.xml")
+NATURAL_HISTORY_XML = os.path.join(RAW_DIR, "natural_history_ds.xml")
+EPIDEMIOLOGY_XML = os.path.join(RAW_DIR, "epidemiology_ds.xml")
+NEUROLOGICAL_XML = os.path.join(RAW_DIR, "neurological_disorders_ds.xml")
+GENETIC_XML = os.path.join(RAW_DIR, "genetic_diseases_ds.xml")
+METABOLIC_XML = os.path.join(RAW_DIR, "inborn_errors_metabolism_ds.xml")
+CLINGEN_CSV = os.path.join(CLINGEN_DIR, "clingen_gene_disease_validity_ds.csv")
+MGI_TXT = os.path.join(MGI_DIR, "mouse_model_disease_clean_ds.txt")
+ZFIN_GENE_DISEASE_TXT = os.path.join(ZFIN_DIR, "gene2DiseaseViaOrthology_ds.txt")
+ZFIN_FISH_MODEL_TXT = os.path.join(ZFIN_DIR, "fish_model_disease_ds.txt")
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import pipeline_paths as P
+from clingen_loader import load_clingen
+from gene_association import group1_types, group2_types
+from gene_association_table import load_gene_association_table
+from natural_history import classify_inheritance
+from pipeline_io import open_input, resolve_input, save_csv
+from stage_metrics import StageMetrics
+
+# === FILE PATHS ===
+TIER_FILES = {
+    "tier1": os.path.join(P.MERGE_DIR, "tier1_all_three.txt"),
+    "tier2": os.path.join(P.MERGE_DIR, "tier2_two_overlap.txt"),
+    "tier3": os.path.join(P.MERGE_DIR, "tier3_one_only.txt"),
+}
+INHERITANCE_TABLE = os.path.join(P.NATURAL_HISTORY_DIR, "inheritance_table.csv")
+MGI_MODELED_TXT = os.path.join(P.MODELS_DIR, "mgi_modeled_genesymbols.txt")
+ZFIN_MODELED_TXT = os.path.join(P.MODELS_DIR, "zfin_genesymbols.txt")
+EPIDEMIOLOGY_SUMMARY = os.path.join(P.CLINICAL_TRIALS_DIR, "epidemiology_summary.csv")
+
+OUTPUT_DIR = P.PRIORITY_DIR
+RANKING_CSV = os.path.join(OUTPUT_DIR, "priority_ranking.csv")
+SENSITIVITY_CSV = os.path.join(OUTPUT_DIR, "priority_sensitivity.csv")
+
+# === FEATURES ===
+# Every candidate (disorder, gene) pair gets one value in [0, 1] per feature.
+FEATURES = [
+    "tier", "association_group", "monogenic", "clingen",
+    "inheritance", "mouse_model", "zebrafish_model", "prevalence",
+]
+
+TIER_SCORES = {"tier1": 1.0, "tier2": 0.5, "tier3": 0.0}
+CLINGEN_SCORES = {
+    "DEFINITIVE": 1.0,
+    "STRONG": 0.8,
+    "MODERATE": 0.6,
+    "LIMITED": 0.3,
+}  # Disputed, Refuted, No Known Disease Relationship: 0
+
+DEFAULT_WEIGHTS = {
+    "tier": 1.0,
+    "association_group": 2.0,
+    "monogenic": 2.0,
+    "clingen": 2.0,
+    "inheritance": 1.0,
+    "mouse_model": 1.0,
+    "zebrafish_model": 0.5,
+    "prevalence": 1.0,
+}
+
+DEFAULT_TOP_K = 50
+DEFAULT_CONFIGS = 1000   # random weight configurations for the sensitivity run
+CONFIG_BATCH = 256       # configurations scored per matrix product (bounds memory)
+
+
+# === LOADING ===
+def read_lines(path):
+    """Read a one-entry-per-line TXT list (optionally compressed); a missing file gives an empty set."""
+    if not os.path.exists(resolve_input(path)):
+        return set()
+    with open_input(path, "rt") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def association_group_score(table):
+    """1 for Group 1 associations, 0.5 for Group 2, 0 otherwise (see gene_association)."""
+    assessed = table["DisorderGeneAssociationStatus"] == "Assessed"
+    assoc_type = table["DisorderGeneAssociationType"]
+    score = np.zeros(len(table), dtype=np.float32)
+    score[(assessed & assoc_type.isin(group1_types)).to_numpy()] = 1.0
+    score[(assessed & assoc_type.isin(group2_types)).to_numpy()] = 0.5
+    return score
+
+
+def build_feature_matrix():
+    """Join every signal onto the (OrphaCode, GeneSymbol) candidates.
+
+    Returns the candidate frame and a float32 matrix with one row per
+    candidate and one column per entry of FEATURES.
+    """
+    tiers = {}
+    for tier, path in TIER_FILES.items():
+        for code in read_lines(path):
+            tiers[code] = TIER_SCORES[tier]
+
+    table = load_gene_association_table(columns=[
+        "OrphaCode", "DisorderName", "AssocCount", "HasAssociation", "GeneSymbol",
+        "DisorderGeneAssociationType", "DisorderGeneAssociationStatus",
+    ])
+    table = table[table["HasAssociation"] & (table["GeneSymbol"] != "") & table["OrphaCode"].isin(tiers)]
+    table = table.reset_index(drop=True)
+
+    clingen = load_clingen(P.CLINGEN_CSV) if os.path.exists(resolve_input(P.CLINGEN_CSV)) else pd.DataFrame(
+        columns=["GENE SYMBOL", "CLASSIFICATION"])
+    clingen_score = (
+        clingen["CLASSIFICATION"].str.strip().str.upper().map(CLINGEN_SCORES).fillna(0.0)
+        .groupby(clingen["GENE SYMBOL"]).max()
+    )
+
+    if os.path.exists(INHERITANCE_TABLE):
+        inheritance = pd.read_csv(INHERITANCE_TABLE, dtype=str, keep_default_na=False)
+        inherited = classify_inheritance(inheritance)
+    else:
+        inherited = pd.Series(dtype=bool)
+
+    if os.path.exists(EPIDEMIOLOGY_SUMMARY):
+        epidemiology = pd.read_csv(EPIDEMIOLOGY_SUMMARY, dtype={"OrphaCode": str})
+        prevalence = epidemiology.set_index("OrphaCode")["MaxPointPrevalence"].dropna()
+    else:
+        prevalence = pd.Series(dtype=float)
+    # Point prevalences span orders of magnitude; compare them on a log scale
+    log_prevalence = np.log1p(prevalence)
+    if len(log_prevalence) and log_prevalence.max() > 0:
+        log_prevalence = log_prevalence / log_prevalence.max()
+
+    mouse = read_lines(MGI_MODELED_TXT)
+    zebrafish = read_lines(ZFIN_MODELED_TXT)
+
+    codes, genes = table["OrphaCode"], table["GeneSymbol"].astype(str)
+    features = pd.DataFrame({
+        "OrphaCode": codes,
+        "GeneSymbol": genes,
+        "tier": codes.map(tiers).astype(np.float32),
+        "association_group": association_group_score(table),
+        "monogenic": (table["AssocCount"] == 1).astype(np.float32),
+        "clingen": genes.map(clingen_score).fillna(0.0).astype(np.float32),
+        "inheritance": codes.map(inherited).fillna(False).astype(np.float32),
+        "mouse_model": genes.isin(mouse).astype(np.float32),
+        "zebrafish_model": genes.isin(zebrafish).astype(np.float32),
+        "prevalence": codes.map(log_prevalence).fillna(0.0).astype(np.float32),
+    })
+
+    # A pair listed under several association types keeps its best value per feature
+    features = features.groupby(["OrphaCode", "GeneSymbol"], sort=False).max().reset_index()
+    names = table.drop_duplicates("OrphaCode").set_index("OrphaCode")["DisorderName"]
+    candidates = features[["OrphaCode", "GeneSymbol"]].copy()
+    candidates.insert(1, "DisorderName", candidates["OrphaCode"].map(names))
+    matrix = np.ascontiguousarray(features[FEATURES].to_numpy(dtype=np.float32))
+    return candidates, matrix
+
+
+# === SCORING ===
+def weight_matrix(configs):
+    """Stack weight configurations (dicts keyed by feature) into a features × configs matrix."""
+    return np.array([[float(config.get(f, 0.0)) for f in FEATURES] for config in configs], dtype=np.float32).T
+
+
+def score(matrix, weights):
+    """Scores of every candidate under every configuration (configs × candidates).
+
+    One row per configuration keeps each ranking contiguous in memory.
+    """
+    return weights.T @ matrix.T
+
+
+def top_k(scores, k):
+    """Indices of the k best candidates in each configuration row, best first."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    best = np.argpartition(scores, scores.shape[1] - k, axis=1)[:, -k:]
+    order = np.argsort(-np.take_along_axis(scores, best, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(best, order, axis=1)
+
+
+def rank(candidates, matrix, weights=DEFAULT_WEIGHTS, k=DEFAULT_TOP_K):
+    """Top-k candidates under one weight configuration, with their features."""
+    scores = score(matrix, weight_matrix([weights]))[0]
+    # A stable full sort keeps ties in candidate order for a reproducible list
+    best = np.argsort(-scores, kind="stable")[:k]
+    ranked = candidates.iloc[best].reset_index(drop=True)
+    ranked.insert(0, "Rank", np.arange(1, len(ranked) + 1))
+    ranked["Score"] = scores[best]
+    for i, feature in enumerate(FEATURES):
+        ranked[feature] = matrix[best, i]
+    return ranked
+
+
+def sensitivity(matrix, configs, k=DEFAULT_TOP_K, batch=CONFIG_BATCH):
+    """Fraction of weight configurations that put each candidate in the top k."""
+    weights = weight_matrix(configs)
+    hits = np.zeros(matrix.shape[0], dtype=np.int64)
+    for start in range(0, weights.shape[1], batch):
+        best = top_k(score(matrix, weights[:, start:start + batch]), k)
+        hits += np.bincount(best.ravel(), minlength=matrix.shape[0])
+    return hits / max(weights.shape[1], 1)
+
+
+def random_configs(n, seed=0):
+    """Weight configurations drawn uniformly from the simplex (Dirichlet(1, ..., 1))."""
+    rng = np.random.default_rng(seed)
+    return [dict(zip(FEATURES, w)) for w in rng.dirichlet(np.ones(len(FEATURES)), size=n)]
+
+
+# === MAIN ===
+def main():
+    parser = argparse.ArgumentParser(description="Rank disorder-gene candidates for gene therapy.")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--configs", type=int, default=DEFAULT_CONFIGS,
+                        help="random weight configurations for the sensitivity analysis (0 to skip)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    metrics = StageMetrics("priority_scoring")
+
+    metrics.start("load table")
+    candidates, matrix = build_feature_matrix()
+    metrics.stop(rows_out=len(candidates))
+    print(f"Built feature matrix: {matrix.shape[0]} candidates × {matrix.shape[1]} features")
+
+    metrics.start("filter")
+    ranked = rank(candidates, matrix, DEFAULT_WEIGHTS, args.top_k)
+    frequency = None
+    if args.configs > 0:
+        start = time.perf_counter()
+        frequency = sensitivity(matrix, random_configs(args.configs, args.seed), args.top_k)
+        elapsed = time.perf_counter() - start
+        print(f"Scored {args.configs} weight configurations in {elapsed:.3f} s "
+              f"({args.configs / max(elapsed, 1e-9):,.0f} per second)")
+    metrics.stop(rows_in=len(candidates), rows_out=len(ranked))
+
+    metrics.start("write outputs")
+    save_csv(ranked, RANKING_CSV)
+    print(f"💾 Saved top {len(ranked)} candidates: {RANKING_CSV}")
+    if frequency is not None:
+        robust = candidates.assign(TopKFrequency=frequency)[frequency > 0]
+        robust = robust.sort_values("TopKFrequency", ascending=False, kind="stable")
+        save_csv(robust, SENSITIVITY_CSV)
+        print(f"💾 Saved top-{args.top_k} frequency over {args.configs} configurations: {SENSITIVITY_CSV}")
+    metrics.stop(rows_out=len(ranked))
+    metrics.finish()
+    print("✅ Priority scoring complete.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import pipeline_paths as P
+
+# === SOURCES ===
+# Pipeline outputs served by the lookup service. Missing files are treated
+# as empty, so the service can start before every stage has been run.
+TIER_FILES = {
+    "tier1": os.path.join(P.MERGE_DIR, "tier1_all_three.txt"),
+    "tier2": os.path.join(P.MERGE_DIR, "tier2_two_overlap.txt"),
+    "tier3": os.path.join(P.MERGE_DIR, "tier3_one_only.txt"),
+}
+MASTER_CSV = os.path.join(P.MERGE_DIR, "merged_master.csv")
+GROUP_FILES = {
+    "Group1_Strong": os.path.join(P.GENE_ASSOC_DIR, "Group1_Strong.csv"),
+    "Group2_Supplementary": os.path.join(P.GENE_ASSOC_DIR, "Group2_Supplementary.csv"),
+    "Group3_Excluded": os.path.join(P.GENE_ASSOC_DIR, "Group3_Excluded.csv"),
+    "Group4_NotYetAssessed": os.path.join(P.GENE_ASSOC_DIR, "Group4_NotYetAssessed.csv"),
+}
+CLINGEN_CSV = os.path.join(P.CLINGEN_DIR, "clingen_all_matches.csv")
+INHERITANCE_FILES = {
+    "included": os.path.join(P.NATURAL_HISTORY_DIR, "included_inheritance_disorders.csv"),
+    "excluded": os.path.join(P.NATURAL_HISTORY_DIR, "excluded_inheritance_disorders.csv"),
+}
+EPIDEMIOLOGY_CSV = os.path.join(P.CLINICAL_TRIALS_DIR, "epidemiology_filtered.csv")
+MODEL_FILES = {
+    "mgi_found": os.path.join(P.MODELS_DIR, "mgi_genesymbols.txt"),
+    "mgi_modeled": os.path.join(P.MODELS_DIR, "mgi_modeled_genesymbols.txt"),
+    "zfin_modeled": os.path.join(P.MODELS_DIR, "zfin_genesymbols.txt"),
+}
+
+SOURCES = (
+    list(TIER_FILES.values()) + [MASTER_CSV] + list(GROUP_FILES.values()) + [CLINGEN_CSV]
+    + list(INHERITANCE_FILES.values()) + [EPIDEMIOLOGY_CSV] + list(MODEL_FILES.values())
+)
+
+# === SERVICE ===
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+RELOAD_CHECK_SECONDS = 2.0  # how often source mtimes are checked, at most
+MAX_BATCH = 10000
+MAX_BODY_BYTES = 1 << 20  # a full batch of keys is well under this
+
+
+# === LOADING ===
+def read_rows(path, delimiter=","):
+    """Read a CSV as a list of dicts; a missing file gives no rows."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f, delimiter=delimiter))
+
+
+def read_lines(path):
+    """Read a one-entry-per-line TXT list; a missing file gives an empty set."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def normalize_code(code):
+    code = str(code).strip()
+    return code[len("ORPHA:"):] if code.upper().startswith("ORPHA:") else code
+
+
+def normalize_gene(symbol):
+    return str(symbol).strip().upper()
+
+
+def build_indexes():
+    """Load every source once into OrphaCode- and gene-keyed dicts."""
+    disorders = {}
+    genes = {}
+
+    def disorder(code):
+        if code not in disorders:
+            disorders[code] = {
+                "orphacode": code, "name": None, "tier": None, "source_files": [],
+                "association_groups": [], "genes": [], "inheritance": None, "prevalence": [],
+            }
+        return disorders[code]
+
+    def gene(symbol):
+        key = normalize_gene(symbol)
+        if key not in genes:
+            genes[key] = {"gene": symbol, "orphacodes": [], "clingen": [], "models": {}}
+        return genes[key]
+
+    for tier, path in TIER_FILES.items():
+        for code in read_lines(path):
+            disorder(code)["tier"] = tier
+
+    for row in read_rows(MASTER_CSV):
+        record = disorder(row["OrphaCode"])
+        record["name"] = row["Name"]
+        record["source_files"] = row["SourceFile"].split(";") if row["SourceFile"] else []
+
+    for group, path in GROUP_FILES.items():
+        for row in read_rows(path):
+            record = disorder(row["OrphaCode"])
+            record["name"] = record["name"] or row["DisorderName"]
+            if group not in record["association_groups"]:
+                record["association_groups"].append(group)
+            symbol = row["GeneSymbol"]
+            if not symbol:
+                continue
+            record["genes"].append({
+                "gene": symbol,
+                "association_group": group,
+                "association_type": row["DisorderGeneAssociationType"],
+                "association_status": row["DisorderGeneAssociationStatus"],
+            })
+            codes = gene(symbol)["orphacodes"]
+            if row["OrphaCode"] not in codes:
+                codes.append(row["OrphaCode"])
+
+    for row in read_rows(CLINGEN_CSV):
+        gene(row["GENE SYMBOL"])["clingen"].append({
+            "disease": row.get("DISEASE LABEL", ""),
+            "mondo": row.get("DISEASE ID (MONDO)", ""),
+            "moi": row.get("MOI", ""),
+            "classification": row.get("CLASSIFICATION", ""),
+            "report": row.get("ONLINE REPORT", ""),
+        })
+
+    for status, path in INHERITANCE_FILES.items():
+        for row in read_rows(path):
+            disorder(row["OrphaCode"])["inheritance"] = {
+                "status": status,
+                "types": row["InheritanceTypes"].split(";"),
+                "ids": row["InheritanceIDs"].split(";"),
+                "average_age_of_onset": row["AverageAgeOfOnset"].split(";"),
+            }
+
+    for row in read_rows(EPIDEMIOLOGY_CSV, delimiter=";"):
+        disorder(row["Orphacode"])["prevalence"].append({
+            "type": row["Prevalence Type"],
+            "qualification": row["Prevalence Qualification"],
+            "class": row["Prevalence Class"],
+            "value": row["Prevalence Value"],
+            "geographic_area": row["Geographic Area"],
+            "validation_status": row["Validation Status"],
+            "source": row["Prevalence Source"],
+        })
+
+    model_lists = {name: {normalize_gene(g) for g in read_lines(path)} for name, path in MODEL_FILES.items()}
+    for key, record in genes.items():
+        record["models"] = {
+            "mgi": "modeled" if key in model_lists["mgi_modeled"] else
+                   "found" if key in model_lists["mgi_found"] else None,
+            "zfin": "modeled" if key in model_lists["zfin_modeled"] else None,
+        }
+
+    return disorders, genes
+
+
+class ResultIndex:
+    """In-memory indexes over the pipeline outputs, rebuilt when a source changes.
+
+    Lookups read an immutable snapshot, so a reload never blocks or tears
+    concurrent requests; the new snapshot is swapped in once fully built.
+    A reload that fails (e.g. a source caught mid-write) is logged and the
+    previous snapshot keeps serving until the next check.
+    """
+
+    def __init__(self, sources=SOURCES, check_interval=RELOAD_CHECK_SECONDS):
+        self.sources = sources
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked = 0.0
+        self._snapshot = self._load()
+
+    def _mtimes(self):
+        mtimes = {}
+        for path in self.sources:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                mtimes[path] = None
+        return mtimes
+
+    def _load(self):
+        mtimes = self._mtimes()
+        start = time.perf_counter()
+        disorders, genes = build_indexes()
+        return {
+            "mtimes": mtimes,
+            "disorders": disorders,
+            "genes": genes,
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "load_seconds": round(time.perf_counter() - start, 3),
+        }
+
+    def snapshot(self):
+        """Return the current snapshot, reloading first if a source file changed."""
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval and self._lock.acquire(blocking=False):
+            try:
+                self._checked = now
+                if self._mtimes() != self._snapshot["mtimes"]:
+                    self._snapshot = self._load()
+                    print(f"🔄 Reloaded indexes ({len(self._snapshot['disorders'])} disorders, "
+                          f"{len(self._snapshot['genes'])} genes)")
+            except Exception as exc:
+                print(f"⚠️ Reload failed, still serving the snapshot loaded at {self._snapshot['loaded_at']}: {exc!r}")
+            finally:
+                self._lock.release()
+        return self._snapshot
+
+    def lookup_orphacode(self, code, snapshot=None):
+        snapshot = snapshot or self.snapshot()
+        return snapshot["disorders"].get(normalize_code(code))
+
+    def lookup_gene(self, symbol, snapshot=None):
+        snapshot = snapshot or self.snapshot()
+        record = snapshot["genes"].get(normalize_gene(symbol))
+        if record is None:
+            return None
+        disorders = snapshot["disorders"]
+        return dict(record, disorders=[disorders[code] for code in record["orphacodes"] if code in disorders])
+
+    def batch(self, genes=(), orphacodes=()):
+        snapshot = self.snapshot()
+        return {
+            "genes": {str(g): self.lookup_gene(g, snapshot) for g in genes},
+            "orphacodes": {str(c): self.lookup_orphacode(c, snapshot) for c in orphacodes},
+        }
+
+    def status(self):
+        snapshot = self.snapshot()
+        return {
+            "loaded_at": snapshot["loaded_at"],
+            "load_seconds": snapshot["load_seconds"],
+            "disorders": len(snapshot["disorders"]),
+            "genes": len(snapshot["genes"]),
+            "missing_sources": [path for path, mtime in snapshot["mtimes"].items() if mtime is None],
+        }
+
+
+# === HTTP ===
+class QueryHandler(BaseHTTPRequestHandler):
+    """GET /gene/<symbol>, GET /orphacode/<code>, GET /status, POST /batch."""
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        index = self.server.index
+        # Split before unquoting so an escaped "/" (%2F) stays inside its segment
+        parts = [unquote(p) for p in self.path.split("?", 1)[0].split("/") if p]
+
+        if parts == ["status"]:
+            return self.send_json(200, index.status())
+        if len(parts) == 2 and parts[0] in ("gene", "orphacode"):
+            key = parts[1]
+            result = index.lookup_gene(key) if parts[0] == "gene" else index.lookup_orphacode(key)
+            if result is None:
+                return self.send_json(404, {"error": f"{parts[0]} not found: {key}"})
+            return self.send_json(200, result)
+        return self.send_json(404, {"error": f"unknown endpoint: {self.path}"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/batch":
+            return self.send_json(404, {"error": f"unknown endpoint: {self.path}"})
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+        except ValueError:
+            length = -1
+        if length < 0:
+            return self.send_json(400, {"error": "invalid Content-Length"})
+        if length > MAX_BODY_BYTES:
+            return self.send_json(413, {"error": f"request body over {MAX_BODY_BYTES} bytes"})
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+            genes = request.get("genes", [])
+            orphacodes = request.get("orphacodes", [])
+        except (ValueError, AttributeError):
+            return self.send_json(400, {"error": 'expected JSON like {"genes": [...], "orphacodes": [...]}'})
+        if not isinstance(genes, list) or not isinstance(orphacodes, list):
+            return self.send_json(400, {"error": "genes and orphacodes must be lists"})
+        if len(genes) + len(orphacodes) > MAX_BATCH:
+            return self.send_json(413, {"error": f"at most {MAX_BATCH} keys per batch"})
+        return self.send_json(200, self.server.index.batch(genes, orphacodes))
+
+
+# === MAIN ===
+def main():
+    parser = argparse.ArgumentParser(description="Serve gene/OrphaCode lookups over the pipeline outputs.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), QueryHandler)
+    server.index = ResultIndex()
+    status = server.index.status()
+    print(f"Loaded {status['disorders']} disorders and {status['genes']} genes in {status['load_seconds']} s")
+    for path in status["missing_sources"]:
+        print(f"⚠️ Missing source (served as empty): {path}")
+    print(f"✅ Serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import natural_history as NH
+import pipeline_paths as P
+import run_pipeline as runner
+from gene_association_table import COLUMNS, DTYPES, TABLE_FILE, parse_disorder
+from orphanet_xml import etree, iter_disorders, text_query
+from pipeline_io import file_digest, save_csv
+from stage_metrics import StageMetrics
+
+# === FILE PATHS ===
+# Per-disorder digests of the releases the current outputs were built from
+MANIFEST_FILE = os.path.join(P.BASE_DIR, ".release_digests.json")
+REPORT_CSV = os.path.join(P.BASE_DIR, "release_diff.csv")
+
+PRODUCTS = {
+    "genes_associated": P.GENE_ASSOC_XML,
+    "natural_history": P.NATURAL_HISTORY_XML,
+    "epidemiology": P.EPIDEMIOLOGY_XML,
+}
+
+NH_INCLUDED = (
+    os.path.join(NH.OUTPUT_DIR, "included_inheritance_disorders.csv"),
+    os.path.join(NH.OUTPUT_DIR, "included_inheritance_orphacodes.txt"),
+)
+NH_EXCLUDED = (
+    os.path.join(NH.OUTPUT_DIR, "excluded_inheritance_disorders.csv"),
+    os.path.join(NH.OUTPUT_DIR, "excluded_inheritance_orphacodes.txt"),
+)
+
+# Outputs patched in place; they must still be the ones built from the recorded releases
+PATCHED_OUTPUTS = [TABLE_FILE, NH.INHERITANCE_TABLE, *NH_INCLUDED, *NH_EXCLUDED]
+
+# Table-driven stages re-run (by run_pipeline) on the patched gene table
+TABLE_STAGES = {
+    "gene_association", "monogenic_association", "disorder_classification",
+    "clingen_validity", "clingen_filter_on_orphanet",
+}
+
+ORPHA_CODE = text_query("OrphaCode")
+
+
+# === DIGESTS ===
+def disorder_digest(disorder):
+    """SHA-256 of the serialized <Disorder> element (without the whitespace after it)."""
+    disorder.tail = None
+    return hashlib.sha256(etree.tostring(disorder)).hexdigest()
+
+
+def scan_release(xml_path, parse=None, wanted=None):
+    """Digest every disorder of a release in one pass, parsing the wanted ones.
+
+    wanted(code, digest) selects the disorders handed to parse. Returns the
+    digests keyed by OrphaCode in release order and the parse results of the
+    selected disorders. Digests depend on the XML backend, so switching
+    between lxml and ElementTree marks every disorder as changed.
+    """
+    digests, parsed = {}, {}
+    for disorder in iter_disorders(xml_path):
+        code = ORPHA_CODE(disorder).strip()
+        digests[code] = disorder_digest(disorder)
+        if parse is not None and wanted(code, digests[code]):
+            parsed[code] = parse(disorder)
+    return digests, parsed
+
+
+def diff_digests(previous, current):
+    """Return the added, removed and changed OrphaCodes between two releases."""
+    added = [code for code in current if code not in previous]
+    removed = [code for code in previous if code not in current]
+    changed = [code for code, digest in current.items() if code in previous and previous[code] != digest]
+    return added, removed, changed
+
+
+def load_manifest(path=MANIFEST_FILE):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(digests, path=MANIFEST_FILE):
+    manifest = {
+        "releases": digests,
+        "outputs": {output: file_digest(output) for output in PATCHED_OUTPUTS},
+    }
+    runner.save_state(manifest, path)
+
+
+# === PATCHING ===
+def in_release_order(frame, digests):
+    """Stable-sort rows by the position of their OrphaCode in the release."""
+    position = {code: i for i, code in enumerate(digests)}
+    order = frame["OrphaCode"].map(position).to_numpy()
+    return frame.iloc[np.argsort(order, kind="stable")].reset_index(drop=True)
+
+
+def patch_gene_table(digests, parsed):
+    """Replace the rows of added/changed disorders and drop removed ones."""
+    previous = pd.read_csv(TABLE_FILE, dtype=DTYPES, keep_default_na=False)
+    stale = previous["OrphaCode"].isin(list(parsed)) | ~previous["OrphaCode"].isin(list(digests))
+    fresh = pd.DataFrame([row for rows in parsed.values() for row in rows], columns=COLUMNS).astype(DTYPES)
+
+    table = in_release_order(pd.concat([previous[~stale], fresh], ignore_index=True), digests)
+    save_csv(table, TABLE_FILE)
+    return table
+
+
+def read_split(csv_path, txt_path):
+    """Read one side of the natural history split, trusting its TXT list over the CSV.
+
+    natural_history leaves the CSV untouched when a side is empty, while
+    the TXT list is always rewritten.
+    """
+    codes = NH.load_filter_codes(txt_path)
+    if not codes or not os.path.exists(csv_path):
+        return pd.DataFrame(columns=NH.DISORDER_COLUMNS)
+    rows = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    return rows[rows["OrphaCode"].isin(list(codes))]
+
+
+def patch_natural_history(digests, parsed, filter_codes):
+    """Rebuild the natural history outputs from the previous rows plus the re-parsed disorders."""
+    inheritance = pd.read_csv(NH.INHERITANCE_TABLE, dtype=str, keep_default_na=False)
+    disorders = pd.concat([read_split(*NH_INCLUDED), read_split(*NH_EXCLUDED)], ignore_index=True)
+    disorders["InheritanceCount"] = disorders["InheritanceCount"].astype(np.int64)
+
+    def current(frame):
+        codes = frame["OrphaCode"]
+        stale = codes.isin(list(parsed)) | ~codes.isin(list(filter_codes)) | ~codes.isin(list(digests))
+        return frame[~stale]
+
+    fresh_disorders, fresh_inheritance = NH.build_tables(parsed.values())
+    disorders = in_release_order(pd.concat([current(disorders), fresh_disorders], ignore_index=True), digests)
+    inheritance = in_release_order(pd.concat([current(inheritance), fresh_inheritance], ignore_index=True), digests)
+
+    keep = disorders["OrphaCode"].map(NH.classify_inheritance(inheritance)).fillna(False).astype(bool)
+    NH.save_outputs(inheritance, disorders[keep], disorders[~keep], NH.OUTPUT_DIR)
+    return disorders
+
+
+def record_stage(name):
+    """Mark a patched stage as current in run_pipeline's state file."""
+    stage = next(s for s in runner.STAGES if s["name"] == name)
+    state = runner.load_state(runner.STATE_FILE)
+    fingerprint = runner.stage_fingerprint(stage)
+    fingerprint["outputs"] = {path: file_digest(path) for path in stage["outputs"]}
+    state[name] = fingerprint
+    runner.save_state(state, runner.STATE_FILE)
+
+
+def report_rows(product, added, removed, changed):
+    return (
+        [(product, code, "added") for code in added]
+        + [(product, code, "removed") for code in removed]
+        + [(product, code, "changed") for code in changed]
+    )
+
+
+# === MAIN ===
+def main():
+    parser = argparse.ArgumentParser(
+        description="Diff new Orphanet releases against the last recorded ones and patch the outputs.")
+    parser.add_argument("--record", action="store_true",
+                        help="only record the digests of the current releases and outputs (run after a full build)")
+    parser.add_argument("--report-only", action="store_true", help="report the differences without patching")
+    args = parser.parse_args()
+
+    metrics = StageMetrics("release_diff")
+    manifest = load_manifest()
+
+    if args.record or manifest is None:
+        metrics.start("parse XML")
+        digests = {product: scan_release(path)[0] for product, path in PRODUCTS.items()}
+        metrics.stop(rows_out=sum(len(d) for d in digests.values()))
+        save_manifest(digests)
+        if manifest is None and not args.record:
+            print("⚠️ No recorded release digests: recorded the current releases as the baseline")
+        print(f"💾 Recorded release digests: {MANIFEST_FILE}")
+        metrics.finish()
+        return
+
+    patch = not args.report_only
+    if patch:
+        outdated = [path for path, digest in manifest["outputs"].items() if file_digest(path) != digest]
+        if outdated:
+            raise RuntimeError(
+                "Outputs changed since the release digests were recorded "
+                f"({', '.join(outdated)}); rebuild them and run release_diff.py --record")
+
+    previous = manifest["releases"]
+    digests, rows = {}, []
+
+    # genes_associated: re-parse only added/changed disorders into the gene table
+    metrics.start("diff genes_associated")
+    old = previous.get("genes_associated", {})
+    digests["genes_associated"], parsed = scan_release(
+        P.GENE_ASSOC_XML, parse_disorder if patch else None, lambda code, digest: old.get(code) != digest)
+    added, removed, changed = diff_digests(old, digests["genes_associated"])
+    rows += report_rows("genes_associated", added, removed, changed)
+    if patch and (added or removed or changed):
+        table = patch_gene_table(digests["genes_associated"], parsed)
+        record_stage("gene_association_table")
+        print(f"🩹 Patched gene table: {len(parsed)} disorders re-parsed, {len(table)} rows")
+    metrics.stop(rows_in=len(digests["genes_associated"]), rows_out=len(parsed))
+
+    if patch:
+        metrics.start("table stages")
+        runner.run_pipeline(only=TABLE_STAGES)
+        metrics.stop()
+
+    # natural_history: re-parse filtered disorders that changed or were not in the previous outputs
+    metrics.start("diff natural_history")
+    old = previous.get("natural_history", {})
+    filter_codes = NH.load_filter_codes(NH.FILTER_FILE) if patch else set()
+    matched = set(pd.read_csv(NH.INHERITANCE_TABLE, dtype=str, usecols=["OrphaCode"])["OrphaCode"]) if patch else set()
+    digests["natural_history"], parsed = scan_release(
+        P.NATURAL_HISTORY_XML, NH.parse_disorder if patch else None,
+        lambda code, digest: code in filter_codes and (old.get(code) != digest or code not in matched))
+    added, removed, changed = diff_digests(old, digests["natural_history"])
+    rows += report_rows("natural_history", added, removed, changed)
+    if patch:
+        disorders = patch_natural_history(digests["natural_history"], parsed, filter_codes)
+        record_stage("natural_history")
+        print(f"🩹 Patched natural history: {len(parsed)} disorders re-parsed, {len(disorders)} matched")
+    metrics.stop(rows_in=len(digests["natural_history"]), rows_out=len(parsed))
+
+    # epidemiology: reported only; its stage filters a small subset and is re-run by run_pipeline
+    metrics.start("diff epidemiology")
+    old = previous.get("epidemiology", {})
+    digests["epidemiology"] = scan_release(P.EPIDEMIOLOGY_XML)[0]
+    rows += report_rows("epidemiology", *diff_digests(old, digests["epidemiology"]))
+    metrics.stop(rows_in=len(digests["epidemiology"]))
+
+    metrics.start("write outputs")
+    report = pd.DataFrame(rows, columns=["Product", "OrphaCode", "Change"])
+    save_csv(report, REPORT_CSV, columnar=False)
+    if patch:
+        save_manifest(digests)
+    metrics.stop(rows_out=len(report))
+
+    print("\n=== SUMMARY ===")
+    for (product, change), count in report.groupby(["Product", "Change"], sort=False).size().items():
+        print(f"{product}: {count} {change}")
+    print(f"💾 Saved release diff ({len(report)} disorders): {REPORT_CSV}")
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
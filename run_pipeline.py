@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pipeline_paths as P
+from pipeline_io import file_digest, resolve_input
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = os.path.join(P.BASE_DIR, ".pipeline_state.json")
+
+# === STAGES ===
+# Each stage declares the files it reads and writes. Inputs that no stage
+# produces (raw downloads, hand-curated lists) are treated as external and
+# may be stored compressed (see pipeline_io.resolve_input). A stage whose
+# script reads settings from the environment lists them under "env", so a
+# changed setting re-runs it.
+STAGES = [
+    {
+        "name": "merge_neuro_ime_genetic",
+        "script": "merge_neuro_ime_genetic.py",
+        "inputs": [P.NEUROLOGICAL_XML, P.GENETIC_XML, P.METABOLIC_XML],
+        "outputs": [
+            os.path.join(P.MERGE_DIR, "merged_master.csv"),
+            os.path.join(P.MERGE_DIR, "tier1_all_three.csv"),
+            os.path.join(P.MERGE_DIR, "tier1_all_three.txt"),
+            os.path.join(P.MERGE_DIR, "tier2_two_overlap.csv"),
+            os.path.join(P.MERGE_DIR, "tier2_two_overlap.txt"),
+            os.path.join(P.MERGE_DIR, "tier3_one_only.csv"),
+            os.path.join(P.MERGE_DIR, "tier3_one_only.txt"),
+            os.path.join(P.MERGE_DIR, "venn_diagram.png"),
+        ],
+    },
+    {
+        "name": "gene_association_table",
+        "script": "gene_association_table.py",
+        "inputs": [P.GENE_ASSOC_XML],
+        "outputs": [os.path.join(P.GENE_ASSOC_DIR, "gene_associations.csv")],
+    },
+    {
+        "name": "gene_association",
+        "script": "gene_association.py",
+        "inputs": [
+            os.path.join(P.MERGE_DIR, "tier1_all_three.txt"),
+            os.path.join(P.GENE_ASSOC_DIR, "gene_associations.csv"),
+        ],
+        "outputs": [
+            os.path.join(P.GENE_ASSOC_DIR, "Group1_Strong.csv"),
+            os.path.join(P.GENE_ASSOC_DIR, "Group2_Supplementary.csv"),
+            os.path.join(P.GENE_ASSOC_DIR, "Group3_Excluded.csv"),
+            os.path.join(P.GENE_ASSOC_DIR, "Group4_NotYetAssessed.csv"),
+            os.path.join(P.GENE_ASSOC_DIR, "tier1_matched_orphacodes.txt"),
+            os.path.join(P.GENE_ASSOC_DIR, "tier1_not_yet_assessed_orphacodes.txt"),
+            os.path.join(P.GENE_ASSOC_DIR, "tier1_unmatched_orphacodes.txt"),
+        ],
+    },
+    {
+        "name": "monogenic_association",
+        "script": "monogenic_association.py",
+        "inputs": [
+            os.path.join(P.GENE_ASSOC_DIR, "tier1_matched_orphacodes.txt"),
+            os.path.join(P.GENE_ASSOC_DIR, "gene_associations.csv"),
+        ],
+        "outputs": [
+            os.path.join(P.MONOGENIC_DIR, "monogenic_orphacodes.txt"),
+            os.path.join(P.MONOGENIC_DIR, "monogenic_associations.csv"),
+        ],
+    },
+    {
+        "name": "disorder_classification",
+        "script": "disorder_classification.py",
+        "inputs": [
+            os.path.join(P.MONOGENIC_DIR, "monogenic_orphacodes.txt"),
+            os.path.join(P.GENE_ASSOC_DIR, "gene_associations.csv"),
+        ],
+        "outputs": [
+            os.path.join(P.CLASSIFICATION_DIR, "kept_disorders.csv"),
+            os.path.join(P.CLASSIFICATION_DIR, "excluded_disorders.csv"),
+            os.path.join(P.CLASSIFICATION_DIR, "kept_orphacodes.txt"),
+        ],
+    },
+    {
+        "name": "clingen_validity",
+        "script": "clingen_validity.py",
+        "inputs": [P.CLINGEN_CSV, os.path.join(P.CLASSIFICATION_DIR, "kept_disorders.csv")],
+        "outputs": [
+            os.path.join(P.CLINGEN_DIR, "no_match_genes.txt"),
+            os.path.join(P.CLINGEN_DIR, "orphanet_no_match.csv"),
+            os.path.join(P.CLINGEN_DIR, "clingen_all_matches.csv"),
+            os.path.join(P.CLINGEN_DIR, "clingen_definitive.csv"),
+            os.path.join(P.CLINGEN_DIR, "clingen_definitive_genesymbols.txt"),
+            os.path.join(P.CLINGEN_DIR, "definitive_orphacodes.txt"),
+        ],
+    },
+    {
+        "name": "clingen_filter_on_orphanet",
+        "script": "clingen_filter_on_orphanet.py",
+        "inputs": [
+            os.path.join(P.CLINGEN_DIR, "definitive_orphacodes.txt"),
+            os.path.join(P.CLASSIFICATION_DIR, "kept_disorders.csv"),
+        ],
+        "outputs": [os.path.join(P.CLINGEN_DIR, "definitive_disorders.csv")],
+    },
+    {
+        "name": "natural_history",
+        "script": "natural_history.py",
+        "inputs": [P.NATURAL_HISTORY_XML, os.path.join(P.CLINGEN_DIR, "definitive_orphacodes.txt")],
+        "outputs": [
+            os.path.join(P.NATURAL_HISTORY_DIR, "included_inheritance_disorders.csv"),
+            os.path.join(P.NATURAL_HISTORY_DIR, "excluded_inheritance_disorders.csv"),
+            os.path.join(P.NATURAL_HISTORY_DIR, "included_inheritance_orphacodes.txt"),
+            os.path.join(P.NATURAL_HISTORY_DIR, "excluded_inheritance_orphacodes.txt"),
+            os.path.join(P.NATURAL_HISTORY_DIR, "inheritance_table.csv"),
+        ],
+    },
+    {
+        "name": "is_it_modeled_mgi",
+        "script": "is_it_modeled_mgi.py",
+        "inputs": [os.path.join(P.NATURAL_HISTORY_DIR, "included_inheritance_genesymbols.txt"), P.MGI_TXT],
+        "outputs": [
+            os.path.join(P.MODELS_DIR, "mgi_models.csv"),
+            os.path.join(P.MODELS_DIR, "mgi_genesymbols.txt"),
+            os.path.join(P.MODELS_DIR, "mgi_modeled_genesymbols.txt"),
+            os.path.join(P.MODELS_DIR, "mgi_models_by_gene.csv"),
+        ],
+    },
+    {
+        "name": "is_it_modeled_zfin",
+        "script": "is_it_modeled_zfin.py",
+        "inputs": [
+            os.path.join(P.NATURAL_HISTORY_DIR, "included_inheritance_genesymbols.txt"),
+            P.ZFIN_GENE_DISEASE_TXT,
+            P.ZFIN_FISH_MODEL_TXT,
+        ],
+        "outputs": [
+            os.path.join(P.MODELS_DIR, "zfin_models.csv"),
+            os.path.join(P.MODELS_DIR, "zfin_models_aggregated.csv"),
+            os.path.join(P.MODELS_DIR, "zfin_genesymbols.txt"),
+        ],
+        "env": ["ZFIN_JOIN_MODE"],
+    },
+    {
+        "name": "epidemiology",
+        "script": "epidemiology.py",
+        "inputs": [
+            os.path.join(P.CLINICAL_TRIALS_DIR, "tableA_orphacodes.txt"),
+            os.path.join(P.CLINICAL_TRIALS_DIR, "tableB_orphacodes.txt"),
+            P.EPIDEMIOLOGY_XML,
+        ],
+        "outputs": [
+            os.path.join(P.CLINICAL_TRIALS_DIR, "epidemiology_filtered.csv"),
+            os.path.join(P.CLINICAL_TRIALS_DIR, "epidemiology_values.csv"),
+            os.path.join(P.CLINICAL_TRIALS_DIR, "epidemiology_summary.csv"),
+        ],
+    },
+    {
+        "name": "priority_scoring",
+        "script": "priority_scoring.py",
+        "inputs": [
+            os.path.join(P.MERGE_DIR, "tier1_all_three.txt"),
+            os.path.join(P.MERGE_DIR, "tier2_two_overlap.txt"),
+            os.path.join(P.MERGE_DIR, "tier3_one_only.txt"),
+            os.path.join(P.GENE_ASSOC_DIR, "gene_associations.csv"),
+            P.CLINGEN_CSV,
+            os.path.join(P.NATURAL_HISTORY_DIR, "inheritance_table.csv"),
+            os.path.join(P.MODELS_DIR, "mgi_modeled_genesymbols.txt"),
+            os.path.join(P.MODELS_DIR, "zfin_genesymbols.txt"),
+            os.path.join(P.CLINICAL_TRIALS_DIR, "epidemiology_summary.csv"),
+        ],
+        "outputs": [
+            os.path.join(P.PRIORITY_DIR, "priority_ranking.csv"),
+            os.path.join(P.PRIORITY_DIR, "priority_sensitivity.csv"),
+        ],
+    },
+]
+
+
+# === FUNCTIONS ===
+def local_modules(script):
+    """Return the script and every repository module it imports, transitively."""
+    seen = []
+    pending = [os.path.join(REPO_DIR, script)]
+    while pending:
+        path = pending.pop()
+        if path in seen or not os.path.exists(path):
+            continue
+        seen.append(path)
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                pending.append(os.path.join(REPO_DIR, name.split(".")[0] + ".py"))
+    return sorted(seen)
+
+
+def code_digest(script):
+    """Hash the source of a stage together with the local modules it uses."""
+    digest = hashlib.sha256()
+    for path in local_modules(script):
+        digest.update(os.path.basename(path).encode())
+        digest.update((file_digest(path) or "").encode())
+    return digest.hexdigest()
+
+
+def order_stages(stages):
+    """Topologically sort stages so that producers run before consumers."""
+    producer = {out: stage["name"] for stage in stages for out in stage["outputs"]}
+    remaining = {
+        stage["name"]: {producer[i] for i in stage["inputs"] if i in producer} - {stage["name"]}
+        for stage in stages
+    }
+    ordered = []
+    while remaining:
+        ready = next((s for s in stages if s["name"] in remaining and not remaining[s["name"]]), None)
+        if ready is None:
+            raise ValueError(f"Cyclic stage dependencies: {', '.join(sorted(remaining))}")
+        ordered.append(ready)
+        del remaining[ready["name"]]
+        for deps in remaining.values():
+            deps.discard(ready["name"])
+    return ordered
+
+
+def stage_fingerprint(stage):
+    """Return the digests of a stage's code and inputs, plus its environment settings."""
+    fingerprint = {
+        "code": code_digest(stage["script"]),
+        "inputs": {path: file_digest(resolve_input(path)) for path in stage["inputs"]},
+    }
+    if stage.get("env"):
+        fingerprint["env"] = {name: os.environ.get(name) for name in stage["env"]}
+    return fingerprint
+
+
+def is_up_to_date(stage, fingerprint, state):
+    """A stage is current if code, inputs, settings and outputs all match the last run."""
+    previous = state.get(stage["name"])
+    if previous is None:
+        return False
+    if previous["code"] != fingerprint["code"] or previous["inputs"] != fingerprint["inputs"]:
+        return False
+    if previous.get("env") != fingerprint.get("env"):
+        return False
+    outputs = {path: file_digest(path) for path in stage["outputs"]}
+    return previous["outputs"] == outputs
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def run_pipeline(only=None, force=False, dry_run=False):
+    """Run every out-of-date stage in dependency order."""
+    state = load_state(STATE_FILE)
+    ran, skipped = [], []
+    # Tag the per-stage metrics records (stage_metrics.py) with this run.
+    env = dict(os.environ, PIPELINE_RUN_ID=time.strftime("%Y%m%dT%H%M%S"))
+
+    for stage in order_stages(STAGES):
+        if only and stage["name"] not in only:
+            continue
+
+        missing = [path for path in stage["inputs"] if not os.path.exists(resolve_input(path))]
+        if missing and not dry_run:
+            raise FileNotFoundError(f"{stage['name']}: missing input(s): {', '.join(missing)}")
+
+        fingerprint = stage_fingerprint(stage)
+        if not force and is_up_to_date(stage, fingerprint, state):
+            print(f"⏭️  {stage['name']}: up to date")
+            skipped.append(stage["name"])
+            continue
+
+        if dry_run:
+            print(f"🔁 {stage['name']}: would run")
+            ran.append(stage["name"])
+            continue
+
+        print(f"▶️  {stage['name']}: running {stage['script']}")
+        subprocess.run([sys.executable, stage["script"]], cwd=REPO_DIR, env=env, check=True)
+
+        fingerprint["outputs"] = {path: file_digest(path) for path in stage["outputs"]}
+        state[stage["name"]] = fingerprint
+        save_state(state, STATE_FILE)
+        ran.append(stage["name"])
+
+    print("\n=== SUMMARY ===")
+    print(f"Stages run: {len(ran)}")
+    print(f"Stages skipped: {len(skipped)}")
+    return ran, skipped
+
+
+# === MAIN ===
+def main():
+    parser = argparse.ArgumentParser(description="Run the prioritization pipeline incrementally.")
+    parser.add_argument("stages", nargs="*", help="restrict the run to these stage names")
+    parser.add_argument("--force", action="store_true", help="re-run stages even if unchanged")
+    parser.add_argument("--dry-run", action="store_true", help="only report which stages would run")
+    args = parser.parse_args()
+
+    names = {stage["name"] for stage in STAGES}
+    unknown = set(args.stages) - names
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
+    run_pipeline(only=set(args.stages), force=args.force, dry_run=args.dry_run)
+    print("✅ Pipeline complete.")
+
+
+if __name__ == "__main__":
+    main()
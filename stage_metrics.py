@@ -0,0 +1,95 @@
+import json
+import os
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+
+import pipeline_paths
+
+# One JSON object per stage run is appended here. Stages launched by
+# run_pipeline.py share the PIPELINE_RUN_ID of that run.
+METRICS_FILE = os.environ.get("PIPELINE_METRICS_FILE", os.path.join(pipeline_paths.BASE_DIR, "pipeline_metrics.jsonl"))
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    """Peak resident memory of this process so far (kB on Linux, bytes on macOS).
+
+    With RUSAGE_CHILDREN, the largest peak of any child process that has
+    been waited for, e.g. the workers of a process pool that has shut down.
+    """
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def children_cpu_s():
+    """CPU time (user + system) of every child process waited for so far."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class StageMetrics:
+    """Record wall time, CPU time, peak RSS and row counts for the phases of a stage.
+
+    Phases run one after another: start() opens a phase (closing the
+    previous one), stop() closes it with optional input/output row counts,
+    and finish() appends the whole record to METRICS_FILE. Work done in
+    worker processes (sharded XML parsing, parallel merges) is reported
+    separately as children_cpu_s and children_peak_rss_mb; children are
+    counted once they have exited, so a phase covers the pools it shut down.
+    """
+
+    def __init__(self, stage, metrics_file=None):
+        self.stage = stage
+        self.metrics_file = metrics_file or METRICS_FILE
+        self.phases = []
+        self._current = None
+        self._started = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self._children_cpu0 = children_cpu_s()
+
+    def start(self, name):
+        if self._current is not None:
+            self.stop()
+        self._current = {
+            "phase": name,
+            "_wall": time.perf_counter(),
+            "_cpu": time.process_time(),
+            "_children_cpu": children_cpu_s(),
+        }
+
+    def stop(self, rows_in=None, rows_out=None):
+        phase = self._current
+        if phase is None:
+            return
+        self._current = None
+        self.phases.append({
+            "phase": phase["phase"],
+            "wall_s": round(time.perf_counter() - phase["_wall"], 4),
+            "cpu_s": round(time.process_time() - phase["_cpu"], 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "children_cpu_s": round(children_cpu_s() - phase["_children_cpu"], 4),
+            "children_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+            "rows_in": rows_in,
+            "rows_out": rows_out,
+        })
+
+    def finish(self):
+        """Close the open phase and append this run's record to the metrics file."""
+        self.stop()
+        record = {
+            "run_id": os.environ.get("PIPELINE_RUN_ID"),
+            "stage": self.stage,
+            "started": self._started,
+            "wall_s": round(time.perf_counter() - self._wall0, 4),
+            "cpu_s": round(time.process_time() - self._cpu0, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "children_cpu_s": round(children_cpu_s() - self._children_cpu0, 4),
+            "children_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+            "phases": self.phases,
+        }
+        os.makedirs(os.path.dirname(self.metrics_file), exist_ok=True)
+        with open(self.metrics_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        return record
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import os
+import random
+from xml.sax.saxutils import escape
+
+import pipeline_paths
+
+# =====================
+# CONFIGURATION
+# =====================
+# Approximate sizes of the real downloads; --scale multiplies every entry.
+SCALE_1X = {
+    "disorders": 11000,               # OrphaCode universe
+    "genes": 4600,                    # HGNC symbols with an Orphanet association
+    "gene_assoc_disorders": 4200,     # genes_associated_ds.xml
+    "natural_history_disorders": 9500,
+    "epidemiology_disorders": 6000,
+    "neurological_nodes": 3000,
+    "genetic_nodes": 6500,
+    "metabolic_nodes": 1400,
+    "clingen_curations": 3000,
+    "mgi_rows": 8000,
+    "zfin_orthology_rows": 12000,
+    "zfin_fish_models": 10000,
+    "do_terms": 2500,
+}
+
+XML_DECLARATION = '<?xml version="1.0" encoding="ISO-8859-1"?>\n'
+XML_ENCODING = "iso-8859-1"
+
+DISORDER_GROUPS = {
+    "36540": ("Group of disorders", ["21436", "21394"]),
+    "36547": ("Disorder", ["21394", "21422", "21415", "21401"]),
+    "36554": ("Subtype of disorder", ["21450", "21443", "21394"]),
+}
+DISORDER_TYPES = {
+    "21436": "Clinical group", "21394": "Disease", "21422": "Clinical syndrome",
+    "21415": "Morphological anomaly", "21401": "Malformation syndrome",
+    "21450": "Clinical subtype", "21443": "Etiological subtype",
+}
+ASSOCIATION_TYPES = [
+    ("17949", "Disease-causing germline mutation(s) in", 60),
+    ("25972", "Disease-causing germline mutation(s) (loss of function) in", 12),
+    ("25979", "Disease-causing germline mutation(s) (gain of function) in", 4),
+    ("17956", "Disease-causing somatic mutation(s) in", 4),
+    ("17963", "Modifying germline mutation in", 3),
+    ("17970", "Part of a fusion gene in", 2),
+    ("17977", "Major susceptibility factor in", 4),
+    ("17984", "Candidate gene tested in", 7),
+    ("17991", "Role in the phenotype of", 3),
+    ("25986", "Biomarker tested in", 1),
+]
+ASSOCIATION_STATUSES = [("17991", "Assessed", 92), ("17998", "Not yet assessed", 8)]
+INHERITANCE_TYPES = [
+    ("23410", "Autosomal dominant", 30), ("23417", "Autosomal recessive", 40),
+    ("23445", "X-linked dominant", 3), ("23431", "X-linked recessive", 6),
+    ("23473", "Y-linked", 1), ("23466", "Semi-dominant", 1),
+    ("23438", "Mitochondrial inheritance", 3), ("23424", "Multigenic/multifactorial", 5),
+    ("23459", "Oligogenic", 1), ("23487", "No data available", 5),
+    ("23494", "Not applicable", 3), ("23501", "Not yet documented", 2),
+]
+ONSETS = ["Antenatal", "Neonatal", "Infancy", "Childhood", "Adolescent", "Adult", "Elderly", "All ages"]
+PREVALENCE_TYPES = ["Point prevalence", "Birth prevalence", "Lifetime Prevalence", "Annual incidence", "Cases/families"]
+PREVALENCE_CLASSES = ["<1 / 1 000 000", "1-9 / 1 000 000", "1-9 / 100 000", "1-5 / 10 000", "6-9 / 10 000", ">1 / 1000", "Unknown"]
+GEOGRAPHIC_AREAS = ["Worldwide", "Europe", "United States", "France", "Japan", "Finland"]
+CLINGEN_CLASSIFICATIONS = [("Definitive", 45), ("Strong", 10), ("Moderate", 15), ("Limited", 20), ("Disputed", 5), ("Refuted", 2), ("No Known Disease Relationship", 3)]
+CLINGEN_MOI = ["AD", "AR", "XL", "SD", "MT", "UD"]
+
+
+# =====================
+# FUNCTIONS
+# =====================
+def weighted(rng, choices):
+    """Pick from (..., weight) tuples."""
+    return rng.choices(choices, weights=[c[-1] for c in choices])[0]
+
+
+def sizes_for(scale):
+    return {key: max(1, int(round(value * scale))) for key, value in SCALE_1X.items()}
+
+
+def expert_link(code):
+    return f"http://www.orpha.net/consor/cgi-bin/OC_Exp.php?lng=en&amp;Expert={code}"
+
+
+def disorder_header(rng, code, disorder_id):
+    """Common OrphaCode/ExpertLink/Name/DisorderType/DisorderGroup block."""
+    group_id = rng.choice(list(DISORDER_GROUPS))
+    group_name, type_ids = DISORDER_GROUPS[group_id]
+    type_id = rng.choice(type_ids)
+    return (
+        f'    <Disorder id="{disorder_id}">\n'
+        f"      <OrphaCode>{code}</OrphaCode>\n"
+        f'      <ExpertLink lang="en">{expert_link(code)}</ExpertLink>\n'
+        f'      <Name lang="en">{escape(synthetic_name(rng, code))}</Name>\n'
+        f'      <DisorderType id="{type_id}">\n        <Name lang="en">{DISORDER_TYPES[type_id]}</Name>\n      </DisorderType>\n'
+        f'      <DisorderGroup id="{group_id}">\n        <Name lang="en">{group_name}</Name>\n      </DisorderGroup>\n'
+    )
+
+
+def synthetic_name(rng, code):
+    words = ["syndrome", "disease", "dysplasia", "deficiency", "encephalopathy", "ataxia", "myopathy", "neuropathy"]
+    return f"Synthetic {rng.choice(words)} type {code} & variant"
+
+
+def open_xml(path, list_tag, count):
+    f = open(path, "w", encoding=XML_ENCODING, errors="xmlcharrefreplace")
+    f.write(XML_DECLARATION)
+    f.write('<JDBOR date="2025-01-01 00:00:00" version="1.3.30 / 4.1.7" copyright="Orphanet (c) 2025">\n')
+    f.write('  <Availability>\n    <Licence>\n      <FullName lang="en">Creative Commons Attribution 4.0 International</FullName>\n    </Licence>\n  </Availability>\n')
+    f.write(f'  <{list_tag} count="{count}">\n')
+    return f
+
+
+def close_xml(f, list_tag):
+    f.write(f"  </{list_tag}>\n</JDBOR>\n")
+    f.close()
+
+
+def write_genes_associated(path, rng, codes, genes):
+    f = open_xml(path, "DisorderList", len(codes))
+    for i, code in enumerate(codes, start=1):
+        f.write(disorder_header(rng, code, i))
+        n_assoc = rng.choices([1, 2, 3, 5, 12], weights=[70, 15, 8, 5, 2])[0]
+        f.write(f'      <DisorderGeneAssociationList count="{n_assoc}">\n')
+        for _ in range(n_assoc):
+            symbol = rng.choice(genes)
+            type_id, type_name, _ = weighted(rng, ASSOCIATION_TYPES)
+            status_id, status_name, _ = weighted(rng, ASSOCIATION_STATUSES)
+            refs = [("OMIM", str(rng.randint(100000, 699999))), ("Ensembl", f"ENSG{rng.randint(0, 99999999):011d}"),
+                    ("HGNC", str(rng.randint(1, 60000))), ("SwissProt", f"P{rng.randint(10000, 99999)}")]
+            refs = rng.sample(refs, rng.randint(1, len(refs)))
+            has_locus = rng.random() < 0.95
+            f.write("        <DisorderGeneAssociation>\n")
+            f.write(f"          <SourceOfValidation>{rng.randint(1000000, 39999999)}[PMID]</SourceOfValidation>\n")
+            f.write(f'          <Gene id="{rng.randint(1, 999999)}">\n')
+            f.write(f'            <Name lang="en">synthetic gene {symbol.lower()}</Name>\n')
+            f.write(f"            <Symbol>{symbol}</Symbol>\n")
+            f.write('            <SynonymList count="0">\n            </SynonymList>\n')
+            f.write('            <GeneType id="25993">\n              <Name lang="en">gene with protein product</Name>\n            </GeneType>\n')
+            f.write(f'            <ExternalReferenceList count="{len(refs)}">\n')
+            for k, (source, reference) in enumerate(refs):
+                f.write(f'              <ExternalReference id="{k}">\n                <Source>{source}</Source>\n                <Reference>{reference}</Reference>\n              </ExternalReference>\n')
+            f.write("            </ExternalReferenceList>\n")
+            if has_locus:
+                f.write(f'            <LocusList count="1">\n              <Locus id="{rng.randint(1, 99999)}">\n                <GeneLocus>{rng.randint(1, 22)}{rng.choice("pq")}{rng.randint(11, 36)}.{rng.randint(1, 3)}</GeneLocus>\n                <LocusKey>1</LocusKey>\n              </Locus>\n            </LocusList>\n')
+            else:
+                f.write('            <LocusList count="0">\n            </LocusList>\n')
+            f.write("          </Gene>\n")
+            f.write(f'          <DisorderGeneAssociationType id="{type_id}">\n            <Name lang="en">{type_name}</Name>\n          </DisorderGeneAssociationType>\n')
+            f.write(f'          <DisorderGeneAssociationStatus id="{status_id}">\n            <Name lang="en">{status_name}</Name>\n          </DisorderGeneAssociationStatus>\n')
+            f.write("        </DisorderGeneAssociation>\n")
+        f.write("      </DisorderGeneAssociationList>\n    </Disorder>\n")
+    close_xml(f, "DisorderList")
+
+
+def write_natural_history(path, rng, codes):
+    f = open_xml(path, "DisorderList", len(codes))
+    for i, code in enumerate(codes, start=1):
+        f.write(disorder_header(rng, code, i))
+        onsets = rng.sample(ONSETS, rng.choices([0, 1, 2, 3], weights=[20, 45, 25, 10])[0])
+        f.write(f'      <AverageAgeOfOnsetList count="{len(onsets)}">\n')
+        for onset in onsets:
+            f.write(f'        <AverageAgeOfOnset id="{ONSETS.index(onset) + 409940}">\n          <Name lang="en">{onset}</Name>\n        </AverageAgeOfOnset>\n')
+        f.write("      </AverageAgeOfOnsetList>\n")
+        n_inh = rng.choices([0, 1, 2, 3], weights=[15, 60, 20, 5])[0]
+        inheritance = {weighted(rng, INHERITANCE_TYPES)[:2] for _ in range(n_inh)}
+        f.write(f'      <TypeOfInheritanceList count="{len(inheritance)}">\n')
+        for inh_id, inh_name in sorted(inheritance):
+            f.write(f'        <TypeOfInheritance id="{inh_id}">\n          <Name lang="en">{inh_name}</Name>\n        </TypeOfInheritance>\n')
+        f.write("      </TypeOfInheritanceList>\n    </Disorder>\n")
+    close_xml(f, "DisorderList")
+
+
+def write_epidemiology(path, rng, codes):
+    f = open_xml(path, "DisorderList", len(codes))
+    for i, code in enumerate(codes, start=1):
+        f.write(disorder_header(rng, code, i))
+        n_prev = rng.choices([1, 2, 3, 6], weights=[50, 25, 15, 10])[0]
+        f.write(f'      <PrevalenceList count="{n_prev}">\n')
+        for k in range(n_prev):
+            value = rng.choice(["0.0", "0.01", "0.5", "1.2", "3.5", "12.0", "45.0"])
+            validated = "Validated" if rng.random() < 0.8 else "Not yet validated"
+            f.write(f'        <Prevalence id="{i * 10 + k}">\n')
+            f.write(f"          <Source>{rng.randint(1000000, 39999999)}[PMID]</Source>\n")
+            f.write(f'          <PrevalenceType id="1">\n            <Name lang="en">{rng.choice(PREVALENCE_TYPES)}</Name>\n          </PrevalenceType>\n')
+            f.write('          <PrevalenceQualification id="2">\n            <Name lang="en">Value and class</Name>\n          </PrevalenceQualification>\n')
+            f.write(f'          <PrevalenceClass id="3">\n            <Name lang="en">{escape(rng.choice(PREVALENCE_CLASSES))}</Name>\n          </PrevalenceClass>\n')
+            f.write(f"          <ValMoy>{value}</ValMoy>\n")
+            f.write(f'          <PrevalenceGeographic id="4">\n            <Name lang="en">{rng.choice(GEOGRAPHIC_AREAS)}</Name>\n          </PrevalenceGeographic>\n')
+            f.write(f'          <PrevalenceValidationStatus id="5">\n            <Name lang="en">{validated}</Name>\n          </PrevalenceValidationStatus>\n')
+            f.write("        </Prevalence>\n")
+        f.write("      </PrevalenceList>\n    </Disorder>\n")
+    close_xml(f, "DisorderList")
+
+
+def write_classification(path, rng, codes, name):
+    """Write a nested classification tree; some disorders appear more than once."""
+    f = open(path, "w", encoding=XML_ENCODING, errors="xmlcharrefreplace")
+    f.write(XML_DECLARATION)
+    f.write('<JDBOR date="2025-01-01 00:00:00" version="1.3.30 / 4.1.7" copyright="Orphanet (c) 2025">\n')
+    f.write(f'  <ClassificationList count="1">\n    <Classification id="1">\n      <OrphaNumber>1</OrphaNumber>\n      <Name lang="en">{escape(name)}</Name>\n')
+    f.write('      <ClassificationNodeRootList count="1">\n')
+
+    def node(code, depth):
+        indent = "  " * (4 + depth)
+        f.write(f"{indent}<ClassificationNode>\n")
+        f.write(f'{indent}  <Disorder id="{code}">\n{indent}    <OrphaCode>{code}</OrphaCode>\n')
+        f.write(f'{indent}    <ExpertLink lang="en">{expert_link(code)}</ExpertLink>\n')
+        f.write(f'{indent}    <Name lang="en">{escape(synthetic_name(rng, code))}</Name>\n')
+        f.write(f'{indent}    <DisorderType id="21394">\n{indent}      <Name lang="en">Disease</Name>\n{indent}    </DisorderType>\n')
+        f.write(f"{indent}  </Disorder>\n")
+        children = rng.sample(codes, rng.randint(1, 3)) if depth < 3 and rng.random() < 0.15 else []
+        f.write(f'{indent}  <ClassificationNodeChildList count="{len(children)}">\n')
+        for child in children:
+            node(child, depth + 1)
+        f.write(f"{indent}  </ClassificationNodeChildList>\n{indent}</ClassificationNode>\n")
+
+    for code in codes:
+        node(code, 0)
+    f.write("      </ClassificationNodeRootList>\n    </Classification>\n  </ClassificationList>\n</JDBOR>\n")
+    f.close()
+
+
+def write_clingen(path, rng, genes, n):
+    header = ["GENE SYMBOL", "GENE ID (HGNC)", "DISEASE LABEL", "DISEASE ID (MONDO)", "MOI", "SOP",
+              "CLASSIFICATION", "ONLINE REPORT", "CLASSIFICATION DATE", "GCEP"]
+    pad = [""] * (len(header) - 1)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(["CLINGEN GENE DISEASE VALIDITY CURATIONS"] + pad)
+        writer.writerow(["FILE CREATED: 2025-01-01"] + pad)
+        writer.writerow(["WEBPAGE: https://search.clinicalgenome.org/kb/gene-validity"] + pad)
+        writer.writerow(["+" * 10] * len(header))
+        writer.writerow(header)
+        writer.writerow(["+" * 10] * len(header))
+        for i in range(n):
+            symbol = rng.choice(genes)
+            writer.writerow([
+                symbol, f"HGNC:{rng.randint(1, 60000)}", f"{symbol}-related disorder", f"MONDO:{rng.randint(1, 999999):07d}",
+                rng.choice(CLINGEN_MOI), f"SOP{rng.randint(4, 11)}", weighted(rng, CLINGEN_CLASSIFICATIONS)[0],
+                f"https://search.clinicalgenome.org/kb/gene-validity/CGGV:{i}", "2024-01-01T00:00:00.000Z", "Synthetic GCEP",
+            ])
+
+
+def write_mgi(path, rng, genes, n):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write("DiseaseTerm\tMouseHomologs\tHumanHomologs\tMouseModels\tHomologySource\n")
+        for i in range(n):
+            human = rng.sample(genes, rng.choices([1, 2, 3], weights=[80, 15, 5])[0])
+            separator = rng.choice(["|", ", "])
+            mouse = separator.join(g.capitalize() for g in human)
+            f.write(f"synthetic disease {i}\t{mouse}\t{separator.join(human)}\t{rng.choice([0, 0, 1, 2, 5, 12])}\tHGNC\n")
+
+
+def write_zfin(orthology_path, fish_path, rng, genes, sizes):
+    do_terms = [f"DOID:{rng.randint(1, 9999999)}" for _ in range(sizes["do_terms"])]
+    omim = {term: str(rng.randint(100000, 699999)) for term in do_terms}
+    with open(orthology_path, "w", encoding="utf-8") as f:
+        f.write("ZFINGeneID\tZFINGeneSymbol\tHumanOrthologSymbol\tHumanGeneID\tDOTermID\tDOTermName\tOMIMTermName\tOMIMID\tEvidenceCode\tPublication\n")
+        for i in range(sizes["zfin_orthology_rows"]):
+            symbol = rng.choice(genes)
+            term = rng.choice(do_terms)
+            f.write(f"ZDB-GENE-{i:06d}\t{symbol.lower()}\t{symbol}\t{rng.randint(1, 99999)}\t{term}\tdisease of {term}\t"
+                    f"synthetic omim {omim[term]}\tOMIM:{omim[term]}\tIEA\tZDB-PUB-{i}\n")
+    with open(fish_path, "w", encoding="utf-8") as f:
+        f.write("FishZDBID\tFishName\tStandardEnvironment\tConditionName\tis_a_model\tDOTermName\tDOTermID\tPublicationZDBID\tPubMedID\tEvidenceCode\n")
+        for i in range(sizes["zfin_fish_models"]):
+            term = rng.choice(do_terms)
+            f.write(f"ZDB-FISH-{i:06d}\tsynthetic fish {i}\tTRUE\tstandard conditions\t{rng.choice(['is_a_model', 'is_a_model', 'is_not_a_model'])}\t"
+                    f"disease of {term}\t{term}\tZDB-PUB-{i}\t{rng.randint(1000000, 39999999)}\tTAS\n")
+
+
+def write_lines(path, values):
+    with open(path, "w", encoding="utf-8") as f:
+        for value in values:
+            f.write(f"{value}\n")
+
+
+def generate(base_dir, scale=1.0, seed=0):
+    """Write a schema-faithful synthetic copy of every pipeline input under base_dir."""
+    rng = random.Random(seed)
+    sizes = sizes_for(scale)
+
+    def rel(path):
+        return os.path.join(base_dir, os.path.relpath(path, pipeline_paths.BASE_DIR))
+
+    for folder in [rel(pipeline_paths.RAW_DIR), rel(pipeline_paths.MGI_DIR), rel(pipeline_paths.ZFIN_DIR),
+                   rel(pipeline_paths.CLINGEN_DIR), rel(pipeline_paths.CLINICAL_TRIALS_DIR)]:
+        os.makedirs(folder, exist_ok=True)
+
+    codes = rng.sample(range(1, max(1000000, sizes["disorders"] * 4)), sizes["disorders"])
+    genes = [f"SYN{i}" for i in range(sizes["genes"])]
+
+    # Neurological/genetic/metabolic overlap enough to give a sizeable Tier1
+    pool = codes[: sizes["gene_assoc_disorders"]]
+    classification = {
+        pipeline_paths.NEUROLOGICAL_XML: ("Orphanet classification of rare neurological diseases", sizes["neurological_nodes"]),
+        pipeline_paths.GENETIC_XML: ("Orphanet classification of rare genetic diseases", sizes["genetic_nodes"]),
+        pipeline_paths.METABOLIC_XML: ("Orphanet classification of rare inborn errors of metabolism", sizes["metabolic_nodes"]),
+    }
+    for path, (name, n) in classification.items():
+        subset = rng.sample(pool, n) if n <= len(pool) else rng.sample(codes, n)
+        write_classification(rel(path), rng, subset, name)
+
+    write_genes_associated(rel(pipeline_paths.GENE_ASSOC_XML), rng, codes[: sizes["gene_assoc_disorders"]], genes)
+    write_natural_history(rel(pipeline_paths.NATURAL_HISTORY_XML), rng, rng.sample(codes, sizes["natural_history_disorders"]))
+    epidemiology_codes = rng.sample(codes, sizes["epidemiology_disorders"])
+    write_epidemiology(rel(pipeline_paths.EPIDEMIOLOGY_XML), rng, epidemiology_codes)
+
+    write_clingen(rel(pipeline_paths.CLINGEN_CSV), rng, genes, sizes["clingen_curations"])
+    write_mgi(rel(pipeline_paths.MGI_TXT), rng, genes, sizes["mgi_rows"])
+    write_zfin(rel(pipeline_paths.ZFIN_GENE_DISEASE_TXT), rel(pipeline_paths.ZFIN_FISH_MODEL_TXT), rng, genes, sizes)
+
+    # Hand-curated lists that no stage produces
+    write_lines(rel(os.path.join(pipeline_paths.NATURAL_HISTORY_DIR, "included_inheritance_genesymbols.txt")),
+                sorted(rng.sample(genes, max(1, len(genes) // 10))))
+    half = max(1, len(epidemiology_codes) // 2)
+    write_lines(rel(os.path.join(pipeline_paths.CLINICAL_TRIALS_DIR, "tableA_orphacodes.txt")), sorted(rng.sample(epidemiology_codes, half)))
+    write_lines(rel(os.path.join(pipeline_paths.CLINICAL_TRIALS_DIR, "tableB_orphacodes.txt")), sorted(rng.sample(epidemiology_codes, half)))
+
+    return sizes
+
+
+# =====================
+# MAIN
+# =====================
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Orphanet/ClinGen/MGI/ZFIN inputs.")
+    parser.add_argument("base_dir", help="directory laid out like NEUROMETABOLIC_BASE_DIR")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiple of the real release sizes (e.g. 1, 10, 100)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = generate(args.base_dir, scale=args.scale, seed=args.seed)
+    print(f"✅ Synthetic datasets ({args.scale:g}×) written to: {args.base_dir}")
+    for key, value in sizes.items():
+        print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import synthetic_data  # noqa: E402
+
+# Small enough to run in seconds, large enough for every stage to match something
+SYNTHETIC_SCALE = 0.3
+
+
+@pytest.fixture(scope="session")
+def synthetic_tree(tmp_path_factory):
+    """A synthetic copy of every pipeline input (see synthetic_data.py)."""
+    base_dir = str(tmp_path_factory.mktemp("synthetic"))
+    synthetic_data.generate(base_dir, scale=SYNTHETIC_SCALE, seed=0)
+    return base_dir
+
+
+def tree_path(base_dir, path):
+    """Map a path under the configured BASE_DIR into another tree."""
+    import pipeline_paths
+    return os.path.join(base_dir, os.path.relpath(path, pipeline_paths.BASE_DIR))
+
+
+def run_script(base_dir, script, *args):
+    """Run a pipeline script against another tree and return its stdout."""
+    env = dict(os.environ, NEUROMETABOLIC_BASE_DIR=base_dir, MPLBACKEND="Agg")
+    result = subprocess.run([sys.executable, script, *args], cwd=REPO_DIR, env=env,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result.stdout
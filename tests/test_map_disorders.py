@@ -0,0 +1,118 @@
+import gzip
+import random
+import shutil
+
+import pytest
+
+import epidemiology
+import gene_association_table
+import natural_history
+import orphanet_xml
+import pipeline_paths
+from conftest import tree_path
+from orphacode_set import OrphaCodeSet
+from orphanet_xml import iter_disorders, map_disorders, shard_ranges
+
+RELEASES = [
+    (pipeline_paths.GENE_ASSOC_XML, gene_association_table.parse_disorder),
+    (pipeline_paths.NATURAL_HISTORY_XML, natural_history.parse_disorder),
+    (pipeline_paths.EPIDEMIOLOGY_XML, epidemiology.parse_disorder),
+]
+WORKERS = 3
+
+
+@pytest.fixture(autouse=True)
+def shard_small_files(monkeypatch):
+    # The synthetic releases are far below the size that is normally sharded
+    monkeypatch.setattr(orphanet_xml, "SHARD_MIN_BYTES", 0)
+
+
+def release_codes(path):
+    return [orphanet_xml._ORPHA_CODE(disorder).strip() for disorder in iter_disorders(path)]
+
+
+def sample_codes(path, fraction=0.1, seed=0):
+    codes = release_codes(path)
+    return set(random.Random(seed).sample(codes, max(1, int(len(codes) * fraction))))
+
+
+def test_shard_ranges_cover_the_disorder_list(synthetic_tree):
+    path = tree_path(synthetic_tree, pipeline_paths.NATURAL_HISTORY_XML)
+    prolog, ranges = shard_ranges(path, 7)
+
+    with open(path, "rb") as f:
+        data = f.read()
+    assert prolog == data[:data.index(b"?>") + 2]
+    assert len(ranges) == 7
+    assert ranges[0][0] == data.index(b">", data.index(b"<DisorderList")) + 1
+    assert ranges[-1][1] == data.rindex(b"</DisorderList>")
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start and data.startswith(b"<Disorder ", start)
+
+
+@pytest.mark.parametrize("release, parse", RELEASES)
+def test_sharded_parsing_matches_sequential(synthetic_tree, release, parse):
+    path = tree_path(synthetic_tree, release)
+    codes = sample_codes(path)
+    for orphacodes in (None, codes):
+        sequential = map_disorders(path, parse, orphacodes, workers=1, prefilter=False)
+        sharded = map_disorders(path, parse, orphacodes, workers=WORKERS, prefilter=False)
+        assert sharded == sequential
+    assert sequential[0] == len(release_codes(path))
+    assert len(sequential[1]) == len(codes)
+
+
+def test_compressed_releases_are_parsed_sequentially(synthetic_tree, tmp_path):
+    path = tree_path(synthetic_tree, pipeline_paths.NATURAL_HISTORY_XML)
+    compressed = str(tmp_path / "natural_history_ds.xml.gz")
+    with open(path, "rb") as src, gzip.open(compressed, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+
+    expected = map_disorders(path, natural_history.parse_disorder, workers=1, prefilter=False)
+    assert map_disorders(compressed, natural_history.parse_disorder, workers=WORKERS, prefilter=False) == expected
+
+
+@pytest.mark.parametrize("release, parse", RELEASES)
+@pytest.mark.parametrize("workers", [1, WORKERS])
+def test_prefilter_matches_full_parsing(synthetic_tree, release, parse, workers):
+    path = tree_path(synthetic_tree, release)
+    codes = sample_codes(path, seed=workers)
+    expected = map_disorders(path, parse, codes, workers=1, prefilter=False)
+    assert map_disorders(path, parse, codes, workers=workers, prefilter=True) == expected
+    assert map_disorders(path, parse, OrphaCodeSet(codes), workers=workers, prefilter=True) == expected
+
+
+def test_prefilter_reads_compressed_releases(synthetic_tree, tmp_path):
+    path = tree_path(synthetic_tree, pipeline_paths.EPIDEMIOLOGY_XML)
+    compressed = str(tmp_path / "epidemiology_ds.xml.gz")
+    with open(path, "rb") as src, gzip.open(compressed, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+
+    codes = sample_codes(path)
+    expected = map_disorders(path, epidemiology.parse_disorder, codes, workers=1, prefilter=False)
+    assert map_disorders(compressed, epidemiology.parse_disorder, codes, prefilter=True) == expected
+
+
+def test_prefilter_parses_disorders_without_a_leading_orphacode(tmp_path, monkeypatch):
+    # Chunks far smaller than a disorder exercise the reads across chunk boundaries
+    monkeypatch.setattr(orphanet_xml, "PREFILTER_CHUNK_BYTES", 7)
+    path = tmp_path / "release.xml"
+    path.write_bytes(
+        b'<?xml version="1.0" encoding="ISO-8859-1"?>\n<JDBOR><DisorderList count="3">'
+        b'<Disorder id="1"><OrphaCode>1</OrphaCode><Name lang="en">one \xe9</Name></Disorder>'
+        b'<Disorder id="2"><Name lang="en">two</Name><OrphaCode> 2 </OrphaCode></Disorder>'
+        b'<Disorder id="3"><OrphaCode>3</OrphaCode><Name lang="en">three</Name></Disorder>'
+        b'</DisorderList><DisorderList><Disorder id="4"><OrphaCode>1</OrphaCode></Disorder></DisorderList></JDBOR>'
+    )
+    for codes in ({"1", "2"}, {"3"}, set()):
+        expected = map_disorders(str(path), name_of, codes, workers=1, prefilter=False)
+        assert map_disorders(str(path), name_of, codes, workers=1, prefilter=True) == expected
+    assert expected[0] == 3
+    assert map_disorders(str(path), name_of, {"1", "2"}, prefilter=True)[1] == ["one \xe9", "two"]
+
+
+def name_of(disorder):
+    return NAME(disorder)
+
+
+NAME = orphanet_xml.text_query("Name")
@@ -0,0 +1,65 @@
+import numpy as np
+
+import merge_neuro_ime_genetic as merge
+
+XML = """<?xml version="1.0" encoding="UTF-8"?>
+<JDBOR>
+  <DisorderList count="2">
+    <Disorder id="1">
+      <OrphaCode>166024</OrphaCode>
+      <Name lang="en">Multiple epiphyseal dysplasia, Al-Gazali type</Name>
+      <ExpertLink lang="en">http://www.orpha.net/166024</ExpertLink>
+      <ClassificationNodeChildList>
+        <ClassificationNode>
+          <Disorder id="2">
+            <OrphaCode>ORPHA-X</OrphaCode>
+            <Name lang="en">Syndrome de Lévy–Hollister</Name>
+            <ExpertLink lang="en"></ExpertLink>
+          </Disorder>
+        </ClassificationNode>
+      </ClassificationNodeChildList>
+    </Disorder>
+    <Disorder id="3">
+      <OrphaCode>007</OrphaCode>
+      <Name lang="en">Leading zero</Name>
+    </Disorder>
+    <Disorder id="4">
+      <OrphaCode>166024</OrphaCode>
+      <Name lang="en">Listed again under another parent</Name>
+    </Disorder>
+    <Disorder id="5">
+      <OrphaCode>58</OrphaCode>
+      <Name lang="en">Alexander disease</Name>
+      <ExpertLink lang="en">http://www.orpha.net/58</ExpertLink>
+    </Disorder>
+  </DisorderList>
+</JDBOR>
+"""
+
+
+def test_parse_xml_columns_is_compact_and_round_trips(tmp_path):
+    path = tmp_path / "classification.xml"
+    path.write_text(XML, encoding="utf-8")
+
+    codes, text_codes, names, links = merge.parse_xml_columns(str(path))
+    assert codes.dtype == np.int32
+    # disorders are read as they close, so a nested one comes before its parent
+    assert codes.tolist() == [-1, 166024, -1, 58]
+    assert text_codes == {0: "ORPHA-X", 2: "007"}
+    assert isinstance(names[0], bytes) and names[1].dtype == np.int64
+
+    frame = merge.parse_xml(str(path))
+    assert frame.columns.tolist() == merge.COLUMNS
+    assert frame["OrphaCode"].tolist() == ["ORPHA-X", "166024", "007", "58"]
+    assert frame["Name"].tolist() == [
+        "Syndrome de Lévy–Hollister", "Multiple epiphyseal dysplasia, Al-Gazali type",
+        "Leading zero", "Alexander disease",
+    ]
+    assert frame["ExpertLink"].tolist() == ["", "http://www.orpha.net/166024", "", "http://www.orpha.net/58"]
+    assert set(frame["SourceFile"]) == {"classification.xml"}
+
+
+def test_pack_strings_round_trips():
+    values = ["", "a", "é漢字", "", "x" * 1000]
+    assert merge.unpack_strings(merge.pack_strings(values)) == values
+    assert merge.unpack_strings(merge.pack_strings([])) == []
@@ -0,0 +1,81 @@
+import random
+
+import numpy as np
+import pandas as pd
+
+from orphacode_set import MAX_BITSET_CODE, OrphaCodeSet, membership_counts, to_code_array
+
+
+def random_codes(rng, n, high=1_000_000):
+    return {rng.randrange(high) for _ in range(n)}
+
+
+def test_membership_matches_python_sets():
+    rng = random.Random(0)
+    codes = random_codes(rng, 2000)
+    bitset = OrphaCodeSet(str(code) for code in codes)
+    probes = [str(code) for code in random_codes(rng, 2000) | set(list(codes)[:500])]
+
+    assert len(bitset) == len(codes)
+    assert list(bitset) == [str(code) for code in sorted(codes)]
+    assert [code in bitset for code in probes] == [int(code) in codes for code in probes]
+    assert bitset.mask(pd.Series(probes)).tolist() == [int(code) in codes for code in probes]
+
+
+def test_stray_entries_are_kept_as_text():
+    bitset = OrphaCodeSet(["12", " 7 ", "", None, "ORPHA:3", "x", "-4", "1.5"])
+    assert list(bitset) == ["7", "12", "-4", "1.5", "ORPHA:3", "x"]
+    assert bitset.text_codes == {"-4", "1.5", "ORPHA:3", "x"} and len(bitset) == 6
+    assert to_code_array(["", "x", "-4", "1.5", "9"]).tolist() == [-1, -1, -1, -1, 9]
+    assert "x" in bitset and " ORPHA:3" in bitset and -4 in bitset
+    assert "" not in bitset and None not in bitset and 10 ** 9 not in bitset and "ORPHA:4" not in bitset
+    assert bitset.mask(["12", "", "x", "10000000", None, "y"]).tolist() == [True, False, True, False, False, False]
+    assert OrphaCodeSet(["12", "x"]).mask(pd.Series(["x", "12"], index=[5, 3])).tolist() == [True, True]
+
+
+def test_huge_codes_do_not_grow_the_bitset():
+    bitset = OrphaCodeSet(np.array([5, 10 ** 12, MAX_BITSET_CODE]))
+    assert bitset._words.nbytes == 1
+    assert bitset.to_array().tolist() == [5]
+    assert list(bitset) == ["5"] + sorted([str(10 ** 12), str(MAX_BITSET_CODE)])
+    assert 10 ** 12 in bitset and str(10 ** 12) in bitset and 10 ** 12 + 1 not in bitset
+    assert bitset.mask(np.array([10 ** 12, 5, 6])).tolist() == [True, True, False]
+
+
+def test_text_codes_take_part_in_set_algebra():
+    a, b = OrphaCodeSet(["1", "2", "x", "y"]), OrphaCodeSet(["2", "3", "y", "z"])
+    assert list(a & b) == ["2", "y"]
+    assert list(a | b) == ["1", "2", "3", "x", "y", "z"]
+    assert list(a - b) == ["1", "x"]
+    assert list(a ^ b) == ["1", "3", "x", "z"]
+    assert a != OrphaCodeSet(["1", "2"]) and OrphaCodeSet(a) == a
+    assert OrphaCodeSet(["x"]) and not OrphaCodeSet(["", None])
+
+    codes, counts = membership_counts([a, b])
+    assert codes.tolist() == [1, 2, 3, "x", "y", "z"]
+    assert counts.tolist() == [1, 2, 1, 1, 2, 1]
+
+
+def test_set_algebra_matches_python_sets():
+    rng = random.Random(1)
+    a, b = random_codes(rng, 500, 5000), random_codes(rng, 800, 20000)
+    sa, sb = OrphaCodeSet(a), OrphaCodeSet(b)
+
+    for result, expected in [(sa & sb, a & b), (sa | sb, a | b), (sa - sb, a - b), (sb - sa, b - a), (sa ^ sb, a ^ b)]:
+        assert result.to_array().tolist() == sorted(expected)
+    assert (sa | sb) == (sb | sa)
+    assert not OrphaCodeSet() and OrphaCodeSet() == OrphaCodeSet([])
+
+
+def test_membership_counts_match_python_sets():
+    rng = random.Random(2)
+    sets = [random_codes(rng, n, 3000) for n in (400, 900, 1500)]
+    codes, counts = membership_counts([OrphaCodeSet(s) for s in sets])
+
+    expected = {}
+    for s in sets:
+        for code in s:
+            expected[code] = expected.get(code, 0) + 1
+    assert codes.tolist() == sorted(expected)
+    assert counts.tolist() == [expected[code] for code in sorted(expected)]
+    assert np.array_equal(membership_counts([])[0], np.empty(0))
@@ -0,0 +1,83 @@
+import os
+
+import pandas as pd
+import pytest
+
+import pipeline_io
+from pipeline_io import PartitionedCSVWriter, columnar_path, read_table, save_csv
+
+
+@pytest.fixture
+def rows():
+    return pd.DataFrame({
+        "OrphaCode": [str(1000 + i) for i in range(300)],
+        "GeneSymbol": [f"G{i % 40}" if i % 7 else "" for i in range(300)],
+        "Note": ["" if i < 150 else f"n,{i}" for i in range(300)],
+        "AssocCount": [i % 5 for i in range(300)],
+    })
+
+
+def write_partitioned(paths, rows, batch_rows=16, chunk=23, **kwargs):
+    with PartitionedCSVWriter(paths, list(rows.columns), batch_rows=batch_rows,
+                              code_lists={"codes": paths["odd"][:-4] + ".txt"}, **kwargs) as writer:
+        for start in range(0, len(rows), chunk):
+            batch = rows.iloc[start:start + chunk]
+            odd = batch["AssocCount"] % 2 == 1
+            writer.write("odd", batch[odd])
+            writer.write("even", batch[~odd])
+            writer.add_codes("codes", batch.loc[odd, "OrphaCode"])
+    return writer
+
+
+def test_partitions_match_save_csv(tmp_path, rows):
+    paths = {"odd": str(tmp_path / "odd.csv"), "even": str(tmp_path / "even.csv"), "empty": str(tmp_path / "empty.csv")}
+    writer = write_partitioned(paths, rows)
+
+    odd = rows["AssocCount"] % 2 == 1
+    for name, expected in [("odd", rows[odd]), ("even", rows[~odd]), ("empty", rows.iloc[:0])]:
+        reference = str(tmp_path / f"reference_{name}.csv")
+        save_csv(expected, reference, columnar=False)
+        with open(paths[name], "rb") as a, open(reference, "rb") as b:
+            assert a.read() == b.read()
+        assert writer.rows[name] == len(expected)
+
+    with open(tmp_path / "odd.txt", encoding="utf-8") as f:
+        assert f.read().split() == sorted(set(rows.loc[odd, "OrphaCode"]))
+    assert writer.codes["codes"] == sorted(set(rows.loc[odd, "OrphaCode"]))
+
+
+@pytest.mark.skipif(not pipeline_io.HAVE_PYARROW, reason="needs pyarrow")
+def test_parquet_copies_match_the_csvs(tmp_path, rows):
+    paths = {"odd": str(tmp_path / "odd.csv"), "even": str(tmp_path / "even.csv"), "empty": str(tmp_path / "empty.csv")}
+    write_partitioned(paths, rows, columnar=True)
+
+    for name, path in paths.items():
+        assert os.path.exists(columnar_path(path))
+        typed = pd.read_parquet(columnar_path(path))
+        assert str(typed["OrphaCode"].dtype) == "int32"
+        if name != "empty":
+            assert isinstance(typed["GeneSymbol"].dtype, pd.CategoricalDtype)
+        from_parquet = read_table(path, keep_default_na=False).astype(str)
+        from_csv = pd.read_csv(path, dtype=str, keep_default_na=False)
+        assert from_parquet.equals(from_csv)
+
+
+@pytest.mark.skipif(not pipeline_io.HAVE_PYARROW, reason="needs pyarrow")
+def test_batches_that_do_not_fit_keep_the_csv_only(tmp_path, rows):
+    rows.loc[200, "OrphaCode"] = "ORPHA:1"
+    paths = {"odd": str(tmp_path / "odd.csv"), "even": str(tmp_path / "even.csv")}
+    write_partitioned(paths, rows, columnar=True)
+
+    # rows 0-199 went out in integer-coded batches before the odd code arrived
+    assert not os.path.exists(columnar_path(paths["even"]))
+    assert read_table(paths["even"], dtype=str, keep_default_na=False)["OrphaCode"].tolist() == \
+        rows.loc[rows["AssocCount"] % 2 == 0, "OrphaCode"].tolist()
+
+
+def test_stale_parquet_is_removed_without_columnar(tmp_path, rows):
+    paths = {"odd": str(tmp_path / "odd.csv"), "even": str(tmp_path / "even.csv")}
+    for path in paths.values():
+        with open(columnar_path(path), "wb") as f:
+            f.write(b"stale")
+    write_partitioned(paths, rows, columnar=False)
+    assert not any(os.path.exists(columnar_path(path)) for path in paths.values())
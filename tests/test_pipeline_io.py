@@ -0,0 +1,69 @@
+import bz2
+import gzip
+import lzma
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from pipeline_io import columnar_path, iter_table, open_input, read_table, resolve_input, save_csv
+
+COMPRESSORS = {".gz": gzip.compress, ".xz": lzma.compress, ".bz2": bz2.compress}
+DATA = b"".join(b"%d,ORPHA:%d,some repeated text\n" % (i, i * 7) for i in range(100_000))
+
+
+@pytest.mark.parametrize("suffix", sorted(COMPRESSORS))
+@pytest.mark.parametrize("threaded", [True, False])
+def test_compressed_inputs_read_like_the_plain_file(tmp_path, suffix, threaded):
+    path = tmp_path / "table.csv"
+    (tmp_path / ("table.csv" + suffix)).write_bytes(COMPRESSORS[suffix](DATA))
+
+    assert resolve_input(str(path)) == str(path) + suffix
+    with open_input(str(path), threaded=threaded) as f:
+        assert f.read() == DATA
+    with open_input(str(path), "rt", threaded=threaded) as f:
+        assert f.readline() == "0,ORPHA:0,some repeated text\n"
+
+
+@pytest.mark.parametrize("suffix", [".gz", ".xz"])
+def test_truncated_input_raises_on_every_read(tmp_path, suffix):
+    compressed = COMPRESSORS[suffix](DATA)
+    path = tmp_path / ("table.csv" + suffix)
+    path.write_bytes(compressed[:len(compressed) // 2])
+    errors = []
+
+    def drain():
+        with open_input(str(path)) as f:
+            for _ in range(3):
+                try:
+                    while f.read(1 << 16):
+                        pass
+                except (EOFError, lzma.LZMAError, OSError) as exc:
+                    errors.append(exc)
+
+    # A reader that loses the error blocks forever on its queue; run it in a
+    # thread so that shows up as a failure rather than a hung suite.
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    reader.join(timeout=30)
+    assert not reader.is_alive(), "read after a decompression error hung"
+    assert len(errors) == 3
+
+
+@pytest.mark.parametrize("columnar", [True, False])
+def test_iter_table_chunks_match_read_table(tmp_path, columnar):
+    path = str(tmp_path / "table.csv")
+    df = pd.DataFrame({
+        "OrphaCode": [str(i // 3) for i in range(1000)],
+        "GeneSymbol": ["" if i % 7 == 0 else f"G{i % 11}" for i in range(1000)],
+        "AssocCount": range(1000),
+    })
+    save_csv(df, path, columnar=columnar)
+    assert os.path.exists(columnar_path(path)) == columnar
+
+    chunks = list(iter_table(path, columns=["OrphaCode", "GeneSymbol"], keep_default_na=False, chunksize=128))
+    assert [len(c) for c in chunks] == [128] * 7 + [104]
+    whole = read_table(path, columns=["OrphaCode", "GeneSymbol"], keep_default_na=False)
+    streamed = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(streamed.astype(str), whole.astype(str))
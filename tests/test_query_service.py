@@ -0,0 +1,114 @@
+import csv
+import http.client
+import json
+import os
+import shutil
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import query_service
+from conftest import run_script, tree_path
+from query_service import QueryHandler, ResultIndex
+
+PATH_CONSTANTS = ["TIER_FILES", "MASTER_CSV", "GROUP_FILES", "CLINGEN_CSV",
+                  "INHERITANCE_FILES", "EPIDEMIOLOGY_CSV", "MODEL_FILES"]
+
+
+@pytest.fixture(scope="module")
+def pipeline_tree(synthetic_tree, tmp_path_factory):
+    """A synthetic tree with every pipeline stage run on it."""
+    base_dir = str(tmp_path_factory.mktemp("served") / "tree")
+    shutil.copytree(synthetic_tree, base_dir)
+    run_script(base_dir, "run_pipeline.py")
+    return base_dir
+
+
+@pytest.fixture
+def server(pipeline_tree, monkeypatch):
+    """The lookup service over pipeline_tree, on a free port, checking sources on every request."""
+    for name in PATH_CONSTANTS:
+        value = getattr(query_service, name)
+        if isinstance(value, dict):
+            value = {key: tree_path(pipeline_tree, path) for key, path in value.items()}
+        else:
+            value = tree_path(pipeline_tree, value)
+        monkeypatch.setattr(query_service, name, value)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), QueryHandler)
+    server.index = ResultIndex([tree_path(pipeline_tree, path) for path in query_service.SOURCES], check_interval=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def request(server, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=30)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def first_gene_row():
+    with open(query_service.GROUP_FILES["Group1_Strong"], newline="", encoding="utf-8") as f:
+        return next(row for row in csv.DictReader(f) if row["GeneSymbol"])
+
+
+def test_lookups(server):
+    row = first_gene_row()
+    code, symbol = row["OrphaCode"], row["GeneSymbol"]
+
+    status, disorder = request(server, "GET", f"/orphacode/ORPHA:{code}")
+    assert status == 200 and disorder["orphacode"] == code
+    assert "Group1_Strong" in disorder["association_groups"]
+    assert symbol in [gene["gene"] for gene in disorder["genes"]]
+
+    status, gene = request(server, "GET", f"/gene/{symbol.lower()}")
+    assert status == 200 and code in gene["orphacodes"]
+    assert code in [record["orphacode"] for record in gene["disorders"]]
+
+    assert request(server, "GET", "/orphacode/0")[0] == 404
+    assert request(server, "GET", "/nothing")[0] == 404
+    assert request(server, "GET", "/status")[1]["disorders"] > 0
+
+    body = json.dumps({"genes": [symbol, "NOT-A-GENE"], "orphacodes": [code]})
+    status, batch = request(server, "POST", "/batch", body)
+    assert status == 200
+    assert batch["genes"][symbol]["gene"] == gene["gene"] and batch["genes"]["NOT-A-GENE"] is None
+    assert batch["orphacodes"][code] == disorder
+
+
+def test_batch_rejects_bad_requests(server):
+    assert request(server, "POST", "/batch", "{}", {"Content-Length": "-1"})[0] == 400
+    assert request(server, "POST", "/batch", "{}", {"Content-Length": "two"})[0] == 400
+    too_long = str(query_service.MAX_BODY_BYTES + 1)
+    assert request(server, "POST", "/batch", "{}", {"Content-Length": too_long})[0] == 413
+    assert request(server, "POST", "/batch", "not json")[0] == 400
+    assert request(server, "POST", "/batch", json.dumps({"genes": "ABC"}))[0] == 400
+    keys = json.dumps({"orphacodes": ["1"] * (query_service.MAX_BATCH + 1)})
+    assert request(server, "POST", "/batch", keys)[0] == 413
+
+
+def test_changed_source_is_reloaded(server):
+    tier1 = query_service.TIER_FILES["tier1"]
+    with open(tier1, encoding="utf-8") as f:
+        original = f.read()
+    assert request(server, "GET", "/orphacode/9999002")[0] == 404
+    try:
+        with open(tier1, "a", encoding="utf-8") as f:
+            f.write("9999002\n")
+        mtime = os.stat(tier1).st_mtime_ns + 1_000_000_000
+        os.utime(tier1, ns=(mtime, mtime))
+
+        status, disorder = request(server, "GET", "/orphacode/9999002")
+        assert status == 200 and disorder["tier"] == "tier1"
+    finally:
+        with open(tier1, "w", encoding="utf-8") as f:
+            f.write(original)
@@ -0,0 +1,89 @@
+import copy
+import os
+import random
+import shutil
+import xml.etree.ElementTree as ET
+
+import pipeline_paths
+import release_diff
+import run_pipeline
+from conftest import run_script as run, tree_path
+
+DEFINITIVE = os.path.join(pipeline_paths.CLINGEN_DIR, "definitive_orphacodes.txt")
+TIER1 = os.path.join(pipeline_paths.MERGE_DIR, "tier1_all_three.txt")
+
+# Stages whose outputs release_diff keeps current: the two it patches and
+# the table stages it re-runs
+CHECKED_STAGES = {"gene_association_table", "natural_history"} | release_diff.TABLE_STAGES
+
+
+def read_codes(base_dir, path):
+    with open(tree_path(base_dir, path), encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def mutate_release(path, targets, change, rng):
+    """Change five targeted disorders, remove two and add one with a new OrphaCode."""
+    tree = ET.parse(path)
+    disorder_list = tree.getroot().find("DisorderList")
+    by_code = {d.findtext("OrphaCode"): d for d in disorder_list.findall("Disorder")}
+    picks = rng.sample([code for code in targets if code in by_code], 8)
+    for code in picks[:5]:
+        change(by_code[code])
+    for code in picks[5:7]:
+        disorder_list.remove(by_code[code])
+    added = copy.deepcopy(by_code[picks[7]])
+    added.find("OrphaCode").text = "9999001"
+    disorder_list.insert(10, added)
+    tree.write(path, encoding="ISO-8859-1", xml_declaration=True)
+
+
+def change_gene(disorder):
+    symbol = disorder.find(".//Symbol")
+    if symbol is not None:
+        symbol.text += "X"
+    status = disorder.find(".//DisorderGeneAssociationStatus/Name")
+    if status is not None:
+        status.text = "Not yet assessed"
+
+
+def change_inheritance(disorder):
+    inheritance = disorder.find(".//TypeOfInheritance")
+    if inheritance is not None:
+        inheritance.set("id", "23438")  # Mitochondrial inheritance: moves the disorder to excluded
+
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_patched_outputs_match_a_full_rebuild(synthetic_tree, tmp_path):
+    patched, rebuilt = str(tmp_path / "patched"), str(tmp_path / "rebuilt")
+    shutil.copytree(synthetic_tree, patched)
+    shutil.copytree(synthetic_tree, rebuilt)
+
+    run(patched, "run_pipeline.py")
+    run(patched, "release_diff.py", "--record")
+    checked = [path for stage in run_pipeline.STAGES if stage["name"] in CHECKED_STAGES for path in stage["outputs"]]
+    before = {path: read_bytes(tree_path(patched, path)) for path in checked}
+
+    rng = random.Random(0)
+    for base_dir in (patched, rebuilt):
+        rng.seed(0)
+        mutate_release(tree_path(base_dir, pipeline_paths.GENE_ASSOC_XML),
+                       read_codes(patched, TIER1), change_gene, rng)
+        mutate_release(tree_path(base_dir, pipeline_paths.NATURAL_HISTORY_XML),
+                       read_codes(patched, DEFINITIVE), change_inheritance, rng)
+
+    run(patched, "release_diff.py")
+    run(rebuilt, "run_pipeline.py")
+
+    changed = [path for path in checked if read_bytes(tree_path(patched, path)) != before[path]]
+    assert release_diff.TABLE_FILE in changed and release_diff.NH.INHERITANCE_TABLE in changed
+    for path in checked:
+        assert read_bytes(tree_path(patched, path)) == read_bytes(tree_path(rebuilt, path)), path
+
+    dry_run = run(patched, "run_pipeline.py", "--dry-run")
+    for stage in CHECKED_STAGES:
+        assert f"{stage}: up to date" in dry_run
@@ -0,0 +1,30 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from stage_metrics import StageMetrics
+
+
+def burn(n):
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+
+def test_pool_workers_are_counted_in_their_phase(tmp_path):
+    metrics_file = tmp_path / "metrics.jsonl"
+    metrics = StageMetrics("test", metrics_file=str(metrics_file))
+
+    metrics.start("pool")
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        list(pool.map(burn, [3_000_000] * 2))
+    metrics.start("local")
+    burn(100)
+    record = metrics.finish()
+
+    pool_phase, local_phase = record["phases"]
+    assert pool_phase["children_cpu_s"] > 0.05
+    assert local_phase["children_cpu_s"] == 0
+    assert pool_phase["children_peak_rss_mb"] > 0
+    assert record["children_cpu_s"] >= pool_phase["children_cpu_s"]
+    assert json.loads(metrics_file.read_text()) == record